@@ -1,12 +1,27 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
 import html
+import logging
+from news_fetcher.adapters.bbc_stories import extract_promo_content_details
+from news_fetcher.images import img_url_from_noscript
+from news_fetcher.instrumentation import emit_event, instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import Article
+from news_fetcher.streaming import StreamHandler, stream_events
+from news_fetcher.structured import (PREFERRED_FIELDS, covers_preferred_fields, field_sources, json_ld_article_fields,
+                                     structured_article_fields)
+from news_fetcher.urls import site_link
 
+# Restricted parses only build the <article> subtree
+ARTICLE_PARSE_ONLY = {'name': 'article'}
+
+@instrumented
 def extract_title(article_tag):
     """Extracts the article title."""
     title_tag = article_tag.find('h1', id='main-heading')
     return title_tag.get_text(strip=True) if title_tag else 'No title found'
 
+@instrumented
 def extract_author_and_source(article_tag):
     """Extracts the article's author and source."""
     byline_block = article_tag.find('div', attrs={"data-component": "byline-block"})
@@ -14,14 +29,15 @@ def extract_author_and_source(article_tag):
     source = 'No source found'
 
     if byline_block:
-        author_name = byline_block.find('div', class_=lambda x: x and 'TextContributorName' in x)
-        source_info = byline_block.find('div', class_=lambda x: x and 'Text' in x and 'ContributorName' not in x)
+        author_name = byline_block.find('div', class_=MATCHERS['bbc.ContributorName'])
+        source_info = byline_block.find('div', class_=MATCHERS['bbc.ContributorSource'])
 
         author = author_name.get_text(strip=True) if author_name else author
         source = source_info.get_text(strip=True) if source_info else source
 
     return author, source
 
+@instrumented
 def extract_sections(article_tag, subtitle):
     """Extracts the article's sections."""
     sections = []
@@ -47,6 +63,7 @@ def extract_sections(article_tag, subtitle):
 
     return sections
 
+@instrumented
 def extract_images(article_tag):
     """Extracts images from the article."""
     img_urls = []
@@ -57,6 +74,7 @@ def extract_images(article_tag):
             img_urls.append(img_url)
     return img_urls
 
+@instrumented
 def extract_img_url(block):
     """Extracts an image URL from a block."""
     picture_tag = block.find('picture')
@@ -64,14 +82,10 @@ def extract_img_url(block):
         img_tag = picture_tag.find('img')
         if img_tag and img_tag.has_attr('src'):
             return img_tag['src']
-        noscript_tag = picture_tag.find_next_sibling('noscript')
-        if noscript_tag:
-            noscript_soup = BeautifulSoup(noscript_tag.text, 'html.parser')
-            noscript_img_tag = noscript_soup.find('img')
-            if noscript_img_tag and noscript_img_tag.has_attr('src'):
-                return noscript_img_tag['src']
+        return img_url_from_noscript(picture_tag.find_next_sibling('noscript'))
     return None
 
+@instrumented
 def extract_related_topics(article_tag):
     """Extracts related topics from the article."""
     related_topics = []
@@ -82,11 +96,11 @@ def extract_related_topics(article_tag):
             a_tag = item.find('a')
             if a_tag and a_tag.has_attr('href'):
                 topic_name = a_tag.get_text(strip=True)
-                topic_link = "/bbc" + a_tag['href']
-                # topic_link = "https://www.bbc.co.uk/" + a_tag['href']
+                topic_link = site_link('bbc', a_tag['href'])
                 related_topics.append({'name': topic_name, 'link': topic_link})
     return related_topics
 
+@instrumented
 def extract_more_on_this_story(article_tag):
     """Extracts 'More on This Story' information from the article."""
     more_on_this_story = []
@@ -95,7 +109,7 @@ def extract_more_on_this_story(article_tag):
     if links_block:
         ul_tag = links_block.find('ul', role="list")
         if ul_tag:
-            list_items = ul_tag.find_all('li', class_=lambda x: x and 'PromoItem' in x)
+            list_items = ul_tag.find_all('li', class_=MATCHERS['bbc.PromoItem'])
             for item in list_items:
                 story_data = extract_story_data(item)
                 if story_data:
@@ -103,6 +117,7 @@ def extract_more_on_this_story(article_tag):
     
     return more_on_this_story
 
+@instrumented
 def extract_story_data(item):
     """Extracts individual story data from a list item."""
     if item:
@@ -116,36 +131,29 @@ def extract_story_data(item):
         }
     return None
 
-def extract_promo_content_details(item):
-    """Extracts title link, title, and date from promo content."""
-    # Fuzzy search for the <a> tag with class containing 'PromoLink'
-    a_tag = item.find('a', class_=lambda x: x and 'PromoLink' in x)
-    # title_link = "https://www.bbc.co.uk" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
-    title_link = "/bbc" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
-
-    # Fuzzy search for the <span> tag within a class containing 'PromoHeadline'
-    promo_headline = item.find(class_=lambda x: x and 'PromoHeadline' in x)
-    p_span = promo_headline.find('span') if promo_headline else None
-    title = p_span.get_text(strip=True) if p_span else 'No title found'
-
-    # Fuzzy search for the <span> tag with class containing 'MetadataText'
-    date_span = item.find('span', class_=lambda x: x and 'MetadataText' in x)
-    date = date_span.get_text(strip=True) if date_span else 'No date found'
-
-    return title_link, title, date
-
-def extract_data_bbc_news_content(html_content, url):
+@instrumented
+def extract_data_bbc_news_content(html_content, url, backend=None, restricted=False, as_records=False, structured=True):
     """Main function to extract content data from BBC News HTML content."""
-    print("Start extract BBC News")
-    soup = BeautifulSoup(html_content, 'html.parser')
+    emit_event(logging.DEBUG, 'bbc_content.start', url=url)
+    # The page's JSON-LD is read first, the tag walk only fills in what it lacks
+    structured_fields, structured_source = structured_article_fields(html_content) if structured else ({}, None)
+    # When it has every preferred field only the byline, images and links are read from the <article>
+    restricted = restricted or covers_preferred_fields(structured_fields)
+    soup = make_soup(html_content, backend, parse_only=ARTICLE_PARSE_ONLY if restricted else None)
     article_tag = soup.find('article')
     if not article_tag:
-        return {'news': "None"}
+        return None if as_records else {'news': "None"}
 
-    title = extract_title(article_tag)
-    print("Title: ", title)
+    title = structured_fields.get('title') or extract_title(article_tag)
+    emit_event(logging.INFO, 'bbc_content.title', url=url, title=title)
     author, source = extract_author_and_source(article_tag)
-    sections = extract_sections(article_tag, subtitle=title)
+    author = structured_fields.get('author', author)
+    if 'content' in structured_fields:
+        content = structured_fields['content']
+    else:
+        sections = extract_sections(article_tag, subtitle=title)
+        content = ' '.join(section['content'] for section in sections)
+    # The JSON-LD image is the branded share card, the article's own images are only in the page
     img_urls = extract_images(article_tag)
     related_topics = extract_related_topics(article_tag)
     more_on_this_storys = extract_more_on_this_story(article_tag)
@@ -154,21 +162,102 @@ def extract_data_bbc_news_content(html_content, url):
     article_data = {
         'news': "BBC",
         'title': title,
-        'content': ' '.join(section['content'] for section in sections), 
+        'content': content,
         'img_urls': img_urls if img_urls else '', 
         'url': url,
         'timestamp': current_time,
         'article_infos': {
             'author': author,
             'source': source,
-            'date': None
+            'date': structured_fields.get('date')
         },
         'bbc_parts': {
             'related_topics': related_topics,
             'more_on_this_story': more_on_this_storys,
         },
         'sky_parts': {}, 
+        'field_sources': field_sources(structured_fields, structured_source, used=PREFERRED_FIELDS,
+                                       fallbacks={'date': None}),
     }
 
-    return article_data
+    return Article.from_dict(article_data) if as_records else article_data
+
+class ContentStream(StreamHandler):
+    """Emits the paragraphs and sections of a streamed article as each text block closes.
+
+    Only the title, the JSON-LD scripts and the article's text and subheadline blocks are built as
+    trees, one block at a time.
+    """
+
+    def __init__(self, structured=True):
+        super().__init__()
+        self.structured = structured
+        self.article = None
+        self.done = False
+        self.structured_title = None
+        self.heading = None
+        self.title = None
+        self.subtitle = None
+        self.content = []
+
+    def start(self, element):
+        if self.done:
+            return
+        if (self.structured and self.structured_title is None and element.name == 'script'
+                and element.get('type') == 'application/ld+json'):
+            element.keep = True
+            element.info = 'json_ld'
+        elif self.article is None:
+            if element.name == 'article':
+                self.article = element
+        elif element.name == 'h1' and element.get('id') == 'main-heading' and self.heading is None:
+            self.heading = ''
+            element.keep = True
+            element.info = 'heading'
+        elif element.parent is self.article and element.name == 'div' and element.get('data-component') in ('subheadline-block', 'text-block'):
+            element.keep = True
+            element.info = element.get('data-component')
+
+    def resolve_title(self):
+        # The first section is headed by the article title, the JSON-LD one when it came first
+        if self.title is None:
+            self.title = self.structured_title or self.heading or 'No title found'
+            self.subtitle = self.title
+            self.emit({'type': 'title', 'title': self.title})
+
+    def end_section(self):
+        if self.content:
+            self.emit({'type': 'section', 'subtitle': self.subtitle, 'content': ' '.join(self.content)})
+            self.content = []
+
+    def kept(self, element):
+        if element.info == 'json_ld':
+            self.structured_title = json_ld_article_fields(element.tag.string or '').get('title')
+        elif element.info == 'heading':
+            self.heading = element.tag.get_text(strip=True)
+        elif element.info == 'subheadline-block':
+            self.resolve_title()
+            self.end_section()
+            self.subtitle = element.tag.get_text(strip=True)
+        elif element.info == 'text-block':
+            self.resolve_title()
+            for p_tag in element.tag.find_all('p'):
+                text = html.unescape(p_tag.get_text(strip=True))
+                self.content.append(text)
+                self.emit({'type': 'paragraph', 'subtitle': self.subtitle, 'text': text})
+
+    def end(self, element):
+        if element is self.article:
+            self.resolve_title()
+            self.end_section()
+            self.done = True
+
+def stream_bbc_news_content(html_stream, url=None, encoding='utf-8', structured=True):
+    """Streams a BBC News article from its body in chunks, yielding its paragraphs as soon as they are read.
 
+    html_stream is an iterable of byte chunks such as Fetcher.stream(url), a binary file or the whole
+    page. Yields a {'type': 'title', 'title'} event, then {'type': 'paragraph', 'subtitle', 'text'}
+    events and a {'type': 'section', 'subtitle', 'content'} event as each extract_sections section
+    ends. The title is the JSON-LD headline when its script comes before the article text.
+    """
+    return stream_events(html_stream, ContentStream(structured), encoding)
@@ -1,9 +1,17 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-from .parser_bbc_content import extract_promo_content_details
-from .parser_bbc_homepage import extract_img_url
-import html
-
+from news_fetcher.adapters.bbc_stories import extract_promo_content_details
+from news_fetcher.images import extract_img_url
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import page_from_dict
+from news_fetcher.urls import site_link
+
+# Restricted parses only build the three sidebar <aside> blocks
+SIDEBAR_ASIDE_IDS = ['topStories-label-aside-content', 'features-label-aside-content', 'mostRead-label-aside-content']
+SIDEBAR_PARSE_ONLY = {'name': 'aside', 'id': SIDEBAR_ASIDE_IDS}
+
+@instrumented
 def extract_top_stories(soup):
     top_stories = []
     top_stories_aside = soup.find('aside', id='topStories-label-aside-content')
@@ -11,7 +19,7 @@ def extract_top_stories(soup):
     if not top_stories_aside:
         return top_stories
     
-    top_stories_tags = top_stories_aside.find_all("li", class_=lambda x: x and 'PromoItem' in x)
+    top_stories_tags = top_stories_aside.find_all("li", class_=MATCHERS['bbc.PromoItem'])
 
     for top_story in top_stories_tags:
         top_story_link, top_story_title, top_story_date = extract_promo_content_details(top_story)
@@ -19,6 +27,7 @@ def extract_top_stories(soup):
 
     return top_stories
 
+@instrumented
 def extract_features(soup):
     features = []
     features_aside = soup.find('aside', id='features-label-aside-content')
@@ -26,17 +35,16 @@ def extract_features(soup):
     if not features_aside:
         return None
     
-    features_tags = features_aside.find_all("li", class_=lambda x: x and 'PromoItem' in x)
+    features_tags = features_aside.find_all("li", class_=MATCHERS['bbc.PromoItem'])
 
     for feature in features_tags:
         """Extracts title link, title, and date from promo content."""
         # Fuzzy search for the <a> tag with class containing 'PromoLink'
-        a_tag = feature.find('a', class_=lambda x: x and 'PromoLink' in x)
-        # title_link = "https://www.bbc.co.uk" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
-        feature_link = "/bbc" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
+        a_tag = feature.find('a', class_=MATCHERS['bbc.PromoLink'])
+        feature_link = site_link('bbc', a_tag['href']) if a_tag and a_tag.has_attr('href') else 'No link found'
 
         # Fuzzy search for the <span> tag within a class containing 'PromoHeadline'
-        promo_headline = feature.find(class_=lambda x: x and 'PromoHeadline' in x)
+        promo_headline = feature.find(class_=MATCHERS['bbc.PromoHeadline'])
         p_span = promo_headline.find('span') if promo_headline else None
         feature_title = p_span.get_text(strip=True) if p_span else 'No title found'
 
@@ -46,6 +54,7 @@ def extract_features(soup):
 
     return features
 
+@instrumented
 def extract_most_read(soup):
     most_read = []
     most_read_aside = soup.find('aside', id='mostRead-label-aside-content')
@@ -53,21 +62,21 @@ def extract_most_read(soup):
     if not most_read_aside:
         return most_read
     
-    most_read_tags = most_read_aside.find_all("li", class_=lambda x: x and 'PromoItem' in x)
+    most_read_tags = most_read_aside.find_all("li", class_=MATCHERS['bbc.PromoItem'])
 
     for most_read_tag in most_read_tags:
         a_tag = most_read_tag.find('a')
         most_read_title = a_tag.get_text(strip=True) if a_tag and a_tag.has_attr('href') else 'No title found'
-        most_read_link = "/bbc" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
-            # topic_link = "https://www.bbc.co.uk/" + a_tag['href']
+        most_read_link = site_link('bbc', a_tag['href']) if a_tag and a_tag.has_attr('href') else 'No link found'
 
         most_read.append({'most_read_title': most_read_title, 'most_read_link': most_read_link})
 
     return most_read
 
-def extract_data_bbc_news_content_sidebar(html_content):
+@instrumented
+def extract_data_bbc_news_content_sidebar(html_content, backend=None, restricted=False, as_records=False):
     """Main function to extract content data from BBC News HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, backend, parse_only=SIDEBAR_PARSE_ONLY if restricted else None)
 
     top_stories = extract_top_stories(soup)
     features = extract_features(soup)
@@ -75,10 +84,12 @@ def extract_data_bbc_news_content_sidebar(html_content):
 
     current_time = datetime.utcnow()
 
-    return {
+    sidebar_data = {
         'news': "BBC",
         'top_stories': top_stories,
         'features': features,
         'most_read': most_read,
         'timestamp': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-    }
\ No newline at end of file
+    }
+
+    return page_from_dict(sidebar_data, 'sidebar') if as_records else sidebar_data
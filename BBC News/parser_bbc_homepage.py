@@ -1,57 +1,28 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-import re
+import logging
+from news_fetcher.adapters.bbc_stories import cluster_story, extract_news_url_and_title, is_container, story_rules, top_story
+from news_fetcher.images import extract_img_url
+from news_fetcher.instrumentation import emit_event, instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import page_from_dict
+from news_fetcher.streaming import StreamHandler, collect_stories, stream_events, walk_frame
+from news_fetcher.urls import site_link
+from news_fetcher.walker import Walker, class_matches
 
-def extract_img_url(story):
-    """Extracts the image URL from a story element."""
-    img_tag = story.find('img')
-    if img_tag:
-        if img_tag.has_attr('data-src'):
-            return img_tag['data-src'].replace('{width}', '420')
-        elif img_tag.has_attr('src'):
-
-            return img_tag['src']
-        else:
-            # Handle cases wrapped in <noscript>
-            noscript_tag = story.find('noscript')
-            if noscript_tag:
-                noscript_soup = BeautifulSoup(noscript_tag.text, 'html.parser')
-                noscript_img_tag = noscript_soup.find('img')
-                if noscript_img_tag and noscript_img_tag.has_attr('src'):
-                    return noscript_img_tag['src']
-    return None
-
-def extract_news_url_and_title(story):
-    """Extracts news URL and title from a story element."""
-    news_data = {}
-
-    link_tag = story.find('a', class_=re.compile(r"PromoLink"))
-    if link_tag and link_tag.has_attr('href'):
-        href = link_tag['href']
-        if not href.startswith(('http:', 'https:')):
-            # href = "https://www.bbc.co.uk" + href
-            href = "/bbc" + href
-        news_data['url'] = href
-
-    title_tag = story.find(class_=re.compile(r"PromoHeadline"))
-    if title_tag:
-        title = title_tag.find('span')
-        news_data['title'] = title.get_text(strip=True) if title else 'No title'
-    else:
-        news_data['title'] = 'No title'
-
-    return news_data
+NATION_REGIONS = ('northern_ireland', 'wales', 'scotland', 'england', 'uk')
 
+@instrumented
 def extract_top_stories(region):
     """Extracts top stories from a given region."""
     top_stories = []
-    stories = region.find_all('li', class_=re.compile(r"ListItem"))
+    stories = region.find_all('li', class_=MATCHERS['bbc.ListItem'])
     for story in stories:
         top_news = {}
         img_url = extract_img_url(story)
         top_news['img_url'] = img_url if img_url else ""
 
-        summary_tag = story.find('p', class_=re.compile(r"Paragraph"))
+        summary_tag = story.find('p', class_=MATCHERS['bbc.Paragraph'])
         top_news['intro'] = summary_tag.get_text(strip=True) if summary_tag else ""
 
         news_details = extract_news_url_and_title(story)
@@ -61,11 +32,12 @@ def extract_top_stories(region):
         top_stories.append(top_news)
     return top_stories
 
+@instrumented
 def extract_clusters(cluster, cluster_title):
     """Extracts news clusters from a given region."""
     cluster_news_list = []
 
-    news_tags = cluster.find_all('li', class_=re.compile(r"ListItem"))
+    news_tags = cluster.find_all('li', class_=MATCHERS['bbc.ListItem'])
 
     for news_tag in news_tags:
 
@@ -78,33 +50,38 @@ def extract_clusters(cluster, cluster_title):
 
     return {'title': cluster_title, 'content': cluster_news_list}
 
+@instrumented
 def extract_most_watched(cluster, cluster_title):
     most_watched_news_list = []
-    news_tags = cluster.find_all('li', class_=re.compile(r"PromoItem"))
+    news_tags = cluster.find_all('li', class_=MATCHERS['bbc.PromoItem'])
     for news_tag in news_tags:
         news_data = {}
-        link_tag = news_tag.find('a', class_=re.compile(r"Headline"))
+        link_tag = news_tag.find('a', class_=MATCHERS['bbc.Headline'])
         if link_tag and link_tag.has_attr('href'):
-            href = link_tag['href']
-            if not href.startswith(('http:', 'https:')):
-                # href = "https://www.bbc.co.uk" + href
-                href = "/bbc" + href
+            href = site_link('bbc', link_tag['href'])
             news_data['url'] = href
         news_data['title'] = link_tag.get_text(strip=True) if link_tag else 'No title'
         most_watched_news_list.append(news_data)
 
     return {'title': cluster_title, 'content': most_watched_news_list}
 
-def extract_data_bbc_news_homepage(html_content, url):
-    """Main function to extract data from BBC News HTML content."""
-    print("Start")
-    soup = BeautifulSoup(html_content, 'html.parser')
-    main_content = soup.find(id="main-content")
+def most_watched_story(promo):
+    """A story dict like extract_most_watched makes, from a walked promo frame."""
+    news_data = {}
+    link_tag = promo.get('link')
+    if link_tag and link_tag.has_attr('href'):
+        news_data['url'] = site_link('bbc', link_tag['href'])
+    news_data['title'] = link_tag.get_text(strip=True) if link_tag else 'No title'
+    return news_data
+
+def promo_rules():
+    return (('link', 'a', MATCHERS['bbc.Headline'], None),)
 
+@instrumented
+def search_homepage(main_content):
+    """Extracts the nation top stories and the clusters of the main content with a search per region and story."""
     clusters = []
-    current_time = datetime.utcnow()
 
-    
     northern_ireland    = main_content.find(id="nations-news-northern_ireland")
     wales               = main_content.find(id="nations-news-wales")
     scotland            = main_content.find(id="nations-news-scotland")
@@ -122,12 +99,12 @@ def extract_data_bbc_news_homepage(html_content, url):
     if main_content:
         clustrers = [
             child for child in main_content.children 
-            if child.has_attr('class') and re.compile(r"Container").search(' '.join(child['class']))
+            if child.has_attr('class') and MATCHERS['bbc.Container'].search(' '.join(child['class']))
         ]
 
         for cluster in clustrers:
             cluster_DATA = []
-            title_tag = cluster.find('h2', class_=re.compile(r'Heading'))
+            title_tag = cluster.find('h2', class_=MATCHERS['bbc.Heading'])
             if title_tag:
                 title = title_tag.get_text(strip=True)
             else:
@@ -142,10 +119,194 @@ def extract_data_bbc_news_homepage(html_content, url):
 
             clusters.append(cluster_DATA)
 
-    return {
+    return top_stories, clusters
+
+@instrumented
+def walk_homepage(main_content):
+    """Extracts the nation top stories and the clusters of the main content in a single pass.
+
+    Returns (top_stories, clusters) equal to what the find based steps above build.
+    """
+    regions = {}
+    containers = []
+    rules = story_rules()
+    most_watched_rules = promo_rules()
+
+    def dispatch(walker, tag, depth):
+        # Stories first, a container or region only holds the stories below it
+        if tag.name == 'li':
+            if class_matches(tag, MATCHERS['bbc.ListItem']):
+                story = walker.open(tag, 'story', rules)
+                for frame in walker.active:
+                    if frame.kind in ('region', 'cluster'):
+                        frame.add('story', story)
+            if class_matches(tag, MATCHERS['bbc.PromoItem']):
+                promo = walker.open(tag, 'promo', most_watched_rules)
+                for frame in walker.enclosing('cluster'):
+                    frame.add('promo', promo)
+        region = tag.get('id')
+        if region and region.startswith('nations-news-') and region[13:] not in regions:
+            regions[region[13:]] = walker.open(tag, 'region')
+        if depth == 1 and is_container(tag):
+            containers.append(walker.open(tag, 'cluster', (('title', 'h2', MATCHERS['bbc.Heading'], None),)))
+
+    Walker(dispatch).walk(main_content)
+
+    top_stories = {
+        region: [top_story(story) for story in regions[region].items.get('story', [])] if region in regions else []
+        for region in NATION_REGIONS
+    }
+
+    clusters = []
+    for cluster in containers:
+        title_tag = cluster.get('title')
+        if not title_tag:
+            continue
+        title = title_tag.get_text(strip=True)
+
+        if title in ["More news on iPlayer and Sounds"]:
+            continue
+        elif title in ["Most watched", "Most read"]:
+            content = [most_watched_story(promo) for promo in cluster.items.get('promo', [])]
+        else:
+            content = [cluster_story(story) for story in cluster.items.get('story', [])]
+        clusters.append({'title': title, 'content': content})
+
+    return top_stories, clusters
+
+@instrumented
+def extract_data_bbc_news_homepage(html_content, url, backend=None, as_records=False, single_pass=True):
+    """Main function to extract data from BBC News HTML content.
+
+    single_pass walks the main content once, single_pass=False runs a find/find_all search per region
+    and story. Both give the same data.
+    """
+    emit_event(logging.DEBUG, 'bbc_homepage.start', url=url)
+    soup = make_soup(html_content, backend)
+    main_content = soup.find(id="main-content")
+
+    current_time = datetime.utcnow()
+
+    if not single_pass:
+        top_stories, clusters = search_homepage(main_content)
+    elif main_content:
+        top_stories, clusters = walk_homepage(main_content)
+    else:
+        top_stories, clusters = {region: [] for region in NATION_REGIONS}, []
+
+    homepage_data = {
         'news': "BBC",
         'top_stories': top_stories,
         'clusters': clusters,
         'timestamp': current_time,
         'url': url,
     }
+
+    return page_from_dict(homepage_data, 'homepage') if as_records else homepage_data
+
+class HomepageStream(StreamHandler):
+    """Emits the stories of a streamed homepage as each story <li> closes.
+
+    Only the story <li>s and cluster headings are built as trees, and dropped once read. Stories of a
+    cluster whose heading has not been read yet are held back as dicts until it is.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.main_content = None
+        self.done = False
+        self.regions = set()
+        self.clusters = 0
+        self.rules = story_rules()
+        self.promo_rules = promo_rules()
+
+    def start(self, element):
+        if self.done:
+            return
+        if self.main_content is None:
+            if element.get('id') == 'main-content':
+                self.main_content = element
+            return
+
+        scopes = [ancestor.info for ancestor in element.ancestors() if ancestor.info]
+        regions = [scope['region'] for scope in scopes if 'region' in scope]
+        clusters = [scope['cluster'] for scope in scopes if 'cluster' in scope]
+        info = {}
+        if element.name == 'li' and class_matches(element, MATCHERS['bbc.ListItem']):
+            info['story'] = (regions, clusters)
+        if element.name == 'li' and clusters and class_matches(element, MATCHERS['bbc.PromoItem']):
+            info['promo'] = clusters
+        if element.name == 'h2' and clusters and not clusters[0]['heading'] and class_matches(element, MATCHERS['bbc.Heading']):
+            clusters[0]['heading'] = True
+            info['heading'] = clusters[0]
+        element.keep = bool(info)
+
+        region = element.get('id')
+        if region and region.startswith('nations-news-') and region[13:] not in self.regions:
+            self.regions.add(region[13:])
+            info['region'] = region[13:]
+        if element.parent is self.main_content and is_container(element):
+            info['cluster'] = {'index': self.clusters, 'heading': False, 'title': None, 'pending': []}
+            self.clusters += 1
+        element.info = info or None
+
+    def kept(self, element):
+        info = element.info
+        if 'story' in info:
+            regions, clusters = info['story']
+            story = walk_frame(element.tag, self.rules)
+            for region in regions:
+                if region in NATION_REGIONS:
+                    self.emit({'type': 'top_story', 'region': region, 'story': top_story(story)})
+            for cluster in clusters:
+                self.add_to_cluster(cluster, 'story', cluster_story(story))
+        if 'promo' in info:
+            promo = most_watched_story(walk_frame(element.tag, self.promo_rules))
+            for cluster in info['promo']:
+                self.add_to_cluster(cluster, 'promo', promo)
+        if 'heading' in info:
+            cluster = info['heading']
+            cluster['title'] = element.tag.get_text(strip=True)
+            if cluster['title'] not in ["More news on iPlayer and Sounds"]:
+                self.emit({'type': 'cluster', 'index': cluster['index'], 'title': cluster['title']})
+            for kind, story in cluster['pending']:
+                self.add_to_cluster(cluster, kind, story)
+            cluster['pending'] = []
+
+    def add_to_cluster(self, cluster, kind, story):
+        title = cluster['title']
+        if title is None:
+            cluster['pending'].append((kind, story))
+        elif title in ["More news on iPlayer and Sounds"]:
+            return
+        elif (kind == 'promo') == (title in ["Most watched", "Most read"]):
+            self.emit({'type': 'cluster_story', 'index': cluster['index'], 'story': story})
+
+    def end(self, element):
+        if element is self.main_content:
+            self.main_content = None
+            self.done = True
+        elif element.info and 'cluster' in element.info:
+            # A cluster without a heading is skipped
+            element.info['cluster']['pending'] = []
+
+def stream_bbc_news_homepage(html_stream, url=None, encoding='utf-8'):
+    """Streams a BBC News homepage from its body in chunks, yielding each story as soon as it is read.
+
+    html_stream is an iterable of byte chunks such as Fetcher.stream(url), a binary file or the whole
+    page. Yields {'type': 'top_story', 'region', 'story'}, {'type': 'cluster', 'index', 'title'} and
+    {'type': 'cluster_story', 'index', 'story'} events, with the story dicts of
+    extract_data_bbc_news_homepage. The page is never held whole and finished stories are dropped.
+    """
+    return stream_events(html_stream, HomepageStream(), encoding)
+
+def collect_bbc_news_homepage(events, url=None):
+    """Builds the extract_data_bbc_news_homepage result from the events of stream_bbc_news_homepage."""
+    page_data = collect_stories(events, NATION_REGIONS)
+    return {
+        'news': "BBC",
+        'top_stories': page_data['top_stories'],
+        'clusters': page_data['clusters'],
+        'timestamp': datetime.utcnow(),
+        'url': url,
+    }
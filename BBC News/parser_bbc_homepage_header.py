@@ -1,15 +1,16 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-from .parser_bbc_content import extract_promo_content_details
-from .parser_bbc_homepage import extract_img_url
-import html
-import re
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import page_from_dict
+from news_fetcher.urls import site_link
 
+@instrumented
 def extract_nav(soup):
     # Initialize an empty list to store navigation links
     nav = []
     # Find the main navigation container div by its class
-    nav_tag = soup.find('div', class_=re.compile(r'MainNavBarContainer'))
+    nav_tag = soup.find('div', class_=MATCHERS['bbc.MainNavBarContainer'])
 
     # If the navigation container doesn't exist, return the empty list
     if not nav_tag:
@@ -21,16 +22,15 @@ def extract_nav(soup):
     # Iterate through each <li> tag to extract navigation links
     for li in li_tags:
         # Find the <a> tag within <li> that has a class indicating it's a styled link
-        a_tag = li.find('a', class_=re.compile(r"StyledLink"))
-        # title_link = "https://www.bbc.co.uk" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
+        a_tag = li.find('a', class_=MATCHERS['bbc.StyledLink'])
 
         # If the <a> tag is found and it has an 'href' attribute
         if not(a_tag and a_tag.has_attr('href')):
             # If not, skip to the next <li> tag
             continue
 
-        # Construct the relative navigation URL by appending the 'href' value to a base path
-        nav_href = "/bbc" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
+        # Resolve the navigation link under the configured site prefix
+        nav_href = site_link('bbc', a_tag['href']) if a_tag and a_tag.has_attr('href') else 'No link found'
 
         # Find the <span> tag within the <a> tag that contains the navigation title
         nav_span = a_tag.find('span') if a_tag else None
@@ -43,9 +43,10 @@ def extract_nav(soup):
     # Return the list of navigation links
     return nav
 
+@instrumented
 def extract_nav_secondary(soup):
     nav_secondary = []
-    nav_secondary_tag = soup.find('div', class_=re.compile(r'MenuContainer-SecondaryNavBarContainer'))
+    nav_secondary_tag = soup.find('div', class_=MATCHERS['bbc.SecondaryNavBarContainer'])
 
     if not nav_secondary_tag:
         return nav_secondary
@@ -54,13 +55,12 @@ def extract_nav_secondary(soup):
 
     for li in li_tags:
         # Fuzzy search for the <a> tag with class containing 'PromoLink'
-        a_tag = li.find('a', class_=re.compile(r"StyledLink"))
+        a_tag = li.find('a', class_=MATCHERS['bbc.StyledLink'])
 
         if not(a_tag and a_tag.has_attr('href')):
             continue
 
-        # title_link = "https://www.bbc.co.uk" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
-        nav_sencondary_href = "/bbc" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
+        nav_sencondary_href = site_link('bbc', a_tag['href']) if a_tag and a_tag.has_attr('href') else 'No link found'
 
         # Fuzzy search for the <span> tag within a class containing 'PromoHeadline'
         nav_span = a_tag.find('span') if a_tag else None
@@ -70,17 +70,20 @@ def extract_nav_secondary(soup):
 
     return nav_secondary
 
-def extract_data_bbc_news_homepage_header(html_content):
+@instrumented
+def extract_data_bbc_news_homepage_header(html_content, backend=None, as_records=False):
     """Main function to extract content data from BBC News HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, backend)
 
     nav = extract_nav(soup)
     nav_secondary = extract_nav_secondary(soup)
     current_time = datetime.utcnow()
 
-    return {
+    header_data = {
         'news': "BBC",
         'nav': nav,
         'nav_secondary': nav_secondary,
         'timestamp': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-    }
\ No newline at end of file
+    }
+
+    return page_from_dict(header_data, 'header') if as_records else header_data
@@ -0,0 +1,30 @@
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.sites import get_extractor
+
+# The part extractors come from the site registry rather than relative imports, so this file also
+# loads outside its package
+extract_data_bbc_news_content = get_extractor('bbc_content')
+extract_data_bbc_news_content_sidebar = get_extractor('bbc_content_sidebar')
+extract_data_bbc_news_homepage_header = get_extractor('bbc_homepage_header')
+
+ARTICLE_PAGE_PARTS = ('content', 'sidebar', 'header')
+
+@instrumented
+def extract_bbc_article_page(html_content, url, parts=ARTICLE_PAGE_PARTS, backend=None):
+    """Parses a BBC News article page once and runs the requested extractors on the shared soup."""
+    unknown_parts = [part for part in parts if part not in ARTICLE_PAGE_PARTS]
+    if unknown_parts:
+        raise ValueError("Unknown BBC article page parts: %s" % ', '.join(unknown_parts))
+
+    soup = make_soup(html_content, backend)
+
+    page_data = {}
+    if 'content' in parts:
+        page_data['content'] = extract_data_bbc_news_content(soup, url)
+    if 'sidebar' in parts:
+        page_data['sidebar'] = extract_data_bbc_news_content_sidebar(soup)
+    if 'header' in parts:
+        page_data['header'] = extract_data_bbc_news_homepage_header(soup)
+
+    return page_data
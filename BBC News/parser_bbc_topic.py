@@ -1,57 +1,25 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-import re
-
-def extract_img_url(story):
-    """Extracts the image URL from a story element."""
-    img_tag = story.find('img')
-    if img_tag:
-        if img_tag.has_attr('data-src'):
-            return img_tag['data-src'].replace('{width}', '420')
-        elif img_tag.has_attr('src'):
-            # Handle non-lazy-loaded images
-            return img_tag['src']
-        else:
-            # Handle cases wrapped in <noscript>
-            noscript_tag = story.find('noscript')
-            if noscript_tag:
-                noscript_soup = BeautifulSoup(noscript_tag.text, 'html.parser')
-                noscript_img_tag = noscript_soup.find('img')
-                if noscript_img_tag and noscript_img_tag.has_attr('src'):
-                    return noscript_img_tag['src']
-    return None
-
-def extract_news_url_and_title(story):
-    """Extracts news URL and title from a story element."""
-    news_data = {}
-
-    link_tag = story.find('a', class_=re.compile(r"PromoLink"))
-    if link_tag and link_tag.has_attr('href'):
-        href = link_tag['href']
-        if not href.startswith(('http:', 'https:')):
-            # href = "https://www.bbc.co.uk" + href
-            href = "/bbc" + href
-        news_data['url'] = href
-
-    title_tag = story.find(class_=re.compile(r"PromoHeadline"))
-    if title_tag:
-        title = title_tag.find('span')
-        news_data['title'] = title.get_text(strip=True) if title else 'No title'
-    else:
-        news_data['title'] = 'No title'
-
-    return news_data
-
+from urllib.parse import parse_qs, urlsplit
+from news_fetcher.adapters.bbc_stories import cluster_story, extract_news_url_and_title, is_container, story_rules, top_story
+from news_fetcher.images import extract_img_url
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import page_from_dict
+from news_fetcher.urls import site_link
+from news_fetcher.walker import Walker, class_matches
+
+@instrumented
 def extract_top_stories(cluster, cluster_title):
     """Extracts top stories from a given region."""
     top_stories = []
-    stories = cluster.find_all('li', class_=re.compile(r"ListItem"))
+    stories = cluster.find_all('li', class_=MATCHERS['bbc.ListItem'])
     for story in stories:
         top_news = {}
         img_url = extract_img_url(story)
         top_news['img_url'] = img_url if img_url else ""
 
-        summary_tag = story.find('p', class_=re.compile(r"Paragraph"))
+        summary_tag = story.find('p', class_=MATCHERS['bbc.Paragraph'])
         top_news['intro'] = summary_tag.get_text(strip=True) if summary_tag else ""
 
         news_details = extract_news_url_and_title(story)
@@ -61,11 +29,12 @@ def extract_top_stories(cluster, cluster_title):
         top_stories.append(top_news)
     return top_stories
 
+@instrumented
 def extract_clusters(cluster, cluster_title):
     """Extracts news clusters from a given region."""
     cluster_news_list = []
 
-    news_tags = cluster.find_all('li', class_=re.compile(r"ListItem"))
+    news_tags = cluster.find_all('li', class_=MATCHERS['bbc.ListItem'])
 
     for news_tag in news_tags:
 
@@ -78,20 +47,68 @@ def extract_clusters(cluster, cluster_title):
 
     return {'title': cluster_title, 'content': cluster_news_list}
 
-def extract_data_bbc_news_topics(html_content, url):
-    """Main function to extract data from BBC News HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+@instrumented
+def walk_topic(main_content):
+    """Extracts the top stories and the clusters of a topic's main content in a single pass.
+
+    Returns (top_stories, clusters) equal to what the find based steps above build.
+    """
+    containers = []
+    rules = story_rules()
+
+    def dispatch(walker, tag, depth):
+        if tag.name == 'li' and class_matches(tag, MATCHERS['bbc.ListItem']):
+            clusters = walker.enclosing('cluster')
+            if clusters:
+                story = walker.open(tag, 'story', rules)
+                for frame in clusters:
+                    frame.add('story', story)
+        if depth == 1 and is_container(tag):
+            containers.append(walker.open(tag, 'cluster', (('title', 'h2', MATCHERS['bbc.StyledHeading'], None),)))
+
+    walker = Walker(dispatch)
+    # Opened on the root, the page frame sees every node of the walk
+    page = walker.open(main_content, 'page', (('title', 'h1', None, None),))
+    walker.walk(main_content)
+
+    cluster_title = page.get('title').get_text(strip=True) if page.get('title') else ""
+    top_stories = {}
+    clusters = []
+    for index, cluster in enumerate(containers):
+        stories = cluster.items.get('story', [])
+        if index == 0:
+            top_stories = {cluster_title: [top_story(story) for story in stories]}
+            continue
+
+        title_tag = cluster.get('title')
+        if title_tag:
+            clusters.append({'title': title_tag.get_text(strip=True), 'content': [cluster_story(story) for story in stories]})
+
+    return top_stories, clusters
+
+@instrumented
+def extract_data_bbc_news_topics(html_content, url, backend=None, as_records=False, single_pass=True):
+    """Main function to extract data from BBC News HTML content.
+
+    single_pass walks the main content once, single_pass=False runs a find/find_all search per cluster
+    and story. Both give the same data.
+    """
+    soup = make_soup(html_content, backend)
     main_content = soup.find(id="main-content")
 
+    top_stories = {}
     clusters = []
     current_time = datetime.utcnow()
 
-    if main_content:
+    if main_content and single_pass:
+        top_stories, clusters = walk_topic(main_content)
+    elif main_content:
         cluster_title = main_content.find('h1').get_text(strip=True) if main_content.find('h1') else ""
 
+        # Text nodes between the containers have no attributes
         clustrers = [
-            child for child in main_content.children 
-            if child.has_attr('class') and re.compile(r"Container").search(' '.join(child['class']))
+            child for child in main_content.children
+            if child.name and child.has_attr('class') and MATCHERS['bbc.Container'].search(' '.join(child['class']))
         ]
 
         for index, cluster in enumerate(clustrers):
@@ -100,7 +117,7 @@ def extract_data_bbc_news_topics(html_content, url):
                 continue
 
             cluster_DATA = []
-            title_tag = cluster.find('h2', class_=re.compile(r'StyledHeading'))
+            title_tag = cluster.find('h2', class_=MATCHERS['bbc.StyledHeading'])
             if title_tag:
                 title = title_tag.get_text(strip=True)
             else:
@@ -110,10 +127,37 @@ def extract_data_bbc_news_topics(html_content, url):
 
             clusters.append(cluster_DATA)
 
-    return {
+    topic_data = {
         'news': "BBC",
         'top_stories': top_stories,
         'clusters': clusters,
         'timestamp': current_time,
         'url': url,
-    }
\ No newline at end of file
+    }
+
+    return page_from_dict(topic_data, 'homepage') if as_records else topic_data
+
+@instrumented
+def extract_pagination(soup, url):
+    """Extracts the current and last page number of a topic page, both 1 without pagination."""
+    page_param = parse_qs(urlsplit(url).query).get('page', ['1'])[0]
+    current_page = int(page_param) if page_param.isdigit() else 1
+
+    last_page = current_page
+    pagination = soup.find('nav', attrs={'aria-label': 'Page'})
+    if pagination:
+        for page_tag in pagination.find_all(['a', 'button', 'span']):
+            page_text = page_tag.get_text(strip=True)
+            if page_text.isdigit():
+                last_page = max(last_page, int(page_text))
+
+    return {'page': current_page, 'last_page': last_page}
+
+@instrumented
+def extract_bbc_topic_page(html_content, url, backend=None):
+    """Parses a BBC News topic page once for its stories and its pagination."""
+    soup = make_soup(html_content, backend)
+    return {
+        'topic': extract_data_bbc_news_topics(soup, url),
+        'pagination': extract_pagination(soup, url),
+    }
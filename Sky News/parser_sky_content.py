@@ -1,21 +1,34 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-import html
+from news_fetcher.images import resolve_img_url
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import Article
+from news_fetcher.streaming import StreamHandler, stream_events
+from news_fetcher.walker import class_matches
+from news_fetcher.structured import (PREFERRED_FIELDS, covers_preferred_fields, field_sources, parse_sky_date,
+                                     structured_article_fields)
 
+# Restricted parses only build the #main subtree
+MAIN_PARSE_ONLY = {'id': 'main'}
+
+@instrumented
 def extract_title(article_tag):
     """Extracts the article title."""
-    title_tag = article_tag.find('span', class_='sdc-article-header__long-title')
+    title_tag = article_tag.find('span', class_=MATCHERS['sky.ArticleTitle'])
     return title_tag.get_text(strip=True) if title_tag else 'No title found'
 
+@instrumented
 def extract_date(article_tag):
     """Extracts the article's author and source."""
-    date_tag = article_tag.find('p', class_='sdc-article-date__date-time')
+    date_tag = article_tag.find('p', class_=MATCHERS['sky.ArticleDate'])
     return date_tag.get_text(strip=True) if date_tag else 'No date found'
 
+@instrumented
 def extract_content(article_tag):
     """Extracts the article's sections."""
     full_content = ""
-    content_tag = article_tag.find('div', class_='sdc-article-body sdc-article-body--story sdc-article-body--lead')
+    content_tag = article_tag.find('div', class_=MATCHERS['sky.ArticleBody'])
 
     if content_tag:
         p_tags = content_tag.find_all('p')
@@ -24,55 +37,106 @@ def extract_content(article_tag):
 
     return full_content
 
+@instrumented
 def extract_images(article_tag):
     """Extracts images from the article."""
-    img_block = article_tag.find(class_='sdc-site-component-top__media')
+    img_block = article_tag.find(class_=MATCHERS['sky.ArticleMedia'])
     if img_block:
-        img_tag = img_block.find('img') 
-        if img_tag:
-            if img_tag.has_attr('data-src'):
-                return img_tag['data-src'].replace('{width}', '420')
-            elif img_tag.has_attr('src'):
-                # Handle non-lazy-loaded images
-                return img_tag['src']
-            else:
-                # Handle cases wrapped in <noscript>
-                noscript_tag = article_tag.find('noscript')
-                if noscript_tag:
-                    noscript_soup = BeautifulSoup(noscript_tag.text, 'html.parser')
-                    noscript_img_tag = noscript_soup.find('img')
-                    if noscript_img_tag and noscript_img_tag.has_attr('src'):
-                        return noscript_img_tag['src']
+        return resolve_img_url(img_block, noscript_scope=article_tag)
     return None
 
-def extract_data_sky_news_content(html_content, url):
+@instrumented
+def extract_data_sky_news_content(html_content, url, backend=None, restricted=False, as_records=False, structured=True):
     """Main function to extract content data from Sky News HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # The page's JSON-LD is read first, the tag walk only fills in what it lacks
+    structured_fields, structured_source = structured_article_fields(html_content) if structured else ({}, None)
+    # When it has every preferred field only the image is read from #main
+    restricted = restricted or covers_preferred_fields(structured_fields)
+    soup = make_soup(html_content, backend, parse_only=MAIN_PARSE_ONLY if restricted else None)
     article_tag = soup.find(id="main")
     if not article_tag:
-        return {'news': "None"}
+        return None if as_records else {'news': "None"}
 
-    title = extract_title(article_tag)
-    date = extract_date(article_tag)
-    content = extract_content(article_tag)
+    title = structured_fields.get('title') or extract_title(article_tag)
+    date = structured_fields.get('date')
+    if date is None:
+        date = extract_date(article_tag)
+        # The tag walk alone returns the printed date as it is, otherwise it is parsed as UK time
+        if structured:
+            date = parse_sky_date(date) or date
+    content = structured_fields.get('content') or extract_content(article_tag)
+    # The page's image honours the configured rendition width, the JSON-LD one has a fixed size
     img_url = extract_images(article_tag)
+    img_urls = [img_url] if img_url else structured_fields.get('img_urls', [])
     current_time = datetime.utcnow()
 
     article_data = {
         'news': "Sky",
         'title': title,
         'content': content,
-        'img_urls': [img_url] if img_url else [], 
+        'img_urls': img_urls,
         'url': url,
         'timestamp': current_time,
         'article_infos': {
-            'author': None, 
+            'author': structured_fields.get('author'),
             'source': None, 
             'date': date
         },
         'bbc_parts': {},
         'sky_parts': {},
+        'field_sources': field_sources(structured_fields, structured_source,
+                                       used=PREFERRED_FIELDS if img_url else PREFERRED_FIELDS + ('img_urls',),
+                                       fallbacks={'author': None}),
     }
 
-    return article_data
+    return Article.from_dict(article_data) if as_records else article_data
+
+class ContentStream(StreamHandler):
+    """Emits the title and paragraphs of a streamed article as each of them closes."""
+
+    def __init__(self):
+        super().__init__()
+        self.main = None
+        self.body = None
+        self.in_body = False
+        self.has_title = False
+        self.done = False
+
+    def start(self, element):
+        if self.done:
+            return
+        if self.main is None:
+            if element.get('id') == 'main':
+                self.main = element
+        elif not self.has_title and element.name == 'span' and class_matches(element, MATCHERS['sky.ArticleTitle']):
+            self.has_title = True
+            element.keep = True
+            element.info = 'title'
+        elif self.body is None:
+            if element.name == 'div' and class_matches(element, MATCHERS['sky.ArticleBody']):
+                self.body = element
+                self.in_body = True
+        elif self.in_body and element.name == 'p':
+            element.keep = True
+            element.info = 'paragraph'
+
+    def kept(self, element):
+        if element.info == 'title':
+            self.emit({'type': 'title', 'title': element.tag.get_text(strip=True)})
+        elif element.info == 'paragraph':
+            self.emit({'type': 'paragraph', 'text': element.tag.get_text(strip=True)})
+
+    def end(self, element):
+        if element is self.body:
+            self.in_body = False
+        elif element is self.main:
+            self.done = True
+
+def stream_sky_news_content(html_stream, url=None, encoding='utf-8'):
+    """Streams a Sky News article from its body in chunks, yielding its paragraphs as soon as they are read.
 
+    html_stream is an iterable of byte chunks such as Fetcher.stream(url), a binary file or the whole
+    page. Yields a {'type': 'title', 'title'} event and a {'type': 'paragraph', 'text'} event for every
+    paragraph of the article body, in order. Joined, the paragraphs are extract_content's text.
+    """
+    return stream_events(html_stream, ContentStream(), encoding)
@@ -1,44 +1,28 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-import re
-
-def extract_img_url(article):
-    """Extracts the image URL from a story element."""
-    img_tag = article.find('img')
-    if img_tag:
-        if img_tag.has_attr('data-src'):
-            return img_tag['data-src'].replace('{width}', '420')
-        elif img_tag.has_attr('src'):
-            # Handle non-lazy-loaded images
-            return img_tag['src']
-        else:
-            # Handle cases wrapped in <noscript>
-            noscript_tag = article.find('noscript')
-            if noscript_tag:
-                noscript_soup = BeautifulSoup(noscript_tag.text, 'html.parser')
-                noscript_img_tag = noscript_soup.find('img')
-                if noscript_img_tag and noscript_img_tag.has_attr('src'):
-                    return noscript_img_tag['src']
-    return None
+from news_fetcher.images import extract_img_url, img_url_from_tags
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import page_from_dict
+from news_fetcher.streaming import StreamHandler, collect_stories, stream_events, walk_frame
+from news_fetcher.urls import site_link
+from news_fetcher.walker import Walker, class_matches
 
+@instrumented
 def extract_news_url_and_title(article):
     """Extracts news URL and title from a story element."""
     news_data = {}
 
-    title_block = article.find('div', class_='ui-story-headline')
+    title_block = article.find('div', class_=MATCHERS['sky.StoryHeadline'])
     if title_block:
         title_tag = title_block.find('a') 
         if title_tag and title_tag.has_attr('href'):
-            href = title_tag['href']
-            # Ensure the URL is absolute
-            if not href.startswith(('http:', 'https:')):
-                # href = "https://news.sky.com/" + href
-                href = "/sky" + href
+            href = site_link('sky', title_tag['href'])
 
             news_data['title'] = title_tag.get_text(strip=True)
             news_data['url'] = href
 
-    author_block = article.find('div', class_='ui-story-meta')
+    author_block = article.find('div', class_=MATCHERS['sky.StoryMeta'])
     if author_block:
         author_tag = author_block.find('a') 
         if author_tag:
@@ -46,29 +30,27 @@ def extract_news_url_and_title(article):
 
     return news_data
 
+@instrumented
 def extract_most_read_news_url_and_title(article):
     """Extracts news URL and title from a story element."""
     news_data = {}
 
     title_tag = article.find('a')
     if title_tag and title_tag.has_attr('href'):
-        href = title_tag['href']
-        # Ensure the URL is absolute
-        if not href.startswith(('http:', 'https:')):
-            # href = "https://news.sky.com/" + href
-            href = "/sky" + href
+        href = site_link('sky', title_tag['href'])
 
         news_data['title'] = title_tag.get_text(strip=True)
         news_data['url'] = href
 
     return news_data
 
+@instrumented
 def extract_clusters(section):
     """Extracts news clusters from a given region."""
     cluster_title = ''
     cluster_news_list = []
 
-    title_element = section.find(class_='ui-section-header-title')
+    title_element = section.find(class_=MATCHERS['sky.SectionHeaderTitle'])
     if title_element:
         cluster_title = title_element.text.strip()
 
@@ -90,16 +72,103 @@ def extract_clusters(section):
 
     return {'title': cluster_title, 'content': cluster_news_list}
 
-def extract_data_sky_news_homepage(html_content, url):
-    """Main function to extract data from Sky News HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+def is_skipped_section(section):
+    return section.get('aria-label') == "Videos Videos" or section.get('role') == 'tabpanel'
+
+def article_rules():
+    """Walker rules for what the story extractors above look up in an <article>."""
+    return (
+        ('img', 'img', None, None),
+        ('noscript', 'noscript', None, None),
+        ('headline', 'div', MATCHERS['sky.StoryHeadline'], None),
+        ('headline_link', 'a', None, 'headline'),
+        ('meta', 'div', MATCHERS['sky.StoryMeta'], None),
+        ('meta_link', 'a', None, 'meta'),
+    )
+
+def item_rules():
+    return (('link', 'a', None, None),)
+
+def article_story(article):
+    """A story dict like extract_clusters makes for an <article>, from a walked frame."""
+    cluster_news = {}
+    img_url = img_url_from_tags(article.get('img'), article.get('noscript'))
+    if img_url:
+        cluster_news['img_url'] = img_url
+
+    title_tag = article.get('headline_link')
+    if title_tag and title_tag.has_attr('href'):
+        cluster_news['title'] = title_tag.get_text(strip=True)
+        cluster_news['url'] = site_link('sky', title_tag['href'])
+
+    author_tag = article.get('meta_link')
+    if author_tag:
+        cluster_news['author'] = author_tag.get_text(strip=True)
+    return cluster_news
+
+def most_read_story(item):
+    """A story dict like extract_clusters makes for a Most Read <li>, from a walked frame."""
+    cluster_news = {}
+    title_tag = item.get('link')
+    if title_tag and title_tag.has_attr('href'):
+        cluster_news['title'] = title_tag.get_text(strip=True)
+        cluster_news['url'] = site_link('sky', title_tag['href'])
+    return cluster_news
+
+@instrumented
+def walk_homepage(main_container):
+    """Extracts the clusters of the page content in a single pass.
+
+    Returns the clusters equal to what the find based steps above build.
+    """
+    # The sections are those of the first page content <div>
+    bodies = []
+    sections = []
+    rules = {'article': article_rules(), 'li': item_rules()}
+
+    def dispatch(walker, tag, depth):
+        if tag.name == 'div' and not bodies and class_matches(tag, MATCHERS['sky.PageContent']):
+            bodies.append(walker.open(tag, 'body'))
+        elif tag.name == 'section' and walker.enclosing('body'):
+            if not is_skipped_section(tag):
+                sections.append(walker.open(tag, 'section', (('title', None, MATCHERS['sky.SectionHeaderTitle'], None),)))
+        elif tag.name in ('li', 'article'):
+            enclosing = walker.enclosing('section')
+            if enclosing:
+                story = walker.open(tag, tag.name, rules[tag.name])
+                for section in enclosing:
+                    section.add(tag.name, story)
+
+    Walker(dispatch).walk(main_container)
+
+    clusters = []
+    for section in sections:
+        title_element = section.get('title')
+        cluster_title = title_element.text.strip() if title_element else ''
+        if cluster_title == "Most Read":
+            content = [most_read_story(item) for item in section.items.get('li', [])]
+        else:
+            content = [article_story(article) for article in section.items.get('article', [])]
+        clusters.append({'title': cluster_title, 'content': content})
+    return clusters
+
+@instrumented
+def extract_data_sky_news_homepage(html_content, url, backend=None, as_records=False, single_pass=True):
+    """Main function to extract data from Sky News HTML content.
+
+    single_pass walks the main container once, single_pass=False runs a find/find_all search per
+    section and story. Both give the same data.
+    """
+    soup = make_soup(html_content, backend)
     main_container = soup.find(id="main")
 
     clusters = []
     current_time = datetime.utcnow()
 
-    if main_container:
-        main_body = main_container.find('div', class_=re.compile(r'page-content'))
+    if main_container and single_pass:
+        clusters = walk_homepage(main_container)
+    elif main_container:
+        main_body = main_container.find('div', class_=MATCHERS['sky.PageContent'])
         if main_body:
             sections = main_body.find_all('section')
 
@@ -108,9 +177,102 @@ def extract_data_sky_news_homepage(html_content, url):
                     continue
                 clusters.append(extract_clusters(section))
 
-    return {
+    homepage_data = {
         'news': "Sky",
         'clusters': clusters,
         'timestamp': current_time,
         'url': url,
-    }
\ No newline at end of file
+    }
+
+    return page_from_dict(homepage_data, 'sky_homepage') if as_records else homepage_data
+
+class HomepageStream(StreamHandler):
+    """Emits the stories of a streamed homepage as each <article> or Most Read <li> closes.
+
+    Only the stories and section headers are built as trees, and dropped once read. Stories of a section
+    whose header has not been read yet are held back as dicts until it is, or the section ends without one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.main_container = None
+        self.main_body = None
+        self.done = False
+        self.sections = 0
+        self.rules = {'article': article_rules(), 'li': item_rules()}
+
+    def start(self, element):
+        if self.done:
+            return
+        if self.main_container is None:
+            if element.get('id') == 'main':
+                self.main_container = element
+            return
+        if self.main_body is None:
+            if element.name == 'div' and class_matches(element, MATCHERS['sky.PageContent']):
+                self.main_body = element
+            return
+
+        sections = [ancestor.info['section'] for ancestor in element.ancestors() if ancestor.info and 'section' in ancestor.info]
+        info = {}
+        if element.name in ('li', 'article') and sections:
+            info[element.name] = sections
+        if sections and not sections[0]['heading'] and class_matches(element, MATCHERS['sky.SectionHeaderTitle']):
+            sections[0]['heading'] = True
+            info['heading'] = sections[0]
+        element.keep = bool(info)
+
+        if element.name == 'section' and not is_skipped_section(element):
+            info['section'] = {'index': self.sections, 'heading': False, 'title': None, 'pending': []}
+            self.sections += 1
+        element.info = info or None
+
+    def kept(self, element):
+        info = element.info
+        if 'li' in info:
+            story = most_read_story(walk_frame(element.tag, self.rules['li']))
+            for section in info['li']:
+                self.add_to_section(section, 'li', story)
+        if 'article' in info:
+            story = article_story(walk_frame(element.tag, self.rules['article']))
+            for section in info['article']:
+                self.add_to_section(section, 'article', story)
+        if 'heading' in info:
+            self.set_title(info['heading'], element.tag.text.strip())
+
+    def set_title(self, section, title):
+        section['title'] = title
+        self.emit({'type': 'cluster', 'index': section['index'], 'title': title})
+        for kind, story in section['pending']:
+            self.add_to_section(section, kind, story)
+        section['pending'] = []
+
+    def add_to_section(self, section, kind, story):
+        if section['title'] is None:
+            section['pending'].append((kind, story))
+        elif (kind == 'li') == (section['title'] == "Most Read"):
+            self.emit({'type': 'cluster_story', 'index': section['index'], 'story': story})
+
+    def end(self, element):
+        if element is self.main_body or element is self.main_container:
+            self.done = True
+        elif element.info and 'section' in element.info and element.info['section']['title'] is None:
+            self.set_title(element.info['section'], '')
+
+def stream_sky_news_homepage(html_stream, url=None, encoding='utf-8'):
+    """Streams a Sky News homepage from its body in chunks, yielding each story as soon as it is read.
+
+    html_stream is an iterable of byte chunks such as Fetcher.stream(url), a binary file or the whole
+    page. Yields {'type': 'cluster', 'index', 'title'} and {'type': 'cluster_story', 'index', 'story'}
+    events, with the story dicts of extract_data_sky_news_homepage.
+    """
+    return stream_events(html_stream, HomepageStream(), encoding)
+
+def collect_sky_news_homepage(events, url=None):
+    """Builds the extract_data_sky_news_homepage result from the events of stream_sky_news_homepage."""
+    return {
+        'news': "Sky",
+        'clusters': collect_stories(events)['clusters'],
+        'timestamp': datetime.utcnow(),
+        'url': url,
+    }
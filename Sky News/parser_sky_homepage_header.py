@@ -1,10 +1,14 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
-import html
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.records import page_from_dict
+from news_fetcher.urls import site_link
 
+@instrumented
 def extract_nav(soup):
     nav = []
-    nav_tag = soup.find('ul', class_='ui-news-header-nav-items')
+    nav_tag = soup.find('ul', class_=MATCHERS['sky.NavItems'])
 
     if not nav_tag:
         return nav
@@ -12,28 +16,30 @@ def extract_nav(soup):
     li_tags = nav_tag.find_all("li")
     for li in li_tags:
         # Fuzzy search for the <a> tag with class containing 'PromoLink'
-        a_tag = li.find('a', class_="ui-news-header-nav-items-link")
-        # title_link = "https://news.sky.com" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
+        a_tag = li.find('a', class_=MATCHERS['sky.NavItemsLink'])
 
         if not(a_tag and a_tag.has_attr('href')):
             continue
 
-        nav_href = "/sky" + a_tag['href'] if a_tag and a_tag.has_attr('href') else 'No link found'
+        nav_href = site_link('sky', a_tag['href']) if a_tag and a_tag.has_attr('href') else 'No link found'
         nav_title = a_tag.get_text(strip=True) if a_tag else 'No title found'
 
         nav.append({'nav_href': nav_href, 'nav_title': nav_title})
 
     return nav
 
-def extract_data_sky_news_homepage_header(html_content):
+@instrumented
+def extract_data_sky_news_homepage_header(html_content, backend=None, as_records=False):
     """Main function to extract content data from BBC News HTML content."""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, backend)
 
     nav = extract_nav(soup)
     current_time = datetime.utcnow()
 
-    return {
+    header_data = {
         'news': "BBC",
         'nav': nav,
         'timestamp': current_time.strftime('%Y-%m-%d %H:%M:%S'),
-    }
\ No newline at end of file
+    }
+
+    return page_from_dict(header_data, 'sky_header') if as_records else header_data
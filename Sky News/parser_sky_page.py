@@ -0,0 +1,27 @@
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.parser_backend import make_soup
+from news_fetcher.sites import get_extractor
+
+# The part extractors come from the site registry rather than relative imports, so this file also
+# loads outside its package
+extract_data_sky_news_content = get_extractor('sky_content')
+extract_data_sky_news_homepage_header = get_extractor('sky_homepage_header')
+
+ARTICLE_PAGE_PARTS = ('content', 'header')
+
+@instrumented
+def extract_sky_article_page(html_content, url, parts=ARTICLE_PAGE_PARTS, backend=None):
+    """Parses a Sky News article page once and runs the requested extractors on the shared soup."""
+    unknown_parts = [part for part in parts if part not in ARTICLE_PAGE_PARTS]
+    if unknown_parts:
+        raise ValueError("Unknown Sky article page parts: %s" % ', '.join(unknown_parts))
+
+    soup = make_soup(html_content, backend)
+
+    page_data = {}
+    if 'content' in parts:
+        page_data['content'] = extract_data_sky_news_content(soup, url)
+    if 'header' in parts:
+        page_data['header'] = extract_data_sky_news_homepage_header(soup)
+
+    return page_data
@@ -0,0 +1,54 @@
+"""Measures parse_many throughput from one worker process up to every core.
+
+Usage: python benchmarks/bench_parse_many.py <kind> <directory of saved pages> [--max-workers N] [--repeat R]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_fetcher.parallel import parse_many
+
+def load_pages(directory, repeat):
+    """Reads every saved page in the directory as raw bytes, repeated to make a larger corpus."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as page_file:
+            pages.append((path, page_file.read()))
+    return pages * repeat
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('kind')
+    parser.add_argument('directory')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    pages = load_pages(args.directory, args.repeat)
+    if not pages:
+        parser.error('no .html pages found in %s' % args.directory)
+
+    print('%d pages of kind %s' % (len(pages), args.kind))
+    print('%8s %12s %10s' % ('workers', 'pages/sec', 'speedup'))
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        start = time.perf_counter()
+        errors = sum(1 for result in parse_many(pages, args.kind, workers=workers, ordered=False) if result['error'])
+        pages_per_second = len(pages) / (time.perf_counter() - start)
+        baseline = baseline or pages_per_second
+        print('%8d %12.1f %9.2fx%s' % (workers, pages_per_second, pages_per_second / baseline, ' (%d errors)' % errors if errors else ''))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Benchmarks every extract_data_* function on the saved fixture pages.
+
+Usage: python benchmarks/bench_parsers.py [--backend lxml] [--iterations N] [--output results.json]
+                                          [--baseline baseline.json] [--tolerance 0.2]
+
+Reports per-page latency percentiles, pages/sec and peak memory for each extractor. With --baseline the
+median latency of every extractor is compared against a stored results file, and the script exits with
+status 1 when any of them regressed by more than the tolerance.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_fetcher.parser_backend import resolve_backend
+from news_fetcher.sites import call_extractor, get_extractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Page kind -> fixture page it is benchmarked on
+CASES = {
+    'bbc_homepage': 'bbc_homepage.html',
+    'bbc_homepage_header': 'bbc_homepage.html',
+    'bbc_topic': 'bbc_topic.html',
+    'bbc_content': 'bbc_article.html',
+    'bbc_content_sidebar': 'bbc_article.html',
+    'sky_homepage': 'sky_homepage.html',
+    'sky_homepage_header': 'sky_homepage.html',
+    'sky_content': 'sky_article.html',
+}
+
+FIXTURE_URL = 'https://example.invalid/fixture'
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture_file:
+        return fixture_file.read()
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def benchmark_case(kind, html_content, backend, iterations, warmup):
+    """Times one extractor on one page and measures the peak memory of a single call."""
+    extract_function = functools.partial(get_extractor(kind), backend=backend)
+
+    def run():
+        return call_extractor(extract_function, html_content, FIXTURE_URL)
+
+    for _ in range(warmup):
+        run()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'page_bytes': len(html_content),
+        'iterations': iterations,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'pages_per_sec': iterations / sum(latencies),
+        'peak_memory_bytes': peak_memory,
+    }
+
+def run_benchmarks(backend=None, iterations=50, warmup=3, kinds=None):
+    """Benchmarks every case and returns a machine-readable results dict."""
+    backend = resolve_backend(backend)
+    results = {
+        'backend': backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': {},
+    }
+    fixtures = {}
+    for kind in kinds or CASES:
+        name = CASES[kind]
+        if name not in fixtures:
+            fixtures[name] = load_fixture(name)
+        results['cases'][kind] = benchmark_case(kind, fixtures[name], backend, iterations, warmup)
+    return results
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Returns (kind, baseline ms, current ms) for every case whose median latency regressed past the tolerance."""
+    regressions = []
+    for kind, case in results['cases'].items():
+        baseline_case = baseline.get('cases', {}).get(kind)
+        if baseline_case and case['p50_ms'] > baseline_case['p50_ms'] * (1 + tolerance):
+            regressions.append((kind, baseline_case['p50_ms'], case['p50_ms']))
+    return regressions
+
+def print_report(results):
+    print('backend: %s, python %s' % (results['backend'], results['python']))
+    print('%-22s %9s %9s %9s %11s %12s' % ('extractor', 'p50 ms', 'p90 ms', 'p99 ms', 'pages/sec', 'peak KiB'))
+    for kind, case in results['cases'].items():
+        print('%-22s %9.2f %9.2f %9.2f %11.1f %12.0f' % (
+            kind, case['p50_ms'], case['p90_ms'], case['p99_ms'], case['pages_per_sec'], case['peak_memory_bytes'] / 1024))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--kind', action='append', choices=sorted(CASES), help='only benchmark these extractors')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a results file written by --output')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed median slowdown, 0.2 is 20%%')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.backend, args.iterations, args.warmup, args.kind)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('backend') != results['backend']:
+            print('warning: baseline was recorded with the %s backend' % baseline.get('backend'))
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for kind, baseline_ms, current_ms in regressions:
+            print('REGRESSION %s: p50 %.2f ms -> %.2f ms' % (kind, baseline_ms, current_ms))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Compares the memory held by extractor results kept as dicts and as news_fetcher.records types.
+
+Usage: python benchmarks/bench_records_memory.py [--pages N] [--kind bbc_homepage]
+
+Every extractor parses its fixture page N times in each mode and keeps all the results, the way a worker
+holding a batch of parsed pages would. The memory still allocated afterwards is measured with tracemalloc.
+"""
+import argparse
+import functools
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parsers import CASES, FIXTURE_URL, load_fixture
+from news_fetcher.sites import call_extractor, get_extractor
+
+def retained_memory(extract_function, html_content, pages):
+    """Returns the bytes still allocated after keeping the results of parsing the page pages times."""
+    gc.collect()
+    tracemalloc.start()
+    results = [call_extractor(extract_function, html_content, FIXTURE_URL) for _ in range(pages)]
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return retained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--kind', action='append', choices=sorted(CASES), help='only measure these extractors')
+    args = parser.parse_args()
+
+    print('%-22s %12s %12s %8s' % ('extractor', 'dict KiB', 'record KiB', 'saved'))
+    for kind in args.kind or CASES:
+        html_content = load_fixture(CASES[kind])
+        extract_function = get_extractor(kind)
+        dict_bytes = retained_memory(extract_function, html_content, args.pages)
+        record_bytes = retained_memory(functools.partial(extract_function, as_records=True), html_content, args.pages)
+        print('%-22s %12.0f %12.0f %7.0f%%' % (
+            kind, dict_bytes / 1024, record_bytes / 1024, 100 * (1 - record_bytes / dict_bytes)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Times url routing with the compiled Router against trying each site's patterns in turn.
+
+Usage: python benchmarks/bench_router.py [--urls N] [--sites 1 --sites 50]
+
+Extra synthetic sites, each with the BBC's routes on its own host, are added to the registered ones to
+show how the cost per url grows with the number of sites. The urls are a mix of routed and unrouted
+links on the BBC and Sky hosts.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_fetcher.adapters import SITES, Router, SiteAdapter
+
+URLS = (
+    'https://www.bbc.co.uk/news',
+    'https://www.bbc.co.uk/news/topics/c1vw6q14rzqt',
+    'https://www.bbc.co.uk/news/articles/c4gz1v8zq0ro',
+    'https://www.bbc.co.uk/news/uk-politics-68000000',
+    'https://www.bbc.co.uk/sport/football',
+    'https://news.sky.com/',
+    'https://news.sky.com/story/some-story-13000000',
+    'https://news.sky.com/video/some-video-13000000',
+)
+
+def synthetic_sites(count):
+    sites = []
+    for index in range(count):
+        site = SiteAdapter('site%d' % index, 'site%d' % index, '.', hosts=('news.site%d.example' % index,))
+        for pattern, kind in SITES['bbc'].routes:
+            site.page('%s_%d' % (kind, index), 'module', 'function', urls=(pattern,))
+        sites.append(site)
+    return sites
+
+def chained_router(adapters):
+    """Routes like an if/elif chain: every pattern of every site is tried until one matches."""
+    routes = [(re.compile(host.replace('.', r'\.') + pattern), kind)
+              for adapter in adapters for host in adapter.hosts for pattern, kind in adapter.routes]
+
+    def route(url):
+        parts = urlsplit(url)
+        target = (parts.hostname or '') + (parts.path or '/')
+        for pattern, kind in routes:
+            if pattern.fullmatch(target):
+                return kind
+        return None
+    return route
+
+def us_per_url(route, urls):
+    start = time.perf_counter()
+    for url in urls:
+        route(url)
+    return (time.perf_counter() - start) / len(urls) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=100000)
+    parser.add_argument('--sites', type=int, action='append', help='extra synthetic sites, 0, 10 and 100 by default')
+    args = parser.parse_args()
+    urls = [URLS[index % len(URLS)] for index in range(args.urls)]
+
+    print('%6s %8s %12s %12s %6s' % ('sites', 'routes', 'router us', 'chain us', 'same'))
+    for extra in args.sites or (0, 10, 100):
+        # The synthetic sites go first, so the chain tries all of their patterns before the real ones
+        adapters = synthetic_sites(extra) + list(SITES.values())
+        router = Router(adapters)
+        chain = chained_router(adapters)
+        same = all(router.route(url) == chain(url) for url in URLS)
+        routes = sum(len(adapter.routes) * len(adapter.hosts) for adapter in adapters)
+        print('%6d %8d %12.2f %12.2f %6s' % (len(adapters), routes, us_per_url(router.route, urls),
+                                            us_per_url(chain, urls), 'yes' if same else 'NO'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Measures the cold start of each package entry point: import time and resident memory in a fresh interpreter.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--entry sky_content] [--backend lxml]
+
+Every entry point runs in its own new process, repeat times, and the median is reported. Import time
+covers the entry point's statement only, not the interpreter starting up. Resident memory is the
+RSS of the process, read from /proc where there is one and the peak RSS otherwise. The 'python' row
+is an interpreter that imports nothing, for reference. 'first parse' rows also parse the kind's
+fixture page once, which is when BeautifulSoup and the parser backend are imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parsers import CASES, FIXTURE_URL, FIXTURES_DIR
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child: times the statement and reports what it loaded
+CHILD = '''
+import sys, time
+start = time.perf_counter()
+%s
+seconds = time.perf_counter() - start
+loaded = {'modules': len(sys.modules), 'bs4': 'bs4' in sys.modules, 'requests': 'requests' in sys.modules}
+import json, resource
+try:
+    with open('/proc/self/statm') as statm:
+        rss_kib = int(statm.read().split()[1]) * resource.getpagesize() // 1024
+except OSError:
+    # Peak rather than current RSS, in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_kib = rss // 1024 if sys.platform == 'darwin' else rss
+print(json.dumps(dict(loaded, seconds=seconds, rss_kib=rss_kib)))
+'''
+
+def entry_points(kinds, backend):
+    entries = [
+        ('python', 'pass'),
+        ('news_fetcher', 'import news_fetcher'),
+        ('news_fetcher.sites', 'import news_fetcher.sites'),
+        ('news_fetcher.parallel', 'import news_fetcher.parallel'),
+        ('news_fetcher.fetcher', 'import news_fetcher.fetcher'),
+    ]
+    for kind in kinds:
+        entries.append(('extractor %s' % kind, 'import news_fetcher\nnews_fetcher.get_extractor(%r)' % kind))
+    for kind in kinds:
+        with_fixture = 'html_content = open(%r, "rb").read()\n' % os.path.join(FIXTURES_DIR, CASES[kind])
+        entries.append(('first parse %s' % kind, with_fixture + 'import functools, news_fetcher\nnews_fetcher.call_extractor('
+                        'functools.partial(news_fetcher.get_extractor(%r), backend=%r), html_content, %r)' % (kind, backend, FIXTURE_URL)))
+    entries.append(('all extractors', 'import news_fetcher\nfor kind in news_fetcher.sites.PAGE_EXTRACTORS:\n'
+                    '    news_fetcher.get_extractor(kind)'))
+    return entries
+
+def run_child(statement):
+    code = CHILD % statement
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--entry', action='append', choices=sorted(CASES), help='only measure these page kinds')
+    parser.add_argument('--backend', default='html.parser')
+    args = parser.parse_args()
+
+    print('%-34s %10s %9s %8s %5s %9s' % ('entry point', 'import ms', 'RSS MiB', 'modules', 'bs4', 'requests'))
+    for name, statement in entry_points(args.entry or sorted(CASES), args.backend):
+        runs = [run_child(statement) for _ in range(args.repeat)]
+        print('%-34s %10.1f %9.1f %8d %5s %9s' % (
+            name, statistics.median(run['seconds'] for run in runs) * 1000,
+            statistics.median(run['rss_kib'] for run in runs) / 1024, runs[0]['modules'],
+            'yes' if runs[0]['bs4'] else 'no', 'yes' if runs[0]['requests'] else 'no'))
+
+if __name__ == '__main__':
+    main()
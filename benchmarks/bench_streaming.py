@@ -0,0 +1,107 @@
+"""Compares the streaming extractors with the tree building ones on fixture pages scaled up in size.
+
+Usage: python benchmarks/bench_streaming.py [--backend lxml] [--scale 1 --scale 8] [--kind bbc_homepage]
+                                           [--chunk-size 16384]
+
+Every fixture is made scale times longer by repeating the stories or paragraphs of its main region. The
+extract_data_* function gets the whole page, the stream_* function gets it in chunks as it would from
+Fetcher.stream. Reports the peak memory of each, measured with tracemalloc and excluding the page
+itself, the time until the first story or paragraph is available and the total time.
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from bench_parsers import CASES, FIXTURE_URL, load_fixture
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.parser_backend import resolve_backend
+from news_fetcher.sites import STREAM_EXTRACTORS, get_extractor, get_stream_extractor
+from news_fetcher.streaming import DEFAULT_CHUNK_SIZE, iter_chunks
+
+# Page kind -> the region whose children are repeated to scale the page up
+SCALED_REGIONS = {
+    'bbc_homepage': lambda soup: soup.find(id='main-content'),
+    'bbc_content': lambda soup: soup.find('article'),
+    'sky_homepage': lambda soup: soup.find('div', class_=MATCHERS['sky.PageContent']),
+    'sky_content': lambda soup: soup.find('div', class_=MATCHERS['sky.ArticleBody']),
+}
+
+# Events that give the caller something to show
+CONTENT_EVENTS = ('top_story', 'cluster_story', 'paragraph')
+
+def scaled_page(kind, html_content, scale):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    region = SCALED_REGIONS[kind](soup)
+    children = list(region.contents)
+    for _ in range(scale - 1):
+        for child in children:
+            region.append(copy.copy(child))
+    return str(soup).encode('utf-8')
+
+def peak_memory(function):
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_memory
+
+def measure_full(kind, html_content, backend):
+    extract_function = get_extractor(kind)
+
+    def run():
+        extract_function(html_content, FIXTURE_URL, backend=backend)
+
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    # Nothing is available before the whole page is parsed
+    return {'peak_bytes': peak_memory(run), 'first_ms': seconds * 1000, 'total_ms': seconds * 1000}
+
+def measure_stream(kind, html_content, chunk_size):
+    stream_function = get_stream_extractor(kind)
+
+    def run():
+        return stream_function(iter_chunks(html_content, chunk_size), FIXTURE_URL)
+
+    first = None
+    events = 0
+    start = time.perf_counter()
+    for event in run():
+        if first is None and event['type'] in CONTENT_EVENTS:
+            first = time.perf_counter() - start
+        events += 1
+    seconds = time.perf_counter() - start
+    return {'peak_bytes': peak_memory(lambda: sum(1 for _ in run())), 'first_ms': (first or seconds) * 1000,
+            'total_ms': seconds * 1000, 'events': events}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend')
+    parser.add_argument('--scale', type=int, action='append', help='page size multiples, 1, 4 and 16 by default')
+    parser.add_argument('--kind', action='append', choices=sorted(STREAM_EXTRACTORS), help='only compare these extractors')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+    backend = resolve_backend(args.backend)
+
+    print('backend: %s, chunks of %d bytes' % (backend, args.chunk_size))
+    print('%-13s %5s %9s %10s %10s %10s %10s %10s %10s' % (
+        'extractor', 'scale', 'page KiB', 'full KiB', 'stream KiB', 'full ms', 'first ms', 'stream ms', 'events'))
+    for kind in args.kind or STREAM_EXTRACTORS:
+        fixture = load_fixture(CASES[kind])
+        for scale in args.scale or (1, 4, 16):
+            html_content = scaled_page(kind, fixture, scale)
+            full = measure_full(kind, html_content, backend)
+            stream = measure_stream(kind, html_content, args.chunk_size)
+            print('%-13s %5d %9.0f %10.0f %10.0f %10.2f %10.2f %10.2f %10d' % (
+                kind, scale, len(html_content) / 1024, full['peak_bytes'] / 1024, stream['peak_bytes'] / 1024,
+                full['total_ms'], stream['first_ms'], stream['total_ms'], stream['events']))
+
+if __name__ == '__main__':
+    main()
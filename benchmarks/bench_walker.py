@@ -0,0 +1,84 @@
+"""Compares the single pass walker of the homepage and topic extractors with their find based steps.
+
+Usage: python benchmarks/bench_walker.py [--backend lxml] [--iterations N] [--kind bbc_homepage]
+
+Both modes run on the same prebuilt soup of the fixture page, so only the extraction is measured. Nodes
+visited are counted by news_fetcher.instrumentation: every node a find/find_all search or a walk steps
+through, including the same node seen again by another search. The script exits with status 1 if the
+two modes return different data.
+"""
+import argparse
+import functools
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parsers import CASES, FIXTURE_URL, load_fixture
+from news_fetcher.instrumentation import Metrics, instrumentation
+from news_fetcher.parser_backend import make_soup, resolve_backend
+from news_fetcher.sites import get_extractor
+
+# Extractors with a single pass mode
+WALKER_KINDS = ('bbc_homepage', 'bbc_topic', 'sky_homepage')
+
+def nodes_visited(kind, single_pass, html_content, backend):
+    metrics = Metrics()
+    with instrumentation(metrics):
+        # Built and looked up while instrumentation is on, so the soup counts its searches and the steps are measured
+        soup = make_soup(html_content, backend)
+        get_extractor(kind)(soup, FIXTURE_URL, single_pass=single_pass)
+    return sum(step['nodes'] for step in metrics.steps.values())
+
+def median_ms(extract_function, soup, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        extract_function(soup, FIXTURE_URL)
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000
+
+def compare(kind, backend, iterations):
+    html_content = load_fixture(CASES[kind])
+    soup = make_soup(html_content, backend)
+    modes = {single_pass: functools.partial(get_extractor(kind), single_pass=single_pass) for single_pass in (False, True)}
+
+    results = [modes[single_pass](soup, FIXTURE_URL) for single_pass in (False, True)]
+    for data in results:
+        data.pop('timestamp')
+
+    return {
+        'same_data': results[0] == results[1],
+        'search_nodes': nodes_visited(kind, False, html_content, backend),
+        'walk_nodes': nodes_visited(kind, True, html_content, backend),
+        'search_ms': median_ms(modes[False], soup, iterations),
+        'walk_ms': median_ms(modes[True], soup, iterations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--kind', action='append', choices=WALKER_KINDS, help='only compare these extractors')
+    args = parser.parse_args()
+    backend = resolve_backend(args.backend)
+
+    print('backend: %s' % backend)
+    print('%-14s %12s %12s %8s %11s %11s %6s' % ('extractor', 'search nodes', 'walk nodes', 'saved', 'search ms', 'walk ms', 'same'))
+    different = []
+    for kind in args.kind or WALKER_KINDS:
+        result = compare(kind, backend, args.iterations)
+        print('%-14s %12d %12d %7.0f%% %11.2f %11.2f %6s' % (
+            kind, result['search_nodes'], result['walk_nodes'], 100 * (1 - result['walk_nodes'] / result['search_nodes']),
+            result['search_ms'], result['walk_ms'], 'yes' if result['same_data'] else 'NO'))
+        if not result['same_data']:
+            different.append(kind)
+
+    if different:
+        print('DIFFERENT DATA: %s' % ', '.join(different))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
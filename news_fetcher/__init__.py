@@ -0,0 +1,56 @@
+"""Shared infrastructure for the BBC News and Sky News parsers.
+
+Importing the package loads nothing else. Submodules, the helpers below and every extract_data_*
+and stream_* function are imported on first access, so a worker only pays for the parsers it calls
+and BeautifulSoup is only imported by the first parse.
+"""
+import importlib
+
+# Helper name -> module it is imported from on first access
+LAZY_ATTRIBUTES = {
+    'extract': 'news_fetcher.sites',
+    'get_extractor': 'news_fetcher.sites',
+    'get_stream_extractor': 'news_fetcher.sites',
+    'extractor_for_url': 'news_fetcher.sites',
+    'call_extractor': 'news_fetcher.sites',
+    'route_url': 'news_fetcher.adapters',
+    'register_site': 'news_fetcher.adapters',
+    'SiteAdapter': 'news_fetcher.adapters',
+    'make_soup': 'news_fetcher.parser_backend',
+    'Fetcher': 'news_fetcher.fetcher',
+    'crawl': 'news_fetcher.pipeline',
+    'parse_many': 'news_fetcher.parallel',
+    'replay': 'news_fetcher.replay',
+    'NDJSONWriter': 'news_fetcher.output',
+    'iter_ndjson': 'news_fetcher.output',
+}
+
+SUBMODULES = frozenset((
+    'adapters', 'archive', 'cache', 'columnar', 'diff', 'fetcher', 'images', 'instrumentation', 'matchers',
+    'output', 'parallel', 'parser_backend', 'pipeline', 'records', 'replay', 'scheduler', 'sites', 'store',
+    'streaming', 'structured', 'topics', 'urls', 'walker',
+))
+
+def _site_function(name):
+    """Returns an extract or stream function of a registered site by name, importing only its module."""
+    from news_fetcher.sites import PAGE_EXTRACTORS, STREAM_EXTRACTORS, load_site_module
+    for package_name, module_name, function_name in list(PAGE_EXTRACTORS.values()) + list(STREAM_EXTRACTORS.values()):
+        if function_name == name:
+            return getattr(load_site_module(package_name, module_name), function_name)
+    return None
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module('news_fetcher.%s' % name)
+    if name in LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(LAZY_ATTRIBUTES[name]), name)
+    else:
+        value = _site_function(name) if not name.startswith('__') else None
+        if value is None:
+            raise AttributeError("module 'news_fetcher' has no attribute %r" % name)
+    # Later lookups find it in the module without going through __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | SUBMODULES | set(LAZY_ATTRIBUTES))
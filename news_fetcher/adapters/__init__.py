@@ -0,0 +1,7 @@
+from news_fetcher.adapters.registry import (
+    PAGE_EXTRACTORS, REPO_ROOT, SITE_PACKAGES, SITES, STREAM_EXTRACTORS, Router, SiteAdapter, get_router, get_site,
+    register_site, route_url,
+)
+
+# The built-in sites register themselves on import
+from news_fetcher.adapters import bbc, sky
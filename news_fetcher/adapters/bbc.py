@@ -0,0 +1,17 @@
+import os
+
+from news_fetcher.adapters.registry import REPO_ROOT, SiteAdapter, register_site
+
+BBC = SiteAdapter('bbc', 'news_fetcher_bbc', os.path.join(REPO_ROOT, 'BBC News'),
+                  hosts=('www.bbc.co.uk', 'www.bbc.com', 'bbc.co.uk', 'bbc.com'), link_base='https://www.bbc.co.uk')
+BBC.page('bbc_homepage', 'parser_bbc_homepage', 'extract_data_bbc_news_homepage', stream='stream_bbc_news_homepage',
+         urls=(r'/news/?',))
+BBC.page('bbc_homepage_header', 'parser_bbc_homepage_header', 'extract_data_bbc_news_homepage_header')
+BBC.page('bbc_topic', 'parser_bbc_topic', 'extract_data_bbc_news_topics', urls=(r'/news/topics/[^/]+(?:/[^/]+)?/?',))
+BBC.page('bbc_topic_page', 'parser_bbc_topic', 'extract_bbc_topic_page')
+BBC.page('bbc_content', 'parser_bbc_content', 'extract_data_bbc_news_content', stream='stream_bbc_news_content')
+BBC.page('bbc_content_sidebar', 'parser_bbc_content_sidebar', 'extract_data_bbc_news_content_sidebar')
+# Articles have an /articles/<id> path, older ones a <section>-<number> slug
+BBC.page('bbc_article_page', 'parser_bbc_page', 'extract_bbc_article_page',
+         urls=(r'/news/articles/[0-9a-z]+/?', r'/news/[0-9a-z_-]+-\d+/?'))
+register_site(BBC)
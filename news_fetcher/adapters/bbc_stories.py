@@ -0,0 +1,87 @@
+from news_fetcher.images import img_url_from_tags
+from news_fetcher.instrumentation import instrumented
+from news_fetcher.matchers import MATCHERS
+from news_fetcher.urls import site_link
+
+@instrumented
+def extract_news_url_and_title(story):
+    """Extracts news URL and title from a story element."""
+    news_data = {}
+
+    link_tag = story.find('a', class_=MATCHERS['bbc.PromoLink'])
+    if link_tag and link_tag.has_attr('href'):
+        href = site_link('bbc', link_tag['href'])
+        news_data['url'] = href
+
+    title_tag = story.find(class_=MATCHERS['bbc.PromoHeadline'])
+    if title_tag:
+        title = title_tag.find('span')
+        news_data['title'] = title.get_text(strip=True) if title else 'No title'
+    else:
+        news_data['title'] = 'No title'
+
+    return news_data
+
+@instrumented
+def extract_promo_content_details(item):
+    """Extracts title link, title, and date from promo content."""
+    # Fuzzy search for the <a> tag with class containing 'PromoLink'
+    a_tag = item.find('a', class_=MATCHERS['bbc.PromoLink'])
+    title_link = site_link('bbc', a_tag['href']) if a_tag and a_tag.has_attr('href') else 'No link found'
+
+    # Fuzzy search for the <span> tag within a class containing 'PromoHeadline'
+    promo_headline = item.find(class_=MATCHERS['bbc.PromoHeadline'])
+    p_span = promo_headline.find('span') if promo_headline else None
+    title = p_span.get_text(strip=True) if p_span else 'No title found'
+
+    # Fuzzy search for the <span> tag with class containing 'MetadataText'
+    date_span = item.find('span', class_=MATCHERS['bbc.MetadataText'])
+    date = date_span.get_text(strip=True) if date_span else 'No date found'
+
+    return title_link, title, date
+
+def story_rules():
+    """Walker rules for what the story extractors above look up in a story <li>."""
+    return (
+        ('img', 'img', None, None),
+        ('noscript', 'noscript', None, None),
+        ('summary', 'p', MATCHERS['bbc.Paragraph'], None),
+        ('link', 'a', MATCHERS['bbc.PromoLink'], None),
+        ('headline', None, MATCHERS['bbc.PromoHeadline'], None),
+        ('headline_text', 'span', None, 'headline'),
+    )
+
+def story_url_and_title(story):
+    """extract_news_url_and_title of a walked story frame."""
+    news_data = {}
+
+    link_tag = story.get('link')
+    if link_tag and link_tag.has_attr('href'):
+        news_data['url'] = site_link('bbc', link_tag['href'])
+
+    title = story.get('headline_text')
+    news_data['title'] = title.get_text(strip=True) if title else 'No title'
+    return news_data
+
+def top_story(story):
+    """A top story dict like extract_top_stories makes, from a walked story frame."""
+    summary_tag = story.get('summary')
+    news_details = story_url_and_title(story)
+    return {
+        'img_url': img_url_from_tags(story.get('img'), story.get('noscript')) or "",
+        'intro': summary_tag.get_text(strip=True) if summary_tag else "",
+        'title': news_details['title'],
+        'url': news_details.get('url', ''),
+    }
+
+def cluster_story(story):
+    """A cluster story dict like extract_clusters makes, from a walked story frame."""
+    cluster_news = {}
+    img_url = img_url_from_tags(story.get('img'), story.get('noscript'))
+    if img_url:
+        cluster_news['img_url'] = img_url
+    cluster_news.update(story_url_and_title(story))
+    return cluster_news
+
+def is_container(tag):
+    return tag.has_attr('class') and MATCHERS['bbc.Container'].search(' '.join(tag['class'])) is not None
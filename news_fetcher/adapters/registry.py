@@ -0,0 +1,120 @@
+from urllib.parse import urlsplit
+import os
+import re
+
+from news_fetcher.urls import LINK_CONFIG, LINK_PREFIXES, absolute_url
+
+# The built-in site parsers live in plain directories at the repo root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Site name -> registered SiteAdapter
+SITES = {}
+
+# Package name each site directory is imported under, so its relative imports resolve
+SITE_PACKAGES = {}
+
+# Page kind -> (package, module, function) of the extractor handling it
+PAGE_EXTRACTORS = {}
+
+# Page kind -> (package, module, function) of the streaming extractor handling it
+STREAM_EXTRACTORS = {}
+
+_router = None
+
+class SiteAdapter:
+    """A news site: the directory its parser modules live in, its page kinds and the urls routed to them.
+
+    Url patterns are regexes matched against the whole path of urls on one of hosts. Once registered
+    with register_site, the site's extractors are found by get_extractor and its urls by route_url.
+    """
+
+    def __init__(self, name, package, path, hosts, link_base=None):
+        self.name = name
+        self.package = package
+        self.path = path
+        self.hosts = tuple(host.lower() for host in hosts)
+        self.link_base = link_base
+        self.pages = {}
+        self.streams = {}
+        self.routes = []
+
+    def page(self, kind, module, function, stream=None, urls=()):
+        """Adds a page kind extracted by module.function, optionally streamed by module.stream and routed from urls."""
+        self.pages[kind] = (module, function)
+        if stream is not None:
+            self.streams[kind] = (module, stream)
+        for pattern in urls:
+            self.routes.append((pattern, kind))
+        return self
+
+class Router:
+    """Maps urls to page kinds with a dict lookup on the host and one match of that host's combined routes.
+
+    Every route of a host is a named alternative of a single compiled regex, so the cost of routing a
+    url does not grow with the number of sites, and the first route listed wins on an overlap.
+    """
+
+    def __init__(self, adapters):
+        host_routes = {}
+        for adapter in adapters:
+            for host in adapter.hosts:
+                host_routes.setdefault(host, []).extend(adapter.routes)
+
+        self._hosts = {}
+        for host, routes in host_routes.items():
+            kinds = {}
+            alternatives = []
+            for index, (pattern, kind) in enumerate(routes):
+                kinds['route%d' % index] = kind
+                alternatives.append('(?P<route%d>%s)' % (index, pattern))
+            self._hosts[host] = (re.compile('|'.join(alternatives)), kinds)
+        self.kinds = tuple(sorted({kind for routes in host_routes.values() for _, kind in routes}))
+
+    def route(self, url):
+        """Returns the page kind of a url or an extractor link such as '/bbc/news/x', None if no site routes it."""
+        try:
+            parts = urlsplit(absolute_url(url))
+        except ValueError:
+            return None
+        routes = self._hosts.get(parts.hostname or '')
+        if routes is None:
+            return None
+        match = routes[0].fullmatch(parts.path or '/')
+        return routes[1][match.lastgroup] if match else None
+
+def register_site(adapter):
+    """Adds a site's page kinds, extractors and url routes to the ones get_extractor and route_url know."""
+    global _router
+    for kind in adapter.pages:
+        if kind in PAGE_EXTRACTORS and PAGE_EXTRACTORS[kind][0] != adapter.package:
+            raise ValueError("Page kind %r is already registered by %s" % (kind, PAGE_EXTRACTORS[kind][0]))
+
+    SITES[adapter.name] = adapter
+    SITE_PACKAGES[adapter.package] = adapter.path
+    for kind, (module, function) in adapter.pages.items():
+        PAGE_EXTRACTORS[kind] = (adapter.package, module, function)
+    for kind, (module, function) in adapter.streams.items():
+        STREAM_EXTRACTORS[kind] = (adapter.package, module, function)
+    if adapter.link_base is not None:
+        # Relative links of a new site are written under /<name> like the built-in ones
+        LINK_PREFIXES.setdefault('/%s' % adapter.name, adapter.link_base)
+        LINK_CONFIG.setdefault(adapter.name, {'base': '/%s' % adapter.name, 'strip_query': False})
+    _router = None
+    return adapter
+
+def get_site(name):
+    """Returns a registered SiteAdapter by name."""
+    if name not in SITES:
+        raise ValueError("Unknown site %r, expected one of: %s" % (name, ', '.join(SITES)))
+    return SITES[name]
+
+def get_router():
+    """Returns the Router of every registered site, compiled again after a site is registered."""
+    global _router
+    if _router is None:
+        _router = Router(SITES.values())
+    return _router
+
+def route_url(url):
+    """Returns the page kind of a url, or None if no registered site routes it."""
+    return get_router().route(url)
@@ -0,0 +1,12 @@
+import os
+
+from news_fetcher.adapters.registry import REPO_ROOT, SiteAdapter, register_site
+
+SKY = SiteAdapter('sky', 'news_fetcher_sky', os.path.join(REPO_ROOT, 'Sky News'), hosts=('news.sky.com',),
+                  link_base='https://news.sky.com')
+SKY.page('sky_homepage', 'parser_sky_homepage', 'extract_data_sky_news_homepage', stream='stream_sky_news_homepage',
+         urls=(r'/?',))
+SKY.page('sky_homepage_header', 'parser_sky_homepage_header', 'extract_data_sky_news_homepage_header')
+SKY.page('sky_content', 'parser_sky_content', 'extract_data_sky_news_content', stream='stream_sky_news_content')
+SKY.page('sky_article_page', 'parser_sky_page', 'extract_sky_article_page', urls=(r'/story/[^/]+/?',))
+register_site(SKY)
@@ -0,0 +1,169 @@
+import mmap
+import zlib
+
+# A simple archive is a concatenation of records: a b'NFARC <length> <url>\n' line, the page and b'\n'
+SIMPLE_ARCHIVE_MAGIC = b'NFARC '
+WARC_MAGIC = b'WARC/'
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Compressed bytes fed to zlib at a time while looking for the end of a gzip member
+GZIP_READ_SIZE = 1 << 20
+
+def write_archive_record(archive_file, url, content):
+    """Appends a page to a simple archive opened in binary mode."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if any(character.isspace() for character in url):
+        raise ValueError("Archive urls cannot contain whitespace: %r" % url)
+    archive_file.write(b'%s%d %s\n' % (SIMPLE_ARCHIVE_MAGIC, len(content), url.encode('utf-8')))
+    archive_file.write(content)
+    archive_file.write(b'\n')
+
+def archive_format(buffer):
+    """Tells 'warc', 'warc.gz' or 'simple' from the first bytes of an archive, None if it is none of them."""
+    if buffer[:len(WARC_MAGIC)] == WARC_MAGIC:
+        return 'warc'
+    if buffer[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        return 'warc.gz'
+    if buffer[:len(SIMPLE_ARCHIVE_MAGIC)] == SIMPLE_ARCHIVE_MAGIC:
+        return 'simple'
+    return None
+
+def _dechunk(body):
+    """Decodes an HTTP chunked transfer encoded body, as far as it is complete."""
+    chunks = []
+    position = 0
+    while True:
+        line_end = body.find(b'\r\n', position)
+        if line_end < 0:
+            break
+        size = int(bytes(body[position:line_end]).split(b';')[0].strip() or b'0', 16)
+        if size == 0:
+            break
+        chunks.append(bytes(body[line_end + 2:line_end + 2 + size]))
+        position = line_end + 2 + size + 2
+    return b''.join(chunks)
+
+def http_payload(block):
+    """Splits an archived HTTP response into (status, headers, decoded body), (None, {}, None) if it is not one."""
+    head_end = block.find(b'\r\n\r\n')
+    if head_end < 0:
+        return None, {}, None
+    lines = bytes(block[:head_end]).decode('iso-8859-1').split('\r\n')
+    status_line = lines[0].split()
+    if len(status_line) < 2 or not status_line[0].startswith('HTTP/') or not status_line[1].isdigit():
+        return None, {}, None
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    body = block[head_end + 4:]
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = _dechunk(body)
+    if headers.get('content-encoding', '').lower() in ('gzip', 'x-gzip', 'deflate'):
+        try:
+            # 32 + MAX_WBITS detects a gzip or zlib header
+            body = zlib.decompress(body, 32 + zlib.MAX_WBITS)
+        except zlib.error:
+            return int(status_line[1]), headers, None
+    return int(status_line[1]), headers, bytes(body)
+
+def _warc_record(buffer, offset):
+    """Parses the WARC record at offset, returns (headers, block, offset of the next record) or None at the end."""
+    header_end = buffer.find(b'\r\n\r\n', offset)
+    if header_end < 0:
+        return None
+    lines = bytes(buffer[offset:header_end]).decode('utf-8', errors='replace').split('\r\n')
+    if not lines[0].startswith('WARC/'):
+        raise ValueError("No WARC record at offset %d" % offset)
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    block_start = header_end + 4
+    block_end = block_start + int(headers.get('content-length', 0))
+    if block_end > len(buffer):
+        # A record cut off by an interrupted write
+        return None
+    # Records are followed by two CRLFs
+    return headers, buffer[block_start:block_end], block_end + 4
+
+def _gunzip_member(buffer, offset):
+    """Decompresses the gzip member at offset, returns (data, offset of the next member)."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    data = []
+    position = offset
+    while not decompressor.eof and position < len(buffer):
+        data.append(decompressor.decompress(buffer[position:position + GZIP_READ_SIZE]))
+        position = min(position + GZIP_READ_SIZE, len(buffer))
+    if not decompressor.eof:
+        return None, len(buffer)
+    return b''.join(data), position - len(decompressor.unused_data)
+
+def _page(headers, block):
+    """Returns (url, page, status) of a WARC response or resource record, or None for any other record."""
+    record_type = headers.get('warc-type')
+    url = headers.get('warc-target-uri', '').strip('<>')
+    if record_type == 'response' and 'application/http' in headers.get('content-type', ''):
+        status, _, body = http_payload(block)
+        return (url, body, status) if body is not None else None
+    if record_type == 'resource':
+        return url, bytes(block), 200
+    return None
+
+def _iter_warc(buffer, offset, compressed):
+    while offset < len(buffer):
+        if compressed:
+            data, next_offset = _gunzip_member(buffer, offset)
+            record = _warc_record(data, 0) if data else None
+        else:
+            record = _warc_record(buffer, offset)
+            next_offset = record[2] if record else len(buffer)
+        if record is None:
+            return
+        headers, block, _ = record
+        page = _page(headers, block)
+        yield {'offset': offset, 'end': next_offset, 'url': page[0] if page else headers.get('warc-target-uri', '').strip('<>'),
+               'status': page[2] if page else None, 'content': page[1] if page else None,
+               'date': headers.get('warc-date'), 'type': headers.get('warc-type')}
+        offset = next_offset
+
+def _iter_simple(buffer, offset):
+    while offset < len(buffer):
+        line_end = buffer.find(b'\n', offset)
+        if line_end < 0:
+            return
+        magic, length, url = bytes(buffer[offset:line_end]).split(b' ', 2)
+        start = line_end + 1
+        end = start + int(length)
+        if end > len(buffer):
+            return
+        yield {'offset': offset, 'end': end + 1, 'url': url.decode('utf-8'), 'status': 200,
+               'content': bytes(buffer[start:end]), 'date': None, 'type': 'resource'}
+        offset = end + 1
+
+def iter_archive(path, offset=0):
+    """Yields the records of a WARC, gzipped WARC or simple archive file, starting at a record offset.
+
+    The file is memory-mapped, so only the pages being read are paged in, however large the archive.
+    Each record is a dict with the url, the HTTP status, the decoded page as bytes in content (None
+    for WARC records that are not responses), the WARC-Date, and its offset and end in the file to
+    resume from. A record cut off at the end of the file is left out.
+    """
+    with open(path, 'rb') as archive_file:
+        try:
+            mapped = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            return
+    with mapped:
+        kind = archive_format(mapped)
+        if kind is None:
+            raise ValueError("%s is not a WARC or simple archive" % path)
+        if kind == 'simple':
+            yield from _iter_simple(mapped, offset)
+        else:
+            yield from _iter_warc(mapped, offset, compressed=kind == 'warc.gz')
@@ -0,0 +1,122 @@
+import collections
+import copy
+import functools
+import hashlib
+import threading
+import time
+
+from news_fetcher.sites import call_extractor
+
+def hash_content(content):
+    """Returns a digest of a page body, used to spot unchanged pages."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def _extractor_key(extract_function):
+    """Names an extractor with the arguments functools.partial binds to it, so each variant is cached apart."""
+    args, keywords = (), {}
+    while isinstance(extract_function, functools.partial):
+        # Arguments of an outer partial come after and override those of the one it wraps
+        args = extract_function.args + args
+        keywords = dict(extract_function.keywords, **keywords)
+        extract_function = extract_function.func
+    return '%s.%s%r%r' % (extract_function.__module__, extract_function.__qualname__, args, sorted(keywords.items()))
+
+class PageCache:
+    """Caches parsed pages by url so unchanged pages are never parsed twice.
+
+    Each entry keeps the ETag and Last-Modified validators, a hash of the body and the parsed dict.
+    Fetches send conditional requests, a 304 or a body with the same hash returns the cached dict
+    without parsing. Entries expire after ttl seconds and the least recently used ones are evicted
+    beyond max_entries. Every caller gets its own copy of the cached dict, so changing it does not
+    change the cache.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {'not_modified': 0, 'unchanged': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hits(self):
+        return self.stats['not_modified'] + self.stats['unchanged']
+
+    def get(self, url, extract_function):
+        """Returns the live entry for the url and extractor, or None."""
+        key = (url, _extractor_key(extract_function))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and self.clock() - entry['stored_at'] > self.ttl:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, url, extract_function, response, body_hash, data):
+        key = (url, _extractor_key(extract_function))
+        with self._lock:
+            self._entries[key] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body_hash': body_hash,
+                'data': data,
+                'stored_at': self.clock(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _touch(self, entry, response):
+        """Refreshes the validators and age of an entry that was confirmed unchanged."""
+        with self._lock:
+            entry['etag'] = response.headers.get('ETag') or entry['etag']
+            entry['last_modified'] = response.headers.get('Last-Modified') or entry['last_modified']
+            entry['stored_at'] = self.clock()
+
+    def fetch_and_extract(self, fetcher, url, extract_function):
+        """Fetches the url conditionally and returns its parsed dict, parsing only when the body changed."""
+        return self.refresh(fetcher, url, extract_function)[0]
+
+    def refresh(self, fetcher, url, extract_function):
+        """Like fetch_and_extract, but returns (parsed dict, whether the page was parsed again)."""
+        entry = self.get(url, extract_function)
+
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = fetcher.fetch(url, headers=headers or None)
+        if entry is not None and response.status_code == 304:
+            self._count('not_modified')
+            self._touch(entry, response)
+            return copy.deepcopy(entry['data']), False
+        response.raise_for_status()
+
+        body_hash = hash_content(response.content)
+        if entry is not None and entry['body_hash'] == body_hash:
+            self._count('unchanged')
+            self._touch(entry, response)
+            return copy.deepcopy(entry['data']), False
+
+        self._count('misses')
+        data = call_extractor(extract_function, response.content, url)
+        self.put(url, extract_function, response, body_hash, copy.deepcopy(data))
+        return data, True
@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+
+from news_fetcher.output import EXTRACTOR_TIMESTAMP_FORMAT
+
+# Columns of the headline table, one row per story placement on a homepage or topic page snapshot
+HEADLINE_COLUMNS = ('site', 'page_url', 'section', 'cluster', 'position', 'title', 'url', 'img_url', 'snapshot_time')
+
+# Columns stored as dictionary-encoded strings, snapshots repeat the same values over and over
+DICTIONARY_COLUMNS = ('site', 'page_url', 'section', 'cluster', 'title', 'url', 'img_url')
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Columnar export needs the pyarrow package: pip install pyarrow")
+    return pyarrow
+
+def headline_schema():
+    pa = _pyarrow()
+    fields = []
+    for column in HEADLINE_COLUMNS:
+        if column in DICTIONARY_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        elif column == 'position':
+            fields.append(pa.field(column, pa.int32()))
+        else:
+            fields.append(pa.field(column, pa.timestamp('s', tz='UTC')))
+    return pa.schema(fields)
+
+def snapshot_time(value):
+    """Reads a snapshot timestamp, a datetime, an extractor string or ISO 8601 as written by NDJSONWriter, as UTC."""
+    if isinstance(value, str):
+        try:
+            value = datetime.strptime(value, EXTRACTOR_TIMESTAMP_FORMAT)
+        except ValueError:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def flatten_snapshot(homepage_data):
+    """Yields one row per story placement of a BBC or Sky homepage or BBC topic page result.
+
+    BBC top stories are in section 'top_stories' with their region as cluster, everything else is in
+    section 'clusters'. Unlike diff.flatten_homepage every placement is kept, with its position in the
+    region or cluster.
+    """
+    if hasattr(homepage_data, 'to_dict'):
+        homepage_data = homepage_data.to_dict()
+    base = {
+        'site': homepage_data.get('news'),
+        'page_url': homepage_data.get('url'),
+        'snapshot_time': snapshot_time(homepage_data['timestamp']),
+    }
+
+    placements = [('top_stories', region, stories) for region, stories in (homepage_data.get('top_stories') or {}).items()]
+    placements += [('clusters', cluster['title'], cluster['content']) for cluster in homepage_data.get('clusters', [])]
+    for section, cluster_title, stories in placements:
+        for position, story in enumerate(stories):
+            yield dict(base, section=section, cluster=cluster_title, position=position,
+                       title=story.get('title'), url=story.get('url'), img_url=story.get('img_url'))
+
+class HeadlineTableWriter:
+    """Writes homepage snapshots as a headline table in Parquet or the Arrow IPC stream format.
+
+    Rows are buffered and written batch_rows at a time as one row group or record batch. String columns
+    are dictionary-encoded, so repeated titles and urls are stored once per batch.
+    """
+
+    def __init__(self, path, format='infer', batch_rows=50000, compression='zstd'):
+        if format == 'infer':
+            format = 'parquet' if path.endswith('.parquet') else 'arrow'
+        if format not in ('parquet', 'arrow'):
+            raise ValueError("Unknown format %r, expected 'parquet' or 'arrow'" % format)
+        pa = _pyarrow()
+
+        self.path = path
+        self.format = format
+        self.batch_rows = batch_rows
+        self.schema = headline_schema()
+        self.rows_written = 0
+        self._columns = {column: [] for column in HEADLINE_COLUMNS}
+
+        if format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression=compression, use_dictionary=True)
+        else:
+            # The stream format allows every batch to carry its own dictionaries, the file format does not
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            self._writer = pa.ipc.new_stream(path, self.schema, options=options)
+
+    def write(self, homepage_data):
+        """Adds every story placement of one extract_data_*_homepage or topic result."""
+        for row in flatten_snapshot(homepage_data):
+            for column in HEADLINE_COLUMNS:
+                self._columns[column].append(row[column])
+        if len(self._columns['site']) >= self.batch_rows:
+            self.flush()
+
+    def write_many(self, snapshots):
+        for homepage_data in snapshots:
+            self.write(homepage_data)
+
+    def flush(self):
+        rows = len(self._columns['site'])
+        if not rows:
+            return
+        pa = _pyarrow()
+        arrays = []
+        for field in self.schema:
+            values = self._columns[field.name]
+            if field.name in DICTIONARY_COLUMNS:
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self.format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+        self.rows_written += rows
+        self._columns = {column: [] for column in HEADLINE_COLUMNS}
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_headlines(path, format='infer'):
+    """Reads a file written by HeadlineTableWriter back as a pyarrow Table.
+
+    The per-batch dictionaries are unified, so the table can be grouped and joined on its string columns.
+    """
+    if format == 'infer':
+        format = 'parquet' if path.endswith('.parquet') else 'arrow'
+    pa = _pyarrow()
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            table = reader.read_all()
+    return table.unify_dictionaries()
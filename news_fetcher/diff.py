@@ -0,0 +1,116 @@
+import bisect
+
+from news_fetcher.urls import url_key
+
+def flatten_homepage(homepage_data):
+    """Maps each story url of a BBC or Sky homepage result to its cluster, position and fields.
+
+    BBC top stories are grouped under 'top_stories/<region>'. Clusters are named by their title, a later
+    cluster with the same title as an earlier one as '<title>#<n>'. A story shown in several places is kept
+    at its first placement.
+    """
+    placements = []
+    for region, stories in (homepage_data.get('top_stories') or {}).items():
+        placements.append(('top_stories/%s' % region, stories))
+    titles_seen = {}
+    for cluster in homepage_data.get('clusters', []):
+        # Clusters have no url, and two sharing a title must not mix their stories' positions
+        count = titles_seen[cluster['title']] = titles_seen.get(cluster['title'], 0) + 1
+        placements.append((cluster['title'] if count == 1 else '%s#%d' % (cluster['title'], count), cluster['content']))
+
+    stories_by_url = {}
+    for cluster_title, stories in placements:
+        for position, story in enumerate(stories):
+            if not story.get('url'):
+                continue
+            key = url_key(story['url'])
+            if key not in stories_by_url:
+                stories_by_url[key] = dict(story, cluster=cluster_title, position=position)
+    return stories_by_url
+
+def _in_order(keys, previous):
+    """Returns the keys of the longest run of stories still in the same order as in previous.
+
+    keys are the stories of one cluster in current order, all in the same cluster before. They form
+    a longest increasing subsequence of their previous positions, the stories outside it moved.
+    """
+    # tails[i] ends the run of length i + 1 with the smallest previous position seen so far
+    tails = []
+    tail_positions = []
+    links = {}
+    for key in keys:
+        position = previous[key]['position']
+        index = bisect.bisect_left(tail_positions, position)
+        links[key] = tails[index - 1] if index else None
+        if index == len(tails):
+            tails.append(key)
+            tail_positions.append(position)
+        else:
+            tails[index] = key
+            tail_positions[index] = position
+
+    in_order = set()
+    key = tails[-1] if tails else None
+    while key is not None:
+        in_order.add(key)
+        key = links[key]
+    return in_order
+
+def diff_homepage(previous, current):
+    """Compares two flattened homepages and returns the added, removed and moved stories.
+
+    A story moved when it changed cluster, or changed order against the other stories its cluster kept,
+    so a story added or removed above others does not mark them all as moved.
+    """
+    added = [story for key, story in current.items() if key not in previous]
+    removed = [story for key, story in previous.items() if key not in current]
+
+    kept_by_cluster = {}
+    for key, story in current.items():
+        old_story = previous.get(key)
+        if old_story is not None and old_story['cluster'] == story['cluster']:
+            kept_by_cluster.setdefault(story['cluster'], []).append(key)
+    in_order = set()
+    for keys in kept_by_cluster.values():
+        keys.sort(key=lambda key: current[key]['position'])
+        in_order |= _in_order(keys, previous)
+
+    moved = []
+    for key, story in current.items():
+        old_story = previous.get(key)
+        if old_story is None or key in in_order:
+            continue
+        moved.append({
+            'url': story['url'],
+            'title': story.get('title'),
+            'from': {'cluster': old_story['cluster'], 'position': old_story['position']},
+            'to': {'cluster': story['cluster'], 'position': story['position']},
+        })
+
+    return {
+        'added': added,
+        'removed': removed,
+        'moved': moved,
+        'unchanged': len(current) - len(added) - len(moved),
+    }
+
+class HomepageDiffer:
+    """Keeps the last snapshot of each homepage and reports only what changed on every poll."""
+
+    def __init__(self):
+        self.snapshots = {}
+
+    def update(self, homepage_data, key=None):
+        """Diffs a new extract_data_*_homepage result against the previous one for the same page.
+
+        The first snapshot of a page reports every story as added.
+        """
+        key = key or homepage_data.get('url')
+        current = flatten_homepage(homepage_data)
+        changes = diff_homepage(self.snapshots.get(key, {}), current)
+        self.snapshots[key] = current
+
+        changes['news'] = homepage_data.get('news')
+        changes['url'] = homepage_data.get('url')
+        changes['timestamp'] = homepage_data.get('timestamp')
+        return changes
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from news_fetcher.sites import call_extractor
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'News-Fetcher (+https://github.com/VergilOP/News-Fetcher)',
+    'Accept': 'text/html,application/xhtml+xml',
+}
+
+# Responses worth retrying, everything else is returned to the caller as is
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class Fetcher:
+    """Downloads pages over pooled keep-alive connections with a per-host concurrency limit and retries."""
+
+    def __init__(self, max_workers=8, per_host_limit=4, retries=3, backoff=0.5, timeout=10, session=None,
+                 max_retry_after=60, sleep=time.sleep):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_retry_after = max_retry_after
+        self.sleep = sleep
+
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            # One keep-alive pool per host, large enough for every worker thread
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _host_limit(self, url):
+        """Returns the semaphore bounding concurrent requests to the url's host."""
+        host = urlsplit(url).netloc
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _retry_delay(self, attempt, response=None):
+        """Exponential backoff with jitter, honouring a numeric Retry-After header up to max_retry_after."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                # A server cannot hold a worker for longer than max_retry_after
+                return min(float(retry_after), self.max_retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def fetch(self, url, headers=None):
+        """Fetches one url, retrying connection errors and retryable status codes."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                with self._host_limit(url):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return response
+
+            self.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    def stream(self, url, chunk_size=16 * 1024, headers=None):
+        """Yields the body of a url in chunks as it downloads, for the stream_* extractors.
+
+        Raises requests.HTTPError for an error status. Nothing is retried once the body started.
+        """
+        with self._host_limit(url):
+            response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+            try:
+                response.raise_for_status()
+                yield from response.iter_content(chunk_size)
+            finally:
+                response.close()
+
+    def fetch_many(self, urls):
+        """Fetches urls concurrently and yields a result dict for each one as it completes."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    response = future.result()
+                except requests.RequestException as error:
+                    yield {'url': url, 'status': None, 'content': None, 'error': str(error)}
+                    continue
+                yield {'url': url, 'status': response.status_code, 'content': response.content, 'error': None}
+
+    def fetch_and_extract(self, jobs):
+        """Fetches (url, extract_data_* function) jobs concurrently and yields parsed results as they complete."""
+        extract_functions = dict(jobs)
+
+        for result in self.fetch_many(extract_functions):
+            result['data'] = None
+            if result['error'] is None and result['status'] == 200:
+                try:
+                    result['data'] = call_extractor(extract_functions[result['url']], result['content'], result['url'])
+                except Exception as error:
+                    result['error'] = 'extract failed: %s' % error
+            elif result['error'] is None:
+                result['error'] = 'HTTP %s' % result['status']
+            yield result
@@ -0,0 +1,99 @@
+import functools
+import html
+import os
+import re
+
+from news_fetcher.instrumentation import instrumented
+
+# Rendition width substituted into {width} image url templates
+IMAGE_CONFIG = {
+    'width': os.environ.get('NEWS_FETCHER_IMAGE_WIDTH', '420'),
+}
+
+IMG_TAG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+ATTRIBUTE_RE = re.compile(r"""([^\s"'<>/=]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+def set_image_width(width):
+    """Sets the rendition width used for every {width} image url template."""
+    IMAGE_CONFIG['width'] = str(width)
+
+@functools.lru_cache(maxsize=4096)
+def scan_img_attributes(markup):
+    """Returns the attributes of the first <img> in a markup string without building a tree.
+
+    Results are cached, so the same noscript fallback seen by several extractors is only scanned once.
+    """
+    match = IMG_TAG_RE.search(markup)
+    if not match:
+        return {}
+    attributes = {}
+    for name, double_quoted, single_quoted, unquoted in ATTRIBUTE_RE.findall(match.group(0)[4:]):
+        value = double_quoted or single_quoted or unquoted
+        attributes.setdefault(name.lower(), html.unescape(value))
+    return attributes
+
+def pick_srcset_candidate(srcset, width=None):
+    """Picks the smallest srcset candidate at least as wide as the configured width, or the widest one."""
+    width = int(width or IMAGE_CONFIG['width'])
+    candidates = []
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        descriptor = parts[1] if len(parts) > 1 else ''
+        candidate_width = int(descriptor[:-1]) if descriptor.endswith('w') and descriptor[:-1].isdigit() else 0
+        candidates.append((candidate_width, parts[0]))
+    if not candidates:
+        return None
+    wide_enough = [candidate for candidate in candidates if candidate[0] >= width]
+    return min(wide_enough)[1] if wide_enough else max(candidates)[1]
+
+def img_url_from_attributes(attributes, width=None):
+    """Resolves an image url from img attributes, preferring data-src, then src, then srcset."""
+    if attributes.get('data-src'):
+        return attributes['data-src'].replace('{width}', str(width or IMAGE_CONFIG['width']))
+    if attributes.get('src'):
+        return attributes['src']
+    if attributes.get('srcset'):
+        return pick_srcset_candidate(attributes['srcset'], width)
+    return None
+
+def img_url_from_noscript(noscript_tag, width=None):
+    """Reads the image url from a <noscript> fallback.
+
+    Parsers that build the noscript content as tags expose the <img> directly, otherwise the escaped
+    markup is scanned for its attributes.
+    """
+    if noscript_tag is None:
+        return None
+    img_tag = noscript_tag.find('img')
+    if img_tag is not None:
+        return img_url_from_attributes(img_tag.attrs, width)
+    return img_url_from_attributes(scan_img_attributes(noscript_tag.get_text()), width)
+
+def resolve_img_url(element, width=None, noscript_scope=None):
+    """Resolves the image url of a story element, falling back to its <noscript> image.
+
+    noscript_scope is where the fallback is looked up, the element itself by default.
+    """
+    img_tag = element.find('img')
+    if img_tag is None or img_tag.has_attr('data-src') or img_tag.has_attr('src'):
+        return img_url_from_tags(img_tag, width=width)
+    scope = noscript_scope if noscript_scope is not None else element
+    return img_url_from_tags(img_tag, scope.find('noscript'), width)
+
+def img_url_from_tags(img_tag, noscript_tag=None, width=None):
+    """Resolves the image url of a story from its first <img> and first <noscript>, found by the caller."""
+    if img_tag is None:
+        return None
+    if img_tag.has_attr('data-src'):
+        return img_tag['data-src'].replace('{width}', str(width or IMAGE_CONFIG['width']))
+    if img_tag.has_attr('src'):
+        return img_tag['src']
+    # Lazy-loaded images keep their real url in a <noscript> fallback
+    return img_url_from_noscript(noscript_tag, width)
+
+@instrumented
+def extract_img_url(story):
+    """Extracts the image URL from a story element."""
+    return resolve_img_url(story)
@@ -0,0 +1,231 @@
+import bisect
+import functools
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger('news_fetcher')
+
+# Upper bounds in seconds of the step duration histogram buckets
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float('inf'))
+
+_collector = None
+_local = threading.local()
+# Wrapper of every step, bound in place of the step by enable_instrumentation
+_wrappers = {}
+_soup_class = None
+
+def _frames():
+    frames = getattr(_local, 'frames', None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+def _count_nodes(generator, frame):
+    for element in generator:
+        frame['nodes'] += 1
+        yield element
+
+class _CountingSearches:
+    """Counts the find/find_all searches of a soup built while instrumentation is on, and the nodes they visit."""
+
+    def _search(self, kind, search, *args, **kwargs):
+        frames = _frames() if _collector is not None else None
+        if not frames:
+            return search(*args, **kwargs)
+        frame = frames[-1]
+        frame[kind] += 1
+        outer, _local.search = getattr(_local, 'search', None), frame
+        try:
+            return search(*args, **kwargs)
+        finally:
+            _local.search = outer
+
+    def find(self, *args, **kwargs):
+        return self._search('find', super().find, *args, **kwargs)
+
+    def find_all(self, *args, **kwargs):
+        return self._search('find_all', super().find_all, *args, **kwargs)
+
+    # A search steps through the descendants, or the children when it is not recursive
+    @property
+    def descendants(self):
+        frame = getattr(_local, 'search', None)
+        return _count_nodes(super().descendants, frame) if frame else super().descendants
+
+    @property
+    def children(self):
+        frame = getattr(_local, 'search', None)
+        return _count_nodes(super().children, frame) if frame else super().children
+
+def counting_soup(markup, features, **kwargs):
+    """Builds a soup whose tags count their find/find_all searches against the innermost running step."""
+    global _soup_class
+    if _soup_class is None:
+        # Imported here so steps can be decorated without importing bs4
+        from bs4 import BeautifulSoup
+        from bs4.element import Tag
+
+        _soup_class = type('CountingSoup', (_CountingSearches, BeautifulSoup), {
+            'element_classes': {Tag: type('CountingTag', (_CountingSearches, Tag), {})},
+        })
+    return _soup_class(markup, features, element_classes=_soup_class.element_classes, **kwargs)
+
+def is_enabled():
+    return _collector is not None
+
+def _swap_steps(bindings):
+    """Rebinds the steps in every loaded news_fetcher module, mapping each function to its replacement."""
+    for name, module in list(sys.modules.items()):
+        if module is None or not name.startswith('news_fetcher'):
+            continue
+        namespace = vars(module)
+        for attribute, value in list(namespace.items()):
+            try:
+                replacement = bindings.get(value)
+            except TypeError:
+                continue
+            if replacement is not None:
+                namespace[attribute] = replacement
+
+def enable_instrumentation(collector):
+    """Sends step measurements and events to the collector until disable_instrumentation is called."""
+    global _collector
+    if _collector is None:
+        _swap_steps(_wrappers)
+    _collector = collector
+
+def disable_instrumentation():
+    global _collector
+    if _collector is not None:
+        _swap_steps({wrapper: function for function, wrapper in _wrappers.items()})
+    _collector = None
+
+class instrumentation:
+    """Context manager enabling instrumentation with a collector for the duration of a block."""
+
+    def __init__(self, collector):
+        self.collector = collector
+
+    def __enter__(self):
+        enable_instrumentation(self.collector)
+        return self.collector
+
+    def __exit__(self, *exc_info):
+        disable_instrumentation()
+
+def instrumented(function):
+    """Measures wall time, find/find_all calls and nodes visited of a parser step.
+
+    Steps are named <module>.<function>. Searches are counted against the innermost running step, time
+    includes nested steps. The step is returned as it is: enable_instrumentation binds the measuring wrapper
+    in its place in the loaded news_fetcher modules, and disable_instrumentation binds the step back, so a
+    disabled step costs nothing. References taken elsewhere before enabling, e.g. in a partial, stay unmeasured.
+    """
+    step = '%s.%s' % (function.__module__.rsplit('.', 1)[-1], function.__name__)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _collector is None:
+            return function(*args, **kwargs)
+
+        frames = _frames()
+        frame = {'find': 0, 'find_all': 0, 'nodes': 0}
+        frames.append(frame)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            frames.pop()
+            collector = _collector
+            if collector is not None:
+                collector.observe_step(step, seconds, frame['find'], frame['find_all'], frame['nodes'])
+
+    _wrappers[function] = wrapper
+    # A module loaded while instrumentation is on gets the wrapper straight away
+    return wrapper if _collector is not None else function
+
+def count_nodes(nodes):
+    """Counts nodes visited without find/find_all, e.g. by a Walker, against the innermost running step."""
+    if _collector is None:
+        return
+    frames = _frames()
+    if frames:
+        frames[-1]['nodes'] += nodes
+
+def emit_event(level, name, **fields):
+    """Reports a structured parser event to the collector and the news_fetcher logger."""
+    if _collector is not None:
+        _collector.event(level, name, fields)
+    if logger.isEnabledFor(level):
+        logger.log(level, '%s %s', name, fields)
+
+class CallbackCollector:
+    """Collector handing every step measurement and event to a callback as a dict."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def observe_step(self, step, seconds, finds, find_alls, nodes):
+        self.callback({'type': 'step', 'step': step, 'seconds': seconds,
+                       'find': finds, 'find_all': find_alls, 'nodes': nodes})
+
+    def event(self, level, name, fields):
+        self.callback({'type': 'event', 'level': logging.getLevelName(level), 'name': name, 'fields': fields})
+
+class Metrics:
+    """Collector aggregating step measurements into Prometheus-style counters and histograms."""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.steps = {}
+        self.events = {}
+        self._lock = threading.Lock()
+
+    def observe_step(self, step, seconds, finds, find_alls, nodes):
+        with self._lock:
+            metrics = self.steps.get(step)
+            if metrics is None:
+                metrics = self.steps[step] = {
+                    'calls': 0, 'seconds': 0.0, 'find': 0, 'find_all': 0, 'nodes': 0,
+                    'buckets': [0] * len(self.buckets),
+                }
+            metrics['calls'] += 1
+            metrics['seconds'] += seconds
+            metrics['find'] += finds
+            metrics['find_all'] += find_alls
+            metrics['nodes'] += nodes
+            metrics['buckets'][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def event(self, level, name, fields):
+        key = (logging.getLevelName(level), name)
+        with self._lock:
+            self.events[key] = self.events.get(key, 0) + 1
+
+    def render(self):
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = [
+            '# TYPE news_fetcher_step_seconds histogram',
+        ]
+        with self._lock:
+            for step, metrics in sorted(self.steps.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, metrics['buckets']):
+                    cumulative += count
+                    lines.append('news_fetcher_step_seconds_bucket{step="%s",le="%s"} %d' % (
+                        step, '+Inf' if bound == float('inf') else bound, cumulative))
+                lines.append('news_fetcher_step_seconds_sum{step="%s"} %f' % (step, metrics['seconds']))
+                lines.append('news_fetcher_step_seconds_count{step="%s"} %d' % (step, metrics['calls']))
+
+            for name, key in (('find_calls', 'find'), ('find_all_calls', 'find_all'), ('nodes_visited', 'nodes')):
+                lines.append('# TYPE news_fetcher_%s_total counter' % name)
+                for step, metrics in sorted(self.steps.items()):
+                    lines.append('news_fetcher_%s_total{step="%s"} %d' % (name, step, metrics[key]))
+
+            lines.append('# TYPE news_fetcher_events_total counter')
+            for (level, name), count in sorted(self.events.items()):
+                lines.append('news_fetcher_events_total{level="%s",event="%s"} %d' % (level, name, count))
+
+        return '\n'.join(lines) + '\n'
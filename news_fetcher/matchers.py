@@ -0,0 +1,41 @@
+import re
+
+# Class matchers for every site concept the extractors look up, compiled once at import.
+# Regexes are searched against each class value, plain strings must equal a class value
+# (or the whole class attribute). Swap an entry here, or with register_matcher, when the
+# markup changes.
+MATCHERS = {
+    # BBC News, where class names carry generated prefixes around a stable component name
+    'bbc.PromoItem': re.compile(r"PromoItem"),
+    'bbc.PromoLink': re.compile(r"PromoLink"),
+    'bbc.PromoHeadline': re.compile(r"PromoHeadline"),
+    'bbc.MetadataText': re.compile(r"MetadataText"),
+    'bbc.ListItem': re.compile(r"ListItem"),
+    'bbc.Paragraph': re.compile(r"Paragraph"),
+    'bbc.Container': re.compile(r"Container"),
+    'bbc.Heading': re.compile(r"Heading"),
+    'bbc.StyledHeading': re.compile(r"StyledHeading"),
+    'bbc.Headline': re.compile(r"Headline"),
+    'bbc.ContributorName': re.compile(r"TextContributorName"),
+    'bbc.ContributorSource': re.compile(r"^(?!.*ContributorName).*Text"),
+    'bbc.MainNavBarContainer': re.compile(r"MainNavBarContainer"),
+    'bbc.SecondaryNavBarContainer': re.compile(r"MenuContainer-SecondaryNavBarContainer"),
+    'bbc.StyledLink': re.compile(r"StyledLink"),
+
+    # Sky News, where class names are stable
+    'sky.ArticleTitle': 'sdc-article-header__long-title',
+    'sky.ArticleDate': 'sdc-article-date__date-time',
+    'sky.ArticleBody': 'sdc-article-body sdc-article-body--story sdc-article-body--lead',
+    'sky.ArticleMedia': 'sdc-site-component-top__media',
+    'sky.StoryHeadline': 'ui-story-headline',
+    'sky.StoryMeta': 'ui-story-meta',
+    'sky.SectionHeaderTitle': 'ui-section-header-title',
+    'sky.PageContent': re.compile(r"page-content"),
+    'sky.NavItems': 'ui-news-header-nav-items',
+    'sky.NavItemsLink': 'ui-news-header-nav-items-link',
+}
+
+def register_matcher(name, pattern, exact=False):
+    """Replaces or adds a named class matcher, compiling the pattern unless it is an exact class name."""
+    MATCHERS[name] = pattern if exact else re.compile(pattern)
+    return MATCHERS[name]
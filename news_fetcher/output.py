@@ -0,0 +1,193 @@
+from datetime import date, datetime, timezone
+import gzip
+import io
+import json
+import os
+import zlib
+
+# Format of the timestamps some extractors return as strings
+EXTRACTOR_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def serialise_timestamp(value):
+    """Renders an extractor timestamp, a UTC datetime or its string form, as ISO 8601 with a Z suffix."""
+    if isinstance(value, str):
+        try:
+            value = datetime.strptime(value, EXTRACTOR_TIMESTAMP_FORMAT)
+        except ValueError:
+            return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec='seconds') + 'Z'
+
+def to_json_ready(data):
+    """Converts an extractor result into plain JSON types with consistent timestamps."""
+    if isinstance(data, dict):
+        return {key: serialise_timestamp(value) if key == 'timestamp' and isinstance(value, (str, datetime))
+                else to_json_ready(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_json_ready(value) for value in data]
+    if isinstance(data, datetime):
+        return serialise_timestamp(data)
+    if isinstance(data, date):
+        return data.isoformat()
+    if hasattr(data, 'to_dict'):
+        return to_json_ready(data.to_dict())
+    return data
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression needs the zstandard package: pip install zstandard")
+    return zstandard
+
+def _compress(compression, data):
+    if compression == 'gzip':
+        return gzip.compress(data)
+    if compression == 'zstd':
+        return _zstd().ZstdCompressor().compress(data)
+    return data
+
+# Bytes read at a time while looking for the end of the last complete record of a file to resume
+REPAIR_BLOCK_SIZE = 1 << 20
+
+def _complete_length(compression, existing_file):
+    """Returns the length of the part of a file that holds only complete records.
+
+    The file is read REPAIR_BLOCK_SIZE bytes at a time, backwards from the end for plain files and
+    forwards through the compressed ones, so resuming never loads a whole file into memory.
+    """
+    if compression is None:
+        # A crash can leave a partial last line
+        end = existing_file.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - REPAIR_BLOCK_SIZE)
+            existing_file.seek(start)
+            newline = existing_file.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+        return 0
+
+    # Every flush is written as its own gzip member or zstd frame, keep the ones that decode fully
+    def new_decompressor():
+        if compression == 'gzip':
+            return zlib.decompressobj(wbits=31)
+        return _zstd().ZstdDecompressor().decompressobj()
+
+    complete = 0
+    read = 0
+    decompressor = new_decompressor()
+    data = b''
+    while True:
+        if not data:
+            data = existing_file.read(REPAIR_BLOCK_SIZE)
+            if not data:
+                break
+            read += len(data)
+        try:
+            # Only the end of each member matters, the records themselves are dropped
+            decompressor.decompress(data)
+        except Exception:
+            break
+        if not decompressor.eof:
+            data = b''
+            continue
+        complete = read - len(decompressor.unused_data)
+        # Bytes past the end of a member start the next one
+        data = decompressor.unused_data
+        decompressor = new_decompressor()
+    return complete
+
+def infer_compression(path):
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+class NDJSONWriter:
+    """Streams extractor results to a JSON Lines file, optionally gzip or zstd compressed.
+
+    Records are buffered and written flush_every at a time, each flush as a complete gzip member or
+    zstd frame, so the file is always readable up to the last flush. With resume=True an existing file
+    is appended to after cutting off whatever a crash left half written. resume_at, a size flush()
+    returned earlier, also cuts off everything written after that flush.
+    """
+
+    def __init__(self, path, compression='infer', flush_every=500, resume=True, resume_at=None):
+        if compression == 'infer':
+            compression = infer_compression(path)
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError("Unknown compression %r, expected None, 'gzip' or 'zstd'" % compression)
+        if compression == 'zstd':
+            _zstd()
+
+        self.path = path
+        self.compression = compression
+        self.flush_every = flush_every
+        self.records_written = 0
+        self._buffer = []
+
+        if resume and os.path.exists(path):
+            self._repair(resume_at)
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(path, 'wb')
+
+    def _repair(self, resume_at=None):
+        with open(self.path, 'r+b') as existing_file:
+            if resume_at is not None and resume_at < existing_file.seek(0, os.SEEK_END):
+                existing_file.truncate(resume_at)
+            existing_file.seek(0)
+            complete = _complete_length(self.compression, existing_file)
+            if complete != existing_file.seek(0, os.SEEK_END):
+                existing_file.truncate(complete)
+
+    def write(self, record):
+        self._buffer.append(json.dumps(to_json_ready(record), ensure_ascii=False, separators=(',', ':')))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Writes the buffered records and returns the size of the file, to resume at after a crash."""
+        if not self._buffer:
+            return self._file.tell()
+        data = ('\n'.join(self._buffer) + '\n').encode('utf-8')
+        self._file.write(_compress(self.compression, data))
+        self._file.flush()
+        self.records_written += len(self._buffer)
+        self._buffer = []
+        return self._file.tell()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_ndjson(path, compression='infer'):
+    """Reads back the records of a file written by NDJSONWriter."""
+    if compression == 'infer':
+        compression = infer_compression(path)
+    if compression == 'gzip':
+        stream = gzip.open(path, 'rt', encoding='utf-8')
+    elif compression == 'zstd':
+        raw_file = open(path, 'rb')
+        stream = io.TextIOWrapper(_zstd().ZstdDecompressor().stream_reader(raw_file, read_across_frames=True), encoding='utf-8')
+    else:
+        stream = open(path, encoding='utf-8')
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
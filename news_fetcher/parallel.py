@@ -0,0 +1,85 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+import collections
+import multiprocessing
+import os
+
+from news_fetcher.sites import call_extractor, get_extractor
+
+def _parse_chunk(kind, chunk):
+    """Runs in a worker process: parses a chunk of (url, html) pages with the extractor for kind.
+
+    With kind None the pages are (url, html, kind) and each result notes its kind.
+    """
+    results = []
+    for page in chunk:
+        url, html_content = page[0], page[1]
+        page_kind = kind or page[2]
+        try:
+            result = {'url': url, 'data': call_extractor(get_extractor(page_kind), html_content, url), 'error': None}
+        except Exception as error:
+            result = {'url': url, 'data': None, 'error': str(error)}
+        if kind is None:
+            result['kind'] = page_kind
+        results.append(result)
+    return results
+
+def _chunks(pages, chunksize):
+    chunk = []
+    for page in pages:
+        chunk.append(page)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def make_executor(workers=None, max_tasks_per_child=50):
+    """Creates the process pool parse_many runs on, for callers reusing one across several calls."""
+    workers = workers or os.cpu_count() or 1
+    # Recycling workers needs the spawn start method, which re-imports the extractors in each worker
+    mp_context = multiprocessing.get_context('spawn') if max_tasks_per_child else None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, max_tasks_per_child=max_tasks_per_child)
+
+def parse_many(pages, kind, workers=None, ordered=True, chunksize=8, max_tasks_per_child=50, executor=None):
+    """Parses (url, html) pages with the extractor for kind across a pool of worker processes.
+
+    With kind None, pages are (url, html, kind) triples mixing page kinds.
+
+    Pages are sent to the workers as raw bytes or str in chunks, and only the extracted dicts come
+    back. Results are yielded in input order, or as soon as each chunk finishes when ordered is
+    False. Workers are replaced after max_tasks_per_child chunks to cap their memory, and at most two
+    chunks per worker are in flight so large page streams are not read into memory at once. Pass an
+    executor from make_executor to reuse its workers across calls, it is left running.
+    """
+    # Fail on an unknown kind here rather than in every worker
+    if kind is not None:
+        get_extractor(kind)
+    workers = workers or os.cpu_count() or 1
+    if executor is not None:
+        yield from _parse_on(executor, pages, kind, workers * 2, ordered, chunksize)
+        return
+    with make_executor(workers, max_tasks_per_child) as executor:
+        yield from _parse_on(executor, pages, kind, workers * 2, ordered, chunksize)
+
+def _parse_on(executor, pages, kind, max_in_flight, ordered, chunksize):
+    chunks = _chunks(pages, chunksize)
+
+    if ordered:
+        in_flight = collections.deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(_parse_chunk, kind, chunk))
+            if len(in_flight) >= max_in_flight:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+        return
+
+    in_flight = set()
+    for chunk in chunks:
+        in_flight.add(executor.submit(_parse_chunk, kind, chunk))
+        if len(in_flight) >= max_in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    for future in as_completed(in_flight):
+        yield from future.result()
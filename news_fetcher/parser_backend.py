@@ -0,0 +1,116 @@
+import os
+import time
+
+from news_fetcher.instrumentation import counting_soup, instrumented, is_enabled
+
+# Environment variable used to pick a parser backend for every extract_data_* call
+PARSER_BACKEND_ENV = 'NEWS_FETCHER_PARSER'
+
+# Tree builders in order of preference, html.parser ships with Python and is always available
+PARSER_BACKENDS = ('lxml', 'html.parser')
+
+def _bs4():
+    # Imported on the first parse, so loading an extractor does not pull in BeautifulSoup and its tree builders
+    import bs4
+    return bs4
+
+def _strainer(parse_only):
+    """Builds the SoupStrainer of a dict of its arguments, passing a SoupStrainer or None through."""
+    if isinstance(parse_only, dict):
+        return _bs4().SoupStrainer(**parse_only)
+    return parse_only
+
+def is_backend_available(backend):
+    """Checks whether BeautifulSoup has a tree builder installed for the backend."""
+    return _bs4().builder.builder_registry.lookup(backend) is not None
+
+def available_backends():
+    """Lists the installed parser backends, fastest first."""
+    return [backend for backend in PARSER_BACKENDS if is_backend_available(backend)]
+
+def resolve_backend(backend=None):
+    """Picks the parser backend from the argument, the environment or the fastest installed one."""
+    if backend is None:
+        backend = os.environ.get(PARSER_BACKEND_ENV)
+    if not backend:
+        return available_backends()[0]
+
+    if backend not in PARSER_BACKENDS:
+        raise ValueError("Unknown parser backend %r, expected one of: %s" % (backend, ', '.join(PARSER_BACKENDS)))
+    if not is_backend_available(backend):
+        raise ValueError("Parser backend %r is not installed" % backend)
+    return backend
+
+@instrumented
+def make_soup(html_content, backend=None, parse_only=None):
+    """Builds a soup with the selected backend, passing an already built soup through.
+
+    Callers parsing several parts of one page can build the soup once and hand it to every extractor.
+    """
+    bs4 = _bs4()
+    if isinstance(html_content, bs4.BeautifulSoup):
+        return html_content
+    # parse_only is a SoupStrainer, or a dict of its arguments, restricting the tree to the regions an extractor reads
+    if is_enabled():
+        return counting_soup(html_content, resolve_backend(backend), parse_only=_strainer(parse_only))
+    return bs4.BeautifulSoup(html_content, resolve_backend(backend), parse_only=_strainer(parse_only))
+
+def _content_size(html_content):
+    """Returns the size of the raw page in bytes."""
+    if isinstance(html_content, str):
+        return len(html_content.encode('utf-8'))
+    return len(html_content)
+
+def restricted_parse_report(html_content, parse_only, backend=None):
+    """Parses the page in full and restricted to parse_only, and reports the bytes, nodes and time skipped."""
+    backend = resolve_backend(backend)
+    BeautifulSoup = _bs4().BeautifulSoup
+    parse_only = _strainer(parse_only)
+
+    start = time.perf_counter()
+    full_soup = BeautifulSoup(html_content, backend)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restricted_soup = BeautifulSoup(html_content, backend, parse_only=parse_only)
+    restricted_seconds = time.perf_counter() - start
+
+    total_bytes = _content_size(html_content)
+    kept_bytes = len(restricted_soup.encode())
+    total_nodes = len(full_soup.find_all(True))
+    kept_nodes = len(restricted_soup.find_all(True))
+
+    return {
+        'backend': backend,
+        'total_bytes': total_bytes,
+        'kept_bytes': kept_bytes,
+        'skipped_bytes': max(total_bytes - kept_bytes, 0),
+        'total_nodes': total_nodes,
+        'kept_nodes': kept_nodes,
+        'skipped_nodes': total_nodes - kept_nodes,
+        'full_parse_seconds': full_seconds,
+        'restricted_parse_seconds': restricted_seconds,
+    }
+
+def _strip_timestamps(data):
+    """Drops the per-call timestamps so results of two runs can be compared."""
+    if isinstance(data, dict):
+        return {key: _strip_timestamps(value) for key, value in data.items() if key != 'timestamp'}
+    if isinstance(data, list):
+        return [_strip_timestamps(value) for value in data]
+    return data
+
+def check_backend_parity(extract_function, html_content, *args, backends=None):
+    """Runs an extract_data_* function with every backend and returns the ones that differ from html.parser."""
+    backends = backends or available_backends()
+    reference = _strip_timestamps(extract_function(html_content, *args, backend='html.parser'))
+
+    mismatches = {}
+    for backend in backends:
+        if backend == 'html.parser':
+            continue
+        result = _strip_timestamps(extract_function(html_content, *args, backend=backend))
+        if result != reference:
+            mismatches[backend] = result
+
+    return mismatches
@@ -0,0 +1,200 @@
+from urllib.parse import urlsplit
+import asyncio
+import functools
+import inspect
+
+from news_fetcher.fetcher import Fetcher
+from news_fetcher.sites import call_extractor, get_extractor
+from news_fetcher.urls import LINK_PREFIXES, SeenSet, absolute_url, canonicalise_url, page_key
+
+# Absolute links are only followed into these hosts
+CRAWL_HOSTS = ('www.bbc.co.uk', 'www.bbc.com', 'news.sky.com')
+
+# Page kinds kept in and looked up from an ArticleStore
+ARTICLE_KINDS = ('bbc_article_page', 'sky_article_page', 'bbc_content', 'sky_content')
+
+# Extra arguments for the extractors the crawl runs, article pages skip the header
+EXTRACT_OPTIONS = {
+    'bbc_article_page': {'parts': ('content', 'sidebar')},
+    'sky_article_page': {'parts': ('content',)},
+}
+
+def resolve_link(link, link_prefixes=LINK_PREFIXES, crawl_hosts=CRAWL_HOSTS):
+    """Turns an extractor link into a canonical absolute url, or None if it is not crawlable."""
+    if not link or link == 'No link found':
+        return None
+    url = canonicalise_url(absolute_url(link, link_prefixes))
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme not in ('http', 'https') or parts.netloc not in crawl_hosts:
+        return None
+    return url
+
+def _story_links(stories, key, kind):
+    return [(story.get(key), kind) for story in stories or []]
+
+def extract_links(kind, data):
+    """Returns the (link, page kind) pairs to follow from an extractor result."""
+    links = []
+    if kind == 'bbc_homepage':
+        for stories in data.get('top_stories', {}).values():
+            links += _story_links(stories, 'url', 'bbc_article_page')
+        for cluster in data.get('clusters', []):
+            links += _story_links(cluster['content'], 'url', 'bbc_article_page')
+    elif kind == 'bbc_topic':
+        for stories in (data.get('top_stories') or {}).values():
+            links += _story_links(stories, 'url', 'bbc_article_page')
+        for cluster in data.get('clusters', []):
+            links += _story_links(cluster['content'], 'url', 'bbc_article_page')
+    elif kind in ('bbc_article_page', 'bbc_content', 'bbc_content_sidebar'):
+        content = data.get('content', {}) if kind == 'bbc_article_page' else data
+        bbc_parts = content.get('bbc_parts', {})
+        links += _story_links(bbc_parts.get('related_topics'), 'link', 'bbc_topic')
+        links += _story_links(bbc_parts.get('more_on_this_story'), 'link', 'bbc_article_page')
+
+        sidebar = data.get('sidebar', {}) if kind == 'bbc_article_page' else data
+        links += _story_links(sidebar.get('top_stories'), 'top_story_link', 'bbc_article_page')
+        links += _story_links(sidebar.get('features'), 'feature_link', 'bbc_article_page')
+        links += _story_links(sidebar.get('most_read'), 'most_read_link', 'bbc_article_page')
+    elif kind == 'sky_homepage':
+        for cluster in data.get('clusters', []):
+            links += _story_links(cluster['content'], 'url', 'sky_article_page')
+    return links
+
+class CrawlPipeline:
+    """Crawls seed homepages into their linked articles and topic pages with asyncio.
+
+    Pages are fetched and parsed by worker tasks, each url is visited once, links are followed up to
+    max_depth, and every parsed record is handed to the sink. Records pass through a bounded queue so a
+    slow sink holds back the workers instead of piling records up in memory. With an ArticleStore, articles
+    it already holds are not fetched again and newly parsed ones are added to it. seen is the set of
+    visited urls, pass a BloomFilter to bound its memory on very large crawls. max_pages bounds the
+    pages fetched, urls found once it is spent are counted once in skipped.
+    """
+
+    def __init__(self, sink, fetcher=None, max_depth=1, concurrency=8, queue_size=100, max_pages=None,
+                 link_prefixes=LINK_PREFIXES, crawl_hosts=CRAWL_HOSTS, store=None,
+                 seen=None):
+        self.sink = sink
+        # A fetcher passed in is left open for the caller
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or Fetcher(max_workers=concurrency)
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_pages = max_pages
+        self.link_prefixes = link_prefixes
+        self.crawl_hosts = set(crawl_hosts)
+        self.store = store
+        # Pages differing only in their query, such as topic page numbers, are different pages
+        self.seen = seen if seen is not None else SeenSet(key=page_key)
+        self._stored_seen = []
+        self._queued = 0
+        self.stats = {'fetched': 0, 'failed': 0, 'skipped': 0, 'stored': 0}
+
+    def _extractor(self, kind):
+        extract_function = get_extractor(kind)
+        if kind in EXTRACT_OPTIONS:
+            extract_function = functools.partial(extract_function, **EXTRACT_OPTIONS[kind])
+        return extract_function
+
+    def _resolve(self, link):
+        return resolve_link(link, self.link_prefixes, self.crawl_hosts)
+
+    async def _schedule(self, frontier, url, kind, depth):
+        """Queues a url unless it was already seen, is too deep or the page budget is spent."""
+        if url is None or url in self.seen or depth > self.max_depth:
+            return
+        # Marked seen before the store lookup, so a link found again meanwhile is not looked up twice
+        self.seen.add(url)
+        if self.store is not None and kind in ARTICLE_KINDS:
+            # SQLite lookups block, keep them off the event loop
+            if await asyncio.to_thread(self.store.contains, url):
+                self.stats['stored'] += 1
+                self._stored_seen.append(url)
+                return
+        if self.max_pages is not None and self._queued >= self.max_pages:
+            # The url stays seen, so links to it found later are not counted again
+            self.stats['skipped'] += 1
+            return
+        self._queued += 1
+        frontier.put_nowait((url, kind, depth))
+
+    async def _process(self, url, kind, depth):
+        record = {'url': url, 'kind': kind, 'depth': depth, 'data': None, 'error': None}
+        try:
+            response = await asyncio.to_thread(self.fetcher.fetch, url)
+            if response.status_code != 200:
+                record['error'] = 'HTTP %s' % response.status_code
+            else:
+                # Parsing is CPU bound, keep it off the event loop
+                record['data'] = await asyncio.to_thread(call_extractor, self._extractor(kind), response.content, url)
+                if self.store is not None and kind in ARTICLE_KINDS:
+                    await asyncio.to_thread(self.store.put, record['data'])
+        except Exception as error:
+            record['error'] = str(error)
+        return record
+
+    async def _worker(self, frontier, records):
+        while True:
+            url, kind, depth = await frontier.get()
+            try:
+                record = await self._process(url, kind, depth)
+                self.stats['failed' if record['error'] else 'fetched'] += 1
+                if record['data'] is not None:
+                    for link, link_kind in extract_links(kind, record['data']):
+                        await self._schedule(frontier, self._resolve(link), link_kind, depth + 1)
+                # Blocks while the sink is behind
+                await records.put(record)
+            finally:
+                frontier.task_done()
+
+    async def _drain(self, records):
+        while True:
+            record = await records.get()
+            try:
+                result = self.sink(record)
+                if inspect.isawaitable(result):
+                    await result
+            finally:
+                records.task_done()
+
+    async def _finished(self, frontier, records):
+        await frontier.join()
+        await records.join()
+
+    async def run(self, seeds):
+        """Crawls from (url, page kind) seeds until every reachable page within max_depth is processed."""
+        frontier = asyncio.Queue()
+        records = asyncio.Queue(maxsize=self.queue_size)
+        for url, kind in seeds:
+            # Seed hosts are always crawlable
+            self.crawl_hosts.add(urlsplit(url).netloc)
+            await self._schedule(frontier, self._resolve(url), kind, 0)
+
+        workers = [asyncio.create_task(self._worker(frontier, records)) for _ in range(self.concurrency)]
+        drainer = asyncio.create_task(self._drain(records))
+        finished = asyncio.create_task(self._finished(frontier, records))
+        try:
+            await asyncio.wait([finished, drainer], return_when=asyncio.FIRST_COMPLETED)
+            if drainer.done():
+                # The sink raised, surface its error instead of waiting on blocked workers
+                drainer.result()
+        finally:
+            finished.cancel()
+            for task in workers + [drainer]:
+                task.cancel()
+            await asyncio.gather(*workers, drainer, return_exceptions=True)
+            if self.store is not None:
+                self.store.mark_seen(self._stored_seen)
+                self._stored_seen = []
+            if self._owns_fetcher:
+                self.fetcher.close()
+
+        return self.stats
+
+def crawl(seeds, sink, **options):
+    """Runs a CrawlPipeline over the seeds from synchronous code."""
+    return asyncio.run(CrawlPipeline(sink, **options).run(seeds))
@@ -0,0 +1,250 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Compact, immutable records for extractor results. Field names are the same across sites, to_dict()
+# rebuilds the exact dict each extractor returns (including its original key names).
+
+@dataclass(frozen=True, slots=True)
+class StoryPromo:
+    """A story teaser on a homepage, topic page or in an article's 'More on this story'.
+
+    layout is the dict shape to_dict() rebuilds: 'top_story', 'cluster' or 'more_on_this_story'.
+    """
+    title: Optional[str]
+    url: Optional[str] = None
+    img_url: Optional[str] = None
+    intro: Optional[str] = None
+    author: Optional[str] = None
+    date: Optional[str] = None
+    layout: str = 'cluster'
+
+    def to_dict(self):
+        if self.layout == 'top_story':
+            return {'img_url': self.img_url, 'intro': self.intro, 'title': self.title, 'url': self.url}
+        if self.layout == 'more_on_this_story':
+            return {'title': self.title, 'link': self.url, 'date': self.date, 'img_url': self.img_url}
+        # Cluster entries only carry the fields the page had
+        story = {}
+        for key in ('img_url', 'url', 'title', 'author'):
+            value = getattr(self, key)
+            if value is not None:
+                story[key] = value
+        return story
+
+    @classmethod
+    def from_dict(cls, story, layout='cluster'):
+        return cls(
+            title=story.get('title'),
+            url=story.get('link') if layout == 'more_on_this_story' else story.get('url'),
+            img_url=story.get('img_url'),
+            intro=story.get('intro'),
+            author=story.get('author'),
+            date=story.get('date'),
+            layout=layout,
+        )
+
+@dataclass(frozen=True, slots=True)
+class Cluster:
+    """A titled group of stories, also used for each region of the BBC top stories."""
+    title: str
+    stories: tuple = ()
+
+    def to_dict(self):
+        return {'title': self.title, 'content': [story.to_dict() for story in self.stories]}
+
+@dataclass(frozen=True, slots=True)
+class NavLink:
+    """A header navigation link or an article's related topic.
+
+    layout is 'nav', 'nav_secondary' or 'topic'.
+    """
+    title: str
+    url: str
+    layout: str = 'nav'
+
+    def to_dict(self):
+        if self.layout == 'topic':
+            return {'name': self.title, 'link': self.url}
+        if self.layout == 'nav_secondary':
+            return {'nav_sencondary_href': self.url, 'nav_title': self.title}
+        return {'nav_href': self.url, 'nav_title': self.title}
+
+    @classmethod
+    def from_dict(cls, link, layout='nav'):
+        if layout == 'topic':
+            return cls(link['name'], link['link'], layout)
+        if layout == 'nav_secondary':
+            return cls(link['nav_title'], link['nav_sencondary_href'], layout)
+        return cls(link['nav_title'], link['nav_href'], layout)
+
+# Sidebar section -> prefix of its original dict keys
+SIDEBAR_KEY_PREFIXES = {'top_stories': 'top_story', 'features': 'feature', 'most_read': 'most_read'}
+
+@dataclass(frozen=True, slots=True)
+class SidebarEntry:
+    """An entry of a BBC article sidebar section: 'top_stories', 'features' or 'most_read'."""
+    section: str
+    title: str
+    url: str
+    date: Optional[str] = None
+    img_url: Optional[str] = None
+
+    def to_dict(self):
+        prefix = SIDEBAR_KEY_PREFIXES[self.section]
+        entry = {prefix + '_title': self.title, prefix + '_link': self.url}
+        if self.section == 'top_stories':
+            entry['top_story_date'] = self.date
+        elif self.section == 'features':
+            entry['feature_img_url'] = self.img_url
+        return entry
+
+    @classmethod
+    def from_dict(cls, entry, section):
+        prefix = SIDEBAR_KEY_PREFIXES[section]
+        return cls(section, entry[prefix + '_title'], entry[prefix + '_link'],
+                   entry.get('top_story_date'), entry.get('feature_img_url'))
+
+@dataclass(frozen=True, slots=True)
+class Article:
+    """A BBC or Sky News article, related_topics and more_on_this_story are None for Sky."""
+    news: str
+    title: str
+    content: str
+    img_urls: Any
+    url: str
+    timestamp: Any
+    author: Optional[str] = None
+    source: Optional[str] = None
+    date: Any = None
+    related_topics: Optional[tuple] = None
+    more_on_this_story: Optional[tuple] = None
+    # (field, source) pairs telling where each field came from, see news_fetcher.structured.field_sources.
+    # A tuple rather than a dict keeps the record hashable
+    field_sources: Optional[tuple] = None
+
+    def to_dict(self):
+        bbc_parts = {}
+        if self.related_topics is not None:
+            bbc_parts = {
+                'related_topics': [topic.to_dict() for topic in self.related_topics],
+                'more_on_this_story': [story.to_dict() for story in self.more_on_this_story],
+            }
+        article = {
+            'news': self.news,
+            'title': self.title,
+            'content': self.content,
+            # BBC articles without images have '' here
+            'img_urls': list(self.img_urls) if isinstance(self.img_urls, tuple) else self.img_urls,
+            'url': self.url,
+            'timestamp': self.timestamp,
+            'article_infos': {'author': self.author, 'source': self.source, 'date': self.date},
+            'bbc_parts': bbc_parts,
+            'sky_parts': {},
+        }
+        if self.field_sources is not None:
+            article['field_sources'] = dict(self.field_sources)
+        return article
+
+    @classmethod
+    def from_dict(cls, article):
+        infos = article['article_infos']
+        bbc_parts = article.get('bbc_parts') or {}
+        related_topics = more_on_this_story = None
+        if bbc_parts:
+            related_topics = tuple(NavLink.from_dict(topic, 'topic') for topic in bbc_parts['related_topics'])
+            more_on_this_story = tuple(StoryPromo.from_dict(story, 'more_on_this_story') for story in bbc_parts['more_on_this_story'])
+        img_urls = article['img_urls']
+        sources = article.get('field_sources')
+        return cls(
+            news=article['news'],
+            title=article['title'],
+            content=article['content'],
+            img_urls=tuple(img_urls) if isinstance(img_urls, list) else img_urls,
+            url=article['url'],
+            timestamp=article['timestamp'],
+            author=infos['author'],
+            source=infos['source'],
+            date=infos['date'],
+            related_topics=related_topics,
+            more_on_this_story=more_on_this_story,
+            field_sources=tuple(sources.items()) if sources is not None else None,
+        )
+
+@dataclass(frozen=True, slots=True)
+class Page:
+    """The result of a homepage, topic, header or sidebar extractor.
+
+    layout is the dict shape to_dict() rebuilds: 'homepage' (BBC homepage and topic pages),
+    'sky_homepage', 'header' (BBC), 'sky_header' or 'sidebar'.
+    """
+    news: str
+    layout: str
+    timestamp: Any
+    url: Optional[str] = None
+    top_stories: Optional[tuple] = ()
+    clusters: tuple = ()
+    nav: tuple = ()
+    nav_secondary: tuple = ()
+    features: Optional[tuple] = ()
+    most_read: tuple = ()
+
+    def to_dict(self):
+        if self.layout == 'sidebar':
+            return {
+                'news': self.news,
+                'top_stories': [entry.to_dict() for entry in self.top_stories],
+                'features': None if self.features is None else [entry.to_dict() for entry in self.features],
+                'most_read': [entry.to_dict() for entry in self.most_read],
+                'timestamp': self.timestamp,
+            }
+        if self.layout in ('header', 'sky_header'):
+            page = {'news': self.news, 'nav': [link.to_dict() for link in self.nav], 'timestamp': self.timestamp}
+            if self.layout == 'header':
+                page['nav_secondary'] = [link.to_dict() for link in self.nav_secondary]
+            return page
+
+        page = {'news': self.news}
+        if self.layout == 'homepage':
+            page['top_stories'] = {region.title: [story.to_dict() for story in region.stories] for region in self.top_stories}
+        page['clusters'] = [cluster.to_dict() for cluster in self.clusters]
+        page['timestamp'] = self.timestamp
+        page['url'] = self.url
+        return page
+
+def _cluster_from_dict(cluster):
+    return Cluster(cluster['title'], tuple(StoryPromo.from_dict(story) for story in cluster['content']))
+
+def page_from_dict(page, layout):
+    """Builds a Page record from the dict an extractor returned."""
+    if layout == 'sidebar':
+        return Page(
+            news=page['news'],
+            layout=layout,
+            timestamp=page['timestamp'],
+            top_stories=tuple(SidebarEntry.from_dict(entry, 'top_stories') for entry in page['top_stories']),
+            features=None if page['features'] is None else tuple(SidebarEntry.from_dict(entry, 'features') for entry in page['features']),
+            most_read=tuple(SidebarEntry.from_dict(entry, 'most_read') for entry in page['most_read']),
+        )
+    if layout in ('header', 'sky_header'):
+        return Page(
+            news=page['news'],
+            layout=layout,
+            timestamp=page['timestamp'],
+            nav=tuple(NavLink.from_dict(link) for link in page['nav']),
+            nav_secondary=tuple(NavLink.from_dict(link, 'nav_secondary') for link in page.get('nav_secondary', [])),
+        )
+
+    top_stories = ()
+    if layout == 'homepage':
+        top_stories = tuple(
+            Cluster(region, tuple(StoryPromo.from_dict(story, 'top_story') for story in stories))
+            for region, stories in page['top_stories'].items()
+        )
+    return Page(
+        news=page['news'],
+        layout=layout,
+        timestamp=page['timestamp'],
+        url=page['url'],
+        top_stories=top_stories,
+        clusters=tuple(_cluster_from_dict(cluster) for cluster in page['clusters']),
+    )
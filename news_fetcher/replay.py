@@ -0,0 +1,116 @@
+import argparse
+import collections
+import json
+import logging
+import os
+
+from news_fetcher.adapters import get_router
+from news_fetcher.archive import iter_archive
+from news_fetcher.output import NDJSONWriter
+from news_fetcher.parallel import parse_many
+from news_fetcher.sites import call_extractor, get_extractor
+
+logger = logging.getLogger('news_fetcher')
+
+def load_checkpoint(path):
+    """Reads a replay checkpoint, an empty one if the file does not exist yet."""
+    if path is None or not os.path.exists(path):
+        return {'archives': {}}
+    with open(path, 'r', encoding='utf-8') as checkpoint_file:
+        return json.load(checkpoint_file)
+
+def save_checkpoint(path, checkpoint):
+    """Writes a replay checkpoint atomically, so an interruption leaves either the old or the new one."""
+    temporary_path = '%s.tmp' % path
+    with open(temporary_path, 'w', encoding='utf-8') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, indent=2)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+def _parse_pages(pages, workers, chunksize):
+    if workers == 1:
+        for url, html_content, kind in pages:
+            try:
+                yield {'url': url, 'data': call_extractor(get_extractor(kind), html_content, url), 'error': None, 'kind': kind}
+            except Exception as error:
+                yield {'url': url, 'data': None, 'error': str(error), 'kind': kind}
+        return
+    yield from parse_many(pages, None, workers=workers, chunksize=chunksize)
+
+def _routed_pages(records, positions, stats, router, kinds):
+    """Yields (url, html, kind) for the records worth parsing, noting each one's position in the archive."""
+    for record in records:
+        kind = router.route(record['url']) if record['content'] is not None and record['status'] == 200 else None
+        if kind is None or (kinds is not None and kind not in kinds):
+            stats['skipped'] += 1
+            continue
+        positions.append(record)
+        yield record['url'], record['content'], kind
+
+def replay(paths, sink, workers=1, checkpoint=None, checkpoint_every=1000, flush=None, router=None, kinds=None,
+           chunksize=8):
+    """Re-runs the extractors over archived pages and hands every result to the sink.
+
+    paths are WARC, gzipped WARC or simple archive files, read through memory maps. Each page is
+    routed to its extractor by url, by the registered sites' Router unless another is given, and
+    parsed across workers processes. Results come out in archive order as dicts with the archive, offset, url, kind, WARC date, data and error. Progress is saved
+    to the checkpoint file every checkpoint_every pages and when the run stops, after calling flush
+    so the sink has written everything up to it, and a rerun with the same checkpoint starts after
+    the last page handed to the sink. What flush returns, such as the output size NDJSONWriter.flush
+    returns, is saved as the checkpoint's sink_position. Returns counts of parsed, failed and skipped records.
+    """
+    state = load_checkpoint(checkpoint)
+    router = router or get_router()
+    stats = {'parsed': 0, 'errors': 0, 'skipped': 0}
+
+    def save():
+        if flush is not None:
+            position = flush()
+            if position is not None:
+                state['sink_position'] = position
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, state)
+
+    try:
+        for path in paths:
+            progress = state['archives'].setdefault(os.path.abspath(path), {'offset': 0, 'done': False})
+            if progress['done']:
+                continue
+            positions = collections.deque()
+            pages = _routed_pages(iter_archive(path, progress['offset']), positions, stats, router, kinds)
+            for result in _parse_pages(pages, workers, chunksize):
+                record = positions.popleft()
+                sink({'archive': path, 'offset': record['offset'], 'url': result['url'], 'kind': result['kind'],
+                      'date': record['date'], 'data': result['data'], 'error': result['error']})
+                progress['offset'] = record['end']
+                stats['parsed' if result['error'] is None else 'errors'] += 1
+                if (stats['parsed'] + stats['errors']) % checkpoint_every == 0:
+                    save()
+            progress['done'] = True
+            save()
+    finally:
+        save()
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-runs the extractors over archived BBC News and Sky News pages.')
+    parser.add_argument('archives', nargs='+', help='WARC, .warc.gz or simple archive files')
+    parser.add_argument('--output', required=True, help='JSON Lines file, compressed by its .gz or .zst extension')
+    parser.add_argument('--checkpoint', help='progress file to resume from, OUTPUT.checkpoint by default')
+    parser.add_argument('--checkpoint-every', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--kind', action='append', choices=get_router().kinds, help='only replay these page kinds')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    checkpoint = args.checkpoint or '%s.checkpoint' % args.output
+    # Results written after the last checkpoint are parsed again, cut them off the output
+    resume_at = load_checkpoint(checkpoint).get('sink_position')
+    with NDJSONWriter(args.output, resume=True, resume_at=resume_at) as writer:
+        stats = replay(args.archives, writer.write, workers=args.workers, checkpoint=checkpoint,
+                       checkpoint_every=args.checkpoint_every, flush=writer.flush, kinds=args.kind)
+    logger.info('parsed: %(parsed)d, errors: %(errors)d, skipped: %(skipped)d', stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+from urllib.parse import urlsplit
+import functools
+import heapq
+import itertools
+import random
+import time
+
+from news_fetcher.cache import PageCache
+from news_fetcher.fetcher import Fetcher
+from news_fetcher.pipeline import EXTRACT_OPTIONS
+from news_fetcher.sites import get_extractor
+
+# Seconds between polls of each page kind
+POLL_INTERVALS = {
+    'bbc_homepage': 60,
+    'sky_homepage': 60,
+    'bbc_topic': 300,
+    'bbc_article_page': 1800,
+    'sky_article_page': 1800,
+    'bbc_content': 1800,
+    'sky_content': 1800,
+    'bbc_content_sidebar': 900,
+    'bbc_homepage_header': 3600,
+    'sky_homepage_header': 3600,
+}
+
+# When several pages are due, lower numbers are polled first: breaking news before the long tail
+POLL_PRIORITIES = {
+    'bbc_homepage': 0,
+    'sky_homepage': 0,
+    'bbc_topic': 1,
+    'bbc_content_sidebar': 2,
+    'bbc_article_page': 3,
+    'sky_article_page': 3,
+    'bbc_content': 3,
+    'sky_content': 3,
+    'bbc_homepage_header': 4,
+    'sky_homepage_header': 4,
+}
+
+# Responses telling a poller to slow down, they pause every poll of the host
+THROTTLE_STATUS_CODES = (429, 503)
+
+class TokenBucket:
+    """Allows rate requests per second on average and bursts of up to burst requests."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+    def delay(self):
+        """Returns how many seconds until a token is available, 0 if one is available now."""
+        now = self._refill()
+        if now < self.paused_until:
+            return self.paused_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Takes a token if one is available and returns whether it did."""
+        if self.delay() > 0:
+            return False
+        self.tokens -= 1
+        return True
+
+    def pause(self, seconds):
+        """Holds back every request for seconds, used when the host asks to slow down."""
+        self.paused_until = max(self.paused_until, self._refill() + seconds)
+
+class FakeClock:
+    """Manually advanced clock for testing, pass it as clock and its sleep as sleep."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+class PollScheduler:
+    """Polls pages forever at per-kind intervals within per-host rate limits.
+
+    Each host gets a token bucket of host_rate requests per second with bursts of host_burst, and
+    total_rate optionally caps all hosts together. Among the pages that are due, the highest priority
+    one whose host has a token is polled first, so homepages stay fresh when the budget is tight.
+    Intervals get up to jitter of random spread so polls do not line up. With adaptive, a page that did
+    not change has its interval doubled, up to max_backoff times its base interval, and a change
+    resets it. Pages go through a PageCache, so unchanged pages cost a conditional request and no parse.
+    A 429 or 503 pauses every poll of its host for its Retry-After, or else for throttle_pause seconds
+    doubled on every further one in a row, at most max_throttle_pause. A successful poll of the host
+    ends the backoff.
+    """
+
+    def __init__(self, fetcher=None, intervals=None, priorities=None, host_rate=0.5, host_burst=2,
+                 total_rate=None, jitter=0.1, adaptive=True, max_backoff=4, cache=None, throttle_pause=30,
+                 max_throttle_pause=900, clock=time.monotonic, sleep=time.sleep, random=random.random):
+        # Retries would bypass the rate limits, failed polls are retried at their next turn instead
+        self.fetcher = fetcher or Fetcher(retries=0)
+        self.intervals = dict(POLL_INTERVALS, **(intervals or {}))
+        self.priorities = dict(POLL_PRIORITIES, **(priorities or {}))
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.max_backoff = max_backoff
+        self.throttle_pause = throttle_pause
+        self.max_throttle_pause = max_throttle_pause
+        self.cache = cache if cache is not None else PageCache(clock=clock)
+        self.clock = clock
+        self.sleep = sleep
+        self.random = random
+        self.total_bucket = TokenBucket(total_rate, host_burst, clock) if total_rate else None
+        self.stats = {'polls': 0, 'changed': 0, 'unchanged': 0, 'failed': 0, 'throttled': 0, 'backed_off': 0}
+        # (kind, url) -> page, a url can be polled as several kinds, e.g. as a homepage and for its header
+        self.pages = {}
+        self._buckets = {}
+        # Host -> 429 and 503 responses in a row
+        self._throttled_in_row = {}
+        self._due = []
+        self._counter = itertools.count()
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.host_rate, self.host_burst, self.clock)
+        return self._buckets[host]
+
+    def _back_off(self, url, response):
+        """Pauses every poll of the url's host after it answered 429 or 503."""
+        host = urlsplit(url).netloc
+        in_row = self._throttled_in_row.get(host, 0) + 1
+        self._throttled_in_row[host] = in_row
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            pause = float(retry_after)
+        else:
+            pause = self.throttle_pause * 2 ** (in_row - 1)
+        self._bucket(url).pause(min(pause, self.max_throttle_pause))
+        self.stats['backed_off'] += 1
+
+    def add(self, url, kind, interval=None, priority=None, extract_function=None):
+        """Starts polling a url as the given page kind, first poll as soon as the budget allows.
+
+        Adding a url again as the same kind replaces its page, as another kind polls it separately.
+        """
+        if kind not in self.intervals and interval is None:
+            raise ValueError("No poll interval for page kind %r" % kind)
+        if extract_function is None:
+            extract_function = get_extractor(kind)
+            if kind in EXTRACT_OPTIONS:
+                extract_function = functools.partial(extract_function, **EXTRACT_OPTIONS[kind])
+        base_interval = interval if interval is not None else self.intervals[kind]
+        page = {
+            'url': url,
+            'kind': kind,
+            'priority': priority if priority is not None else self.priorities.get(kind, 5),
+            'base_interval': base_interval,
+            'interval': base_interval,
+            'extract_function': extract_function,
+            'data': None,
+            'next_poll': self.clock(),
+        }
+        self.pages[kind, url] = page
+        self._push(page)
+
+    def remove(self, url, kind=None):
+        """Stops polling a url as the given kind, or as every kind, its queued polls are dropped when they come up."""
+        for key in [key for key in self.pages if key[1] == url and kind in (None, key[0])]:
+            del self.pages[key]
+
+    def _push(self, page):
+        heapq.heappush(self._due, (page['next_poll'], page['priority'], next(self._counter), page))
+
+    def _reschedule(self, page, changed):
+        if self.adaptive:
+            if changed:
+                page['interval'] = page['base_interval']
+            else:
+                page['interval'] = min(page['interval'] * 2, page['base_interval'] * self.max_backoff)
+        spread = 1 + self.jitter * (2 * self.random() - 1)
+        page['next_poll'] = self.clock() + page['interval'] * spread
+        self._push(page)
+
+    def next_page(self):
+        """Returns (page, 0) for the page to poll now, or (None, seconds to wait) if none can be polled yet."""
+        now = self.clock()
+        ready = []
+        while self._due and self._due[0][0] <= now:
+            entry = heapq.heappop(self._due)
+            page = entry[3]
+            if self.pages.get((page['kind'], page['url'])) is page:
+                ready.append(entry)
+
+        chosen = None
+        wait = self._due[0][0] - now if self._due else None
+        for entry in sorted(ready, key=lambda entry: (entry[1], entry[0], entry[2])):
+            page = entry[3]
+            if chosen is None:
+                delay = self._bucket(page['url']).delay()
+                if self.total_bucket is not None:
+                    delay = max(delay, self.total_bucket.delay())
+                if delay == 0:
+                    chosen = page
+                    continue
+                wait = delay if wait is None else min(wait, delay)
+            heapq.heappush(self._due, entry)
+
+        if chosen is not None:
+            self._bucket(chosen['url']).acquire()
+            if self.total_bucket is not None:
+                self.total_bucket.acquire()
+            return chosen, 0.0
+        if ready:
+            self.stats['throttled'] += 1
+        return None, wait
+
+    def poll(self, page):
+        """Fetches and parses one page, reschedules it and returns the poll result."""
+        result = {'url': page['url'], 'kind': page['kind'], 'data': None, 'changed': False, 'error': None,
+                  'polled_at': self.clock()}
+        self.stats['polls'] += 1
+        try:
+            data, changed = self.cache.refresh(self.fetcher, page['url'], page['extract_function'])
+        except Exception as error:
+            response = getattr(error, 'response', None)
+            if response is not None and response.status_code in THROTTLE_STATUS_CODES:
+                # The host asked to slow down, hold every poll of it back
+                self._back_off(page['url'], response)
+            result['error'] = str(error)
+            self.stats['failed'] += 1
+            self._reschedule(page, changed=True)
+            return result
+
+        self._throttled_in_row.pop(urlsplit(page['url']).netloc, None)
+        result['changed'] = changed
+        result['data'] = page['data'] = data
+        self.stats['changed' if result['changed'] else 'unchanged'] += 1
+        self._reschedule(page, result['changed'])
+        return result
+
+    def run(self, sink, max_polls=None, until=None):
+        """Polls due pages and hands every result to the sink, until max_polls or the clock reaches until."""
+        polls = 0
+        while self.pages and (max_polls is None or polls < max_polls):
+            if until is not None and self.clock() >= until:
+                break
+            page, wait = self.next_page()
+            if page is None:
+                if wait is None:
+                    break
+                if until is not None:
+                    wait = min(wait, until - self.clock())
+                self.sleep(wait)
+                continue
+            sink(self.poll(page))
+            polls += 1
+        return self.stats
@@ -0,0 +1,61 @@
+import functools
+import importlib
+import sys
+import types
+
+# Sites register their directories, page kinds and url routes with news_fetcher.adapters
+from news_fetcher.adapters import PAGE_EXTRACTORS, REPO_ROOT, SITE_PACKAGES, STREAM_EXTRACTORS, route_url
+
+def register_site_packages():
+    """Registers the site directories as packages, their modules import news_fetcher from the repo root."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    for package_name, path in SITE_PACKAGES.items():
+        if package_name not in sys.modules:
+            package = types.ModuleType(package_name)
+            package.__path__ = [path]
+            sys.modules[package_name] = package
+
+def load_site_module(package_name, module_name):
+    """Imports a parser module from one of the site directories."""
+    register_site_packages()
+    return importlib.import_module('%s.%s' % (package_name, module_name))
+
+def get_extractor(kind):
+    """Returns the extract function for a page kind, importing its module on first use."""
+    if kind not in PAGE_EXTRACTORS:
+        raise ValueError("Unknown page kind %r, expected one of: %s" % (kind, ', '.join(PAGE_EXTRACTORS)))
+    package_name, module_name, function_name = PAGE_EXTRACTORS[kind]
+    return getattr(load_site_module(package_name, module_name), function_name)
+
+def get_stream_extractor(kind):
+    """Returns the stream function for a page kind, importing its module on first use."""
+    if kind not in STREAM_EXTRACTORS:
+        raise ValueError("No streaming extractor for page kind %r, expected one of: %s" % (kind, ', '.join(STREAM_EXTRACTORS)))
+    package_name, module_name, function_name = STREAM_EXTRACTORS[kind]
+    return getattr(load_site_module(package_name, module_name), function_name)
+
+def extractor_for_url(url):
+    """Returns (page kind, extract function) of a url routed by a registered site, or (None, None)."""
+    kind = route_url(url)
+    if kind is None:
+        return None, None
+    return kind, get_extractor(kind)
+
+def call_extractor(extract_function, html_content, url):
+    """Calls an extract_data_* function, passing the url only to the ones that take it."""
+    # inspect takes longer to import than the extractors, workers only need it once they parse
+    import inspect
+    if 'url' in inspect.signature(extract_function).parameters:
+        return extract_function(html_content, url)
+    return extract_function(html_content)
+
+def extract(html_content, url, kind=None, **options):
+    """Parses a page with the extractor for kind, or for the kind its url routes to, importing only that extractor."""
+    kind = kind or route_url(url)
+    if kind is None:
+        raise ValueError("No site routes %r, pass its page kind" % url)
+    extract_function = get_extractor(kind)
+    if options:
+        extract_function = functools.partial(extract_function, **options)
+    return call_extractor(extract_function, html_content, url)
@@ -0,0 +1,194 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from news_fetcher.cache import hash_content
+from news_fetcher.output import serialise_timestamp, to_json_ready
+from news_fetcher.urls import url_key
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    site TEXT NOT NULL,
+    title TEXT,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS articles_site_first_seen ON articles (site, first_seen);
+CREATE INDEX IF NOT EXISTS articles_first_seen ON articles (first_seen);
+CREATE INDEX IF NOT EXISTS articles_content_hash ON articles (content_hash);
+CREATE TABLE IF NOT EXISTS article_topics (
+    topic TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (topic, url)
+) WITHOUT ROWID;
+'''
+
+# A changed article replaces the stored one, an unchanged one only moves last_seen forward
+UPSERT_ARTICLE = '''
+INSERT INTO articles (url, site, title, content_hash, first_seen, last_seen, data)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    last_seen = max(last_seen, excluded.last_seen),
+    title = excluded.title,
+    data = CASE WHEN content_hash = excluded.content_hash THEN data ELSE excluded.data END,
+    content_hash = excluded.content_hash
+'''
+
+def article_content_hash(article_data):
+    """Hashes the parts of an article that change when it is edited, not the time it was parsed."""
+    return hash_content(json.dumps([article_data.get('title'), article_data.get('content'),
+                                    article_data.get('img_urls')], ensure_ascii=False))
+
+def _article(data):
+    if hasattr(data, 'to_dict'):
+        data = data.to_dict()
+    # *_article_page results keep the article under 'content'
+    if 'content' in data and isinstance(data['content'], dict):
+        data = data['content']
+    return data
+
+class ArticleStore:
+    """Keeps parsed articles in a SQLite file, keyed by normalised url.
+
+    Crawlers call contains() before fetching an article, a single primary key lookup. Articles are
+    written batch_size at a time in one transaction. Each row keeps a hash of the article content and
+    the first and last time it was seen, and can be queried by site, related topic and time range.
+    """
+
+    def __init__(self, path, batch_size=200):
+        self.path = path
+        self.batch_size = batch_size
+        self.stats = {'written': 0, 'unchanged': 0, 'changed': 0}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def contains(self, url):
+        """Returns whether an article with this url is stored or waiting to be written."""
+        key = url_key(url)
+        with self._lock:
+            if key in self._pending:
+                return True
+            return self._connection.execute('SELECT 1 FROM articles WHERE url = ?', (key,)).fetchone() is not None
+
+    def get(self, url):
+        """Returns the stored article dict for a url, or None."""
+        key = url_key(url)
+        with self._lock:
+            if key in self._pending:
+                return json.loads(self._pending[key][6])
+            row = self._connection.execute('SELECT data FROM articles WHERE url = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, article_data):
+        """Queues a bbc/sky content or article page result, written with the next batch.
+
+        Results without an article, {'news': 'None'}, are ignored.
+        """
+        article_data = _article(article_data)
+        if not article_data.get('url') or article_data.get('news') == 'None':
+            return
+        key = url_key(article_data['url'])
+        seen = serialise_timestamp(article_data.get('timestamp') or datetime.utcnow())
+        topics = [topic['name'] for topic in (article_data.get('bbc_parts') or {}).get('related_topics', [])]
+        row = (key, article_data['news'], article_data.get('title'), article_content_hash(article_data),
+               seen, seen, json.dumps(to_json_ready(article_data), ensure_ascii=False))
+        with self._lock:
+            self._pending[key] = row + (topics,)
+            if len(self._pending) < self.batch_size:
+                return
+        self.flush()
+
+    def put_many(self, articles):
+        for article_data in articles:
+            self.put(article_data)
+
+    def mark_seen(self, urls, timestamp=None):
+        """Moves last_seen forward for stored articles met again without being fetched."""
+        seen = serialise_timestamp(timestamp or datetime.utcnow())
+        keys = [(seen, url_key(url)) for url in urls]
+        self.flush()
+        with self._lock, self._connection:
+            self._connection.execute('BEGIN')
+            self._connection.executemany('UPDATE articles SET last_seen = max(last_seen, ?) WHERE url = ?', keys)
+
+    def flush(self):
+        """Writes every queued article in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            rows = list(self._pending.values())
+            self._pending = {}
+            with self._connection:
+                self._connection.execute('BEGIN')
+                hashes = {}
+                for row in rows:
+                    stored = self._connection.execute('SELECT content_hash FROM articles WHERE url = ?', (row[0],)).fetchone()
+                    if stored:
+                        hashes[row[0]] = stored[0]
+                self._connection.executemany(UPSERT_ARTICLE, [row[:7] for row in rows])
+                self._connection.executemany('INSERT OR IGNORE INTO article_topics (topic, url) VALUES (?, ?)',
+                                             [(topic, row[0]) for row in rows for topic in row[7]])
+            for row in rows:
+                if row[0] not in hashes:
+                    self.stats['written'] += 1
+                elif hashes[row[0]] == row[3]:
+                    self.stats['unchanged'] += 1
+                else:
+                    self.stats['changed'] += 1
+
+    def query(self, site=None, topic=None, since=None, until=None, limit=None):
+        """Yields stored article dicts, newest first by when they were first seen.
+
+        since and until bound first_seen and take datetimes or ISO 8601 strings, site is 'BBC' or 'Sky'
+        and topic is the name of a related topic.
+        """
+        self.flush()
+        query = 'SELECT articles.data FROM articles'
+        conditions = []
+        parameters = []
+        if topic is not None:
+            query += ' JOIN article_topics ON article_topics.url = articles.url'
+            conditions.append('article_topics.topic = ?')
+            parameters.append(topic)
+        if site is not None:
+            conditions.append('articles.site = ?')
+            parameters.append(site)
+        if since is not None:
+            conditions.append('articles.first_seen >= ?')
+            parameters.append(serialise_timestamp(since))
+        if until is not None:
+            conditions.append('articles.first_seen < ?')
+            parameters.append(serialise_timestamp(until))
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY articles.first_seen DESC'
+        if limit is not None:
+            query += ' LIMIT %d' % limit
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._connection.execute('SELECT count(*) FROM articles').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
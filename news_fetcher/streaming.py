@@ -0,0 +1,200 @@
+from html.parser import HTMLParser
+import codecs
+
+from news_fetcher.walker import Walker
+
+# Bytes read from the body at a time
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+# Elements that never have an end tag
+VOID_ELEMENTS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'meta',
+                           'param', 'source', 'track', 'wbr'))
+
+class StreamElement:
+    """An open element of a streamed page.
+
+    Attributes read like a bs4 Tag's, with class split into a list. tag is the element's bs4 subtree
+    while it is being kept, info holds whatever the handler notes about the element.
+    """
+
+    __slots__ = ('name', 'attrs', 'parent', 'tag', 'keep', 'info')
+
+    def __init__(self, name, attrs, parent):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.tag = None
+        self.keep = False
+        self.info = None
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def has_attr(self, name):
+        return name in self.attrs
+
+    def __getitem__(self, name):
+        return self.attrs[name]
+
+    def ancestors(self):
+        element = self.parent
+        while element is not None:
+            yield element
+            element = element.parent
+
+class StreamHandler:
+    """Base class of the handlers turning a StreamTokenizer's elements into events."""
+
+    def __init__(self):
+        self.events = []
+
+    def start(self, element):
+        """Called for every start tag, sets element.keep to have its subtree built."""
+
+    def kept(self, element):
+        """Called with every kept element once its subtree is complete, in document order."""
+
+    def end(self, element):
+        """Called for every element as it closes."""
+
+    def emit(self, event):
+        self.events.append(event)
+
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+class StreamTokenizer(HTMLParser):
+    """Tokenises a page fed in chunks and only builds the subtrees a handler keeps.
+
+    Elements open and close like they do in a BeautifulSoup html.parser tree: void elements close at
+    once and an end tag closes the latest open element of its name. Once the outermost kept element
+    closes, its subtree is handed over through handler.kept and dropped, so memory is bounded by the
+    open elements and the largest kept subtree instead of the page size.
+    """
+
+    def __init__(self, handler):
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+        self._open = []
+        self._kept = []
+        self._data = []
+        from bs4 import BeautifulSoup
+        # Only used to create tags, the kept subtrees are never attached to it
+        self._soup = BeautifulSoup('', 'html.parser')
+
+    def handle_starttag(self, name, attrs):
+        self._flush_data()
+        attributes = {}
+        for attribute, value in attrs:
+            attributes[attribute] = value or ''
+        if 'class' in attributes:
+            attributes['class'] = attributes['class'].split()
+
+        parent = self._open[-1] if self._open else None
+        element = StreamElement(name, attributes, parent)
+        self.handler.start(element)
+        building = parent is not None and parent.tag is not None
+        if element.keep or building:
+            element.tag = self._soup.new_tag(name, attrs=attributes)
+            if building:
+                parent.tag.append(element.tag)
+            if element.keep:
+                self._kept.append(element)
+
+        self._open.append(element)
+        if name in VOID_ELEMENTS:
+            self._close(element)
+
+    def handle_startendtag(self, name, attrs):
+        self.handle_starttag(name, attrs)
+        if name not in VOID_ELEMENTS and self._open and self._open[-1].name == name:
+            self._close(self._open[-1])
+
+    def handle_endtag(self, name):
+        self._flush_data()
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index].name == name:
+                while len(self._open) > index:
+                    self._close(self._open[-1])
+                return
+
+    def handle_data(self, data):
+        if self._open and self._open[-1].tag is not None:
+            self._data.append(data)
+
+    def _flush_data(self):
+        # Text split across chunks arrives in pieces, it becomes one string like in a parsed tree
+        if self._data:
+            self._open[-1].tag.append(self._soup.new_string(''.join(self._data)))
+            self._data = []
+
+    def _close(self, element):
+        self._open.pop()
+        if element.tag is not None and (element.parent is None or element.parent.tag is None):
+            root = element.tag
+            kept, self._kept = self._kept, []
+            for kept_element in kept:
+                self.handler.kept(kept_element)
+            for kept_element in kept:
+                kept_element.tag = None
+            # Tags link to each other both ways, breaking the links frees the subtree without waiting for gc
+            element.tag = None
+            root.decompose()
+        self.handler.end(element)
+
+    def finish(self):
+        """Flushes the tokenizer and closes the elements still open at the end of the page."""
+        self.close()
+        self._flush_data()
+        while self._open:
+            self._close(self._open[-1])
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields a page in chunks from bytes or str, a binary file object or an iterable of chunks."""
+    if isinstance(source, (bytes, str)):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            yield chunk
+    else:
+        yield from source
+
+def stream_events(source, handler, encoding='utf-8', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Feeds a page to a StreamTokenizer chunk by chunk and yields the handler's events as they come."""
+    tokenizer = StreamTokenizer(handler)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    for chunk in iter_chunks(source, chunk_size):
+        tokenizer.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        yield from handler.drain()
+    tokenizer.feed(decoder.decode(b'', final=True))
+    tokenizer.finish()
+    yield from handler.drain()
+
+def walk_frame(tag, rules):
+    """Returns the Frame of a kept subtree, holding the first match of each rule like the Walker's frames."""
+    walker = Walker(lambda walker, tag, depth: None)
+    frame = walker.open(tag, 'kept', rules)
+    walker.walk(tag)
+    return frame
+
+def collect_stories(events, regions=None):
+    """Assembles the events of a homepage stream into the top_stories and clusters of its extract_data_* result.
+
+    top_stories is only included when regions names them.
+    """
+    top_stories = {region: [] for region in regions or ()}
+    clusters = {}
+    for event in events:
+        if event['type'] == 'top_story':
+            top_stories[event['region']].append(event['story'])
+        elif event['type'] == 'cluster':
+            clusters[event['index']] = {'title': event['title'], 'content': []}
+        elif event['type'] == 'cluster_story':
+            clusters[event['index']]['content'].append(event['story'])
+
+    page_data = {'clusters': [clusters[index] for index in sorted(clusters)]}
+    if regions is not None:
+        page_data['top_stories'] = top_stories
+    return page_data
@@ -0,0 +1,211 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import json
+import re
+
+# schema.org types describing a news article
+NEWS_ARTICLE_TYPES = frozenset(('NewsArticle', 'ReportageNewsArticle', 'AnalysisNewsArticle', 'Article',
+                                'LiveBlogPosting', 'BlogPosting'))
+
+JSON_LD_RE = re.compile(r"""<script[^>]+type\s*=\s*["']application/ld\+json["'][^>]*>(.*?)</script>""", re.IGNORECASE | re.DOTALL)
+NEXT_DATA_RE = re.compile(r"""<script[^>]+id\s*=\s*["']__NEXT_DATA__["'][^>]*>(.*?)</script>""", re.IGNORECASE | re.DOTALL)
+INITIAL_DATA_RE = re.compile(r"""window\.__(?:INITIAL_DATA|PRELOADED_STATE)__\s*=\s*""")
+
+# Page state blobs can be large, the article object is never nested deeper than this
+MAX_STATE_DEPTH = 12
+
+SKY_DATE_FORMAT = '%A %d %B %Y %H:%M'
+
+def _text(html_content):
+    if isinstance(html_content, bytes):
+        return html_content.decode('utf-8', errors='replace')
+    return html_content
+
+def _decode(blob):
+    try:
+        value = json.loads(blob)
+    except ValueError:
+        return None
+    # Some pages ship their state as a JSON encoded string
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+def _script_blobs(html_content):
+    """Returns the (kind, raw JSON) blobs of a page, read from a soup's scripts or scanned from markup."""
+    blobs = []
+    if hasattr(html_content, 'find_all'):
+        for script in html_content.find_all('script'):
+            text = script.string or ''
+            if script.get('type') == 'application/ld+json':
+                blobs.append(('json_ld', text))
+            elif script.get('id') == '__NEXT_DATA__':
+                blobs.append(('page_state', text))
+            elif INITIAL_DATA_RE.search(text):
+                blobs.append(('page_state', text))
+        return blobs
+
+    text = _text(html_content)
+    blobs += [('json_ld', match.group(1)) for match in JSON_LD_RE.finditer(text)]
+    blobs += [('page_state', match.group(1)) for match in NEXT_DATA_RE.finditer(text)]
+    for match in INITIAL_DATA_RE.finditer(text):
+        blobs.append(('page_state', text[match.start():text.find('</script>', match.end())]))
+    return blobs
+
+def _decode_state(blob):
+    match = INITIAL_DATA_RE.search(blob)
+    if not match:
+        return _decode(blob)
+    try:
+        value, _ = json.JSONDecoder().raw_decode(blob, match.end())
+    except ValueError:
+        return None
+    return _decode(value) if isinstance(value, str) else value
+
+def _is_news_article(value):
+    types = value.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(article_type in NEWS_ARTICLE_TYPES for article_type in types)
+
+def _find_article(value, depth=0):
+    """Depth-first search for the first schema.org article object."""
+    if depth > MAX_STATE_DEPTH:
+        return None
+    if isinstance(value, dict):
+        if _is_news_article(value):
+            return value
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_article(child, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+def find_news_article(html_content):
+    """Returns (article object, 'json_ld' or 'page_state') from a page's embedded data, or (None, None).
+
+    html_content is raw markup, scanned without building a tree, or an already built soup. JSON-LD is
+    preferred over the page state.
+    """
+    blobs = _script_blobs(html_content)
+    for kind in ('json_ld', 'page_state'):
+        for blob_kind, blob in blobs:
+            if blob_kind != kind:
+                continue
+            value = _decode(blob) if kind == 'json_ld' else _decode_state(blob)
+            article = _find_article(value) if value is not None else None
+            if article is not None:
+                return article, kind
+    return None, None
+
+def json_ld_article_fields(blob):
+    """Returns the article fields of one JSON-LD script's text, {} if it holds no article."""
+    value = _decode(blob)
+    article = _find_article(value) if value is not None else None
+    return read_article_fields(article) if article is not None else {}
+
+def parse_iso_datetime(value):
+    """Parses an ISO 8601 date into a naive UTC datetime like the extractor timestamps, or None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def parse_sky_date(text):
+    """Parses a Sky article date such as 'Tuesday 1 October 2024 10:00, UK' into a naive UTC datetime, or None."""
+    if not text:
+        return None
+    try:
+        local = datetime.strptime(text.split(',')[0].strip(), SKY_DATE_FORMAT)
+        # Raises a KeyError subclass when no time zone database is installed
+        london = ZoneInfo('Europe/London')
+    except (ValueError, KeyError):
+        return None
+    return local.replace(tzinfo=london).astimezone(timezone.utc).replace(tzinfo=None)
+
+def _names(value, schema_type):
+    values = value if isinstance(value, list) else [value]
+    names = []
+    for item in values:
+        if isinstance(item, dict) and item.get('@type', schema_type) == schema_type and item.get('name'):
+            names.append(item['name'].strip())
+        elif isinstance(item, str) and schema_type == 'Person':
+            names.append(item.strip())
+    return names
+
+def _image_urls(value):
+    values = value if isinstance(value, list) else [value]
+    urls = []
+    for item in values:
+        url = item.get('url') if isinstance(item, dict) else item
+        if isinstance(url, str) and url and url not in urls:
+            urls.append(url)
+    return urls
+
+def read_article_fields(article):
+    """Maps a schema.org article object to extractor fields, leaving out the ones it does not hold.
+
+    Only people count as authors, an organisation byline such as 'BBC News' is left to the page.
+    """
+    fields = {}
+    if isinstance(article.get('headline'), str) and article['headline'].strip():
+        fields['title'] = article['headline'].strip()
+    authors = _names(article.get('author'), 'Person')
+    if authors:
+        fields['author'] = ', '.join(authors)
+    published = parse_iso_datetime(article.get('datePublished'))
+    if published is not None:
+        fields['date'] = published
+    images = _image_urls(article.get('image'))
+    if images:
+        fields['img_urls'] = images
+    if isinstance(article.get('articleBody'), str) and article['articleBody'].strip():
+        fields['content'] = article['articleBody'].strip()
+    return fields
+
+def structured_article_fields(html_content):
+    """Returns (fields, source) read from a page's embedded article data, ({}, None) without any."""
+    article, source = find_news_article(html_content)
+    if article is None:
+        return {}, None
+    return read_article_fields(article), source
+
+# Article fields the structured data can provide
+ARTICLE_FIELDS = ('title', 'author', 'date', 'content', 'img_urls')
+
+# Fields the extractors take from the structured data over the page, images come from the page so
+# they honour the configured rendition width
+PREFERRED_FIELDS = ('title', 'author', 'date', 'content')
+
+def covers_preferred_fields(structured_fields):
+    """Tells whether the structured data holds every field the extractors prefer from it.
+
+    The tag walk then only reads the article's images and links, so the extractors parse only the
+    article subtree instead of the whole page.
+    """
+    return all(name in structured_fields for name in PREFERRED_FIELDS)
+
+def field_sources(structured_fields, structured_source, used=ARTICLE_FIELDS, fallbacks=None):
+    """Reports where each article field came from: 'json_ld', 'page_state', 'dom' or None if nowhere.
+
+    used names the structured fields the extractor takes, fallbacks the source of the others when it is
+    not the page.
+    """
+    fallbacks = fallbacks or {}
+    return {
+        name: structured_source if name in used and name in structured_fields else fallbacks.get(name, 'dom')
+        for name in ARTICLE_FIELDS
+    }
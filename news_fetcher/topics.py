@@ -0,0 +1,130 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from news_fetcher.fetcher import Fetcher
+from news_fetcher.parallel import make_executor, parse_many
+from news_fetcher.sites import call_extractor, get_extractor
+from news_fetcher.urls import BloomFilter, SeenSet
+
+def topic_page_url(topic_url, page):
+    """Returns the url of a page of a BBC topic, page 1 is the topic url itself."""
+    parts = urlsplit(topic_url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name != 'page']
+    if page > 1:
+        query.append(('page', str(page)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+def iter_topic_promos(topic_data):
+    """Yields the stories of a topic page in page order, the top stories first."""
+    for stories in (topic_data.get('top_stories') or {}).values():
+        yield from stories
+    for cluster in topic_data.get('clusters', []):
+        yield from cluster['content']
+
+def _parse_pages(pages, workers, executor):
+    if workers == 1:
+        extract_function = get_extractor('bbc_topic_page')
+        for url, html_content in pages:
+            try:
+                yield {'url': url, 'data': call_extractor(extract_function, html_content, url), 'error': None}
+            except Exception as error:
+                yield {'url': url, 'data': None, 'error': str(error)}
+        return
+    yield from parse_many(pages, 'bbc_topic_page', workers=workers, executor=executor)
+
+class _TopicState:
+    def __init__(self, topic_url, max_pages):
+        self.result = {'topic': topic_url, 'title': None, 'promos': [], 'pages': 0,
+                       'reached_watermark': False, 'errors': []}
+        self.url = topic_url
+        self.max_pages = max_pages
+        self.next_page = 1
+        self.last_page = 1
+        self.seen = SeenSet()
+        self.done = False
+
+    def page_numbers(self, window):
+        # The first page tells how many there are
+        count = 1 if self.next_page == 1 else window
+        last = self.last_page if self.max_pages is None else min(self.last_page, self.max_pages)
+        return list(range(self.next_page, min(last, self.next_page + count - 1) + 1))
+
+    def add_page(self, page_data, watermark):
+        """Adds a parsed page's new promos, returns False once the watermark is reached."""
+        topic_data = page_data['topic']
+        self.result['pages'] += 1
+        if self.result['title'] is None:
+            self.result['title'] = next(iter(topic_data.get('top_stories') or {}), None)
+        self.last_page = max(self.last_page, page_data['pagination']['last_page'])
+
+        for story in iter_topic_promos(topic_data):
+            url = story.get('url')
+            if not url:
+                continue
+            if url in watermark:
+                self.result['reached_watermark'] = True
+                return False
+            if self.seen.add(url):
+                self.result['promos'].append(dict(story, page=page_data['pagination']['page']))
+        return True
+
+def crawl_topics(topic_urls, watermark=None, max_pages=None, window=4, fetcher=None, workers=None):
+    """Backfills BBC topics through their pagination and yields one result per topic as it finishes.
+
+    Every round fetches the next window pages of all unfinished topics at once and parses them across
+    workers processes (in this process with workers=1). Each result has the topic's deduplicated
+    promos in page order. A topic stops at its last page, after max_pages, or at the first story whose
+    url is in watermark, e.g. the urls of the previous backfill. Pages of the same window after that
+    story were fetched but are not used. One pool of worker processes serves every round.
+    """
+    if watermark is None:
+        watermark = SeenSet()
+    elif not isinstance(watermark, (SeenSet, BloomFilter)):
+        watermark = SeenSet(watermark)
+
+    own_fetcher = fetcher is None
+    fetcher = fetcher or Fetcher()
+    topics = [_TopicState(topic_url, max_pages) for topic_url in dict.fromkeys(topic_urls)]
+    # Started with the first round and kept for the others, spawning workers costs more than a small round
+    executor = None
+    try:
+        while topics:
+            batch = [(topic_page_url(topic.url, page), topic, page) for topic in topics for page in topic.page_numbers(window)]
+            responses = {result['url']: result for result in fetcher.fetch_many([url for url, _, _ in batch])}
+
+            pages = []
+            for url, topic, page in batch:
+                response = responses[url]
+                if response['error'] is None and response['status'] == 200:
+                    pages.append((url, response['content']))
+                else:
+                    topic.result['errors'].append({'url': url, 'error': response['error'] or 'HTTP %s' % response['status']})
+            if executor is None and workers != 1 and pages:
+                executor = make_executor(workers)
+            parsed = {result['url']: result for result in _parse_pages(pages, workers, executor)}
+
+            for url, topic, page in batch:
+                if topic.done:
+                    continue
+                result = parsed.get(url)
+                if result is None:
+                    # A page that could not be fetched ends the topic, later pages would leave a gap
+                    topic.done = True
+                elif result['error'] is not None:
+                    topic.result['errors'].append({'url': url, 'error': result['error']})
+                    topic.done = True
+                elif not topic.add_page(result['data'], watermark):
+                    topic.done = True
+                topic.next_page = page + 1
+
+            unfinished = []
+            for topic in topics:
+                if topic.done or not topic.page_numbers(window):
+                    yield topic.result
+                else:
+                    unfinished.append(topic)
+            topics = unfinished
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if own_fetcher:
+            fetcher.close()
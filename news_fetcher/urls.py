@@ -0,0 +1,185 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import functools
+import hashlib
+import math
+
+# The extractors emit site-relative links under these prefixes
+LINK_PREFIXES = {
+    '/bbc': 'https://www.bbc.co.uk',
+    '/sky': 'https://news.sky.com',
+}
+
+# Where each site's relative links are rooted in extractor output: a prefix such as '/bbc' or a base
+# url such as 'https://www.bbc.co.uk', and whether their query strings are dropped
+LINK_CONFIG = {
+    'bbc': {'base': '/bbc', 'strip_query': False},
+    'sky': {'base': '/sky', 'strip_query': False},
+}
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMETERS = frozenset((
+    'at_medium', 'at_campaign', 'at_custom1', 'at_custom2', 'at_custom3', 'at_custom4', 'at_format',
+    'at_link_id', 'at_link_origin', 'at_link_type', 'at_ptr_name', 'at_bbc_team', 'at_objective',
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'ocid', 'xtor', 'dcmp', 'mc_cid', 'mc_eid', 'ns_mchannel',
+    'ns_source', 'ns_campaign', 'ns_linkname', 'ns_fee', 'igshid', 'cmp', 'cmpid',
+))
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+def configure_links(site, base=None, strip_query=None):
+    """Changes how a site's relative links are written, e.g. configure_links('bbc', 'https://www.bbc.co.uk')."""
+    if site not in LINK_CONFIG:
+        raise ValueError("Unknown site %r, expected one of %s" % (site, ', '.join(LINK_CONFIG)))
+    if base is not None:
+        LINK_CONFIG[site]['base'] = base.rstrip('/')
+    if strip_query is not None:
+        LINK_CONFIG[site]['strip_query'] = strip_query
+
+def is_tracking_parameter(name):
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMETERS
+
+def canonicalise_url(url, strip_query=False):
+    """Cleans a url without changing what it points to.
+
+    The scheme and host are lowercased, default ports, the fragment and tracking parameters removed,
+    and with strip_query the whole query string. Relative urls keep their path and query only. A url
+    with a bad port or IPv6 host, which urlsplit rejects, is returned as it is.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        # One malformed href on a scraped page must not fail the whole extraction
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc and port is not None and DEFAULT_PORTS.get(scheme) == str(port):
+        netloc = netloc.rsplit(':', 1)[0]
+
+    query = ''
+    if parts.query and not strip_query:
+        parameters = parse_qsl(parts.query, keep_blank_values=True)
+        kept = [(name, value) for name, value in parameters if not is_tracking_parameter(name)]
+        query = parts.query if len(kept) == len(parameters) else urlencode(kept)
+
+    path = parts.path
+    if netloc and not path:
+        path = '/'
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+def site_link(site, href):
+    """Turns an href found on a site's page into the link an extractor returns.
+
+    Absolute and protocol-relative hrefs stay absolute, root-relative ones are put under the site's
+    configured prefix or base url. Both are canonicalised, unless the href is malformed.
+    """
+    config = LINK_CONFIG[site]
+    href = href.strip()
+    if href.startswith('//'):
+        href = 'https:' + href
+    elif not href.lower().startswith(('http:', 'https:')):
+        href = config['base'] + href
+    return canonicalise_url(href, config['strip_query'])
+
+def absolute_url(link, link_prefixes=LINK_PREFIXES):
+    """Turns an extractor link into an absolute url, or returns it unchanged if it has no known prefix."""
+    for prefix, base_url in link_prefixes.items():
+        if link.startswith(prefix + '/'):
+            return base_url + link[len(prefix):]
+    return link
+
+def url_key(url, link_prefixes=LINK_PREFIXES, strip_query=True):
+    """Keys a story by its canonical absolute url without trailing slash, and by default without query.
+
+    '/bbc/news/x' and 'https://www.bbc.co.uk/news/x/?at_medium=rss' get the same key.
+    """
+    url = canonicalise_url(absolute_url(url, link_prefixes), strip_query)
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip('/') or '/', parts.query, ''))
+
+# url_key keeping query strings, so the pages of a listing such as ?page=2 stay apart, the key crawls
+# remember visited pages by
+page_key = functools.partial(url_key, strip_query=False)
+
+def _digest(key, size=8):
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=size).digest()
+
+class SeenSet:
+    """Exact set of url keys, storing an 8 byte hash per url instead of the url string.
+
+    Urls are compared by key(url), url_key by default. Two different keys share a hash with a
+    probability of about n^2 / 2^65, negligible at crawl scale.
+    """
+
+    def __init__(self, urls=(), key=url_key):
+        self.key = key
+        self._hashes = set()
+        for url in urls:
+            self.add(url)
+
+    def _hash(self, url):
+        return int.from_bytes(_digest(self.key(url)), 'little')
+
+    def add(self, url):
+        """Adds a url, returns False if it was already seen."""
+        digest = self._hash(url)
+        if digest in self._hashes:
+            return False
+        self._hashes.add(digest)
+        return True
+
+    def __contains__(self, url):
+        return self._hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+class BloomFilter:
+    """Fixed-size probabilistic set of url keys for crawls too large to hold every hash.
+
+    Sized for capacity urls at the given false positive rate, about 1.2 bytes per url at 1%. A url
+    never added can be reported as seen, an added one is never missed. Urls are compared by key(url),
+    page_key by default like the crawl's SeenSet, so a BloomFilter passed as seen keeps ?page=N apart.
+    """
+
+    def __init__(self, capacity, error_rate=0.01, key=page_key):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.key = key
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url):
+        digest = _digest(self.key(url), 16)
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing, k positions from two hashes
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, url):
+        """Adds a url, returns False if it was (probably) already seen."""
+        new = False
+        for position in self._positions(url):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, url):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(url))
+
+    def __len__(self):
+        """Number of urls added that were not already reported as seen."""
+        return self._count
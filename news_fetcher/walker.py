@@ -0,0 +1,115 @@
+from news_fetcher.instrumentation import count_nodes
+
+def class_matches(tag, matcher):
+    """Matches a tag's classes like find(class_=matcher): any single class value, then the whole attribute."""
+    classes = tag.get('class')
+    if classes is None:
+        return False
+    if isinstance(classes, str):
+        classes = [classes]
+    if isinstance(matcher, str):
+        return matcher in classes or (len(classes) != 1 and matcher == ' '.join(classes))
+    if any(matcher.search(value) for value in classes):
+        return True
+    return len(classes) != 1 and matcher.search(' '.join(classes)) is not None
+
+def tag_matches(tag, name=None, matcher=None):
+    """Matches a tag like find(name, class_=matcher), None matching any name or classes."""
+    return (name is None or tag.name == name) and (matcher is None or class_matches(tag, matcher))
+
+class Frame:
+    """An element being walked and the first descendants it holds for each of its rules.
+
+    Rules are (name, tag name or None, class matcher or None, parent rule name or None). found[name]
+    is the first descendant matching the rule, inside the one found for its parent rule if it has one,
+    the same element element.find(tag name, class_=matcher) would return. items holds the frames
+    opened inside this one, by kind.
+    """
+
+    __slots__ = ('element', 'kind', 'rules', 'found', 'items', '_inside')
+
+    def __init__(self, element, kind, rules=()):
+        self.element = element
+        self.kind = kind
+        self.rules = rules
+        self.found = {}
+        self.items = {}
+        self._inside = {}
+
+    def offer(self, tag):
+        for name, tag_name, matcher, parent in self.rules:
+            if name in self.found:
+                continue
+            if parent is not None and (parent not in self._inside or self._inside[parent] is tag):
+                continue
+            if tag_matches(tag, tag_name, matcher):
+                self.found[name] = self._inside[name] = tag
+
+    def leave(self, tag):
+        if self._inside:
+            for name in [name for name, element in self._inside.items() if element is tag]:
+                del self._inside[name]
+
+    def add(self, kind, frame):
+        self.items.setdefault(kind, []).append(frame)
+
+    def get(self, name):
+        return self.found.get(name)
+
+class Walker:
+    """Extracts several regions of a page in a single pass over its tree.
+
+    Instead of one find/find_all search per region and story, each node is visited once. dispatch is
+    called as dispatch(walker, tag, depth) when the walk enters a tag, depth 1 for the children of the
+    root, and opens frames for the regions and stories that start at it. Every open frame sees the
+    nodes below its element, so a frame's rules end up with what find() would have returned.
+    """
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+        self.active = []
+        self.nodes = 0
+
+    def open(self, tag, kind, rules=()):
+        """Opens a frame for a tag being entered, it collects until the walk leaves the tag."""
+        frame = Frame(tag, kind, rules)
+        self.active.append(frame)
+        return frame
+
+    def enclosing(self, kind):
+        """Returns the open frames of a kind, outermost first."""
+        return [frame for frame in self.active if frame.kind == kind]
+
+    def _enter(self, tag, depth):
+        for frame in self.active:
+            frame.offer(tag)
+        self.dispatch(self, tag, depth)
+
+    def _leave(self, tag):
+        active = self.active
+        for frame in active:
+            frame.leave(tag)
+        while active and active[-1].element is tag:
+            active.pop()
+
+    def walk(self, root):
+        """Walks the descendants of root in document order and returns the number of nodes visited."""
+        nodes = 0
+        elements = []
+        children = [iter(root.contents)]
+        while children:
+            for child in children[-1]:
+                nodes += 1
+                if child.name is None:
+                    continue
+                self._enter(child, len(children))
+                elements.append(child)
+                children.append(iter(child.contents))
+                break
+            else:
+                children.pop()
+                if elements:
+                    self._leave(elements.pop())
+        self.nodes += nodes
+        count_nodes(nodes)
+        return nodes
@@ -0,0 +1,101 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# The saved pages the benchmarks run on double as test fixtures
+FIXTURES_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures')
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture_file:
+        return fixture_file.read()
+
+class StubServer:
+    """Serves queued responses on localhost and records the requests it gets.
+
+    Each path answers with its (status, headers, body) responses in turn, repeating the last one. A
+    response can also be a function of the request headers returning one.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.delays = {}
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    def url(self, path):
+        return 'http://127.0.0.1:%d%s' % (self._server.server_port, path)
+
+    def add(self, path, *responses, delay=0):
+        self.routes[path] = list(responses)
+        self.delays[path] = delay
+        return self.url(path)
+
+    def add_fixture(self, path, name, **headers):
+        return self.add(path, (200, dict({'Content-Type': 'text/html; charset=utf-8'}, **headers), load_fixture(name)))
+
+    def hits(self, path):
+        return sum(1 for request in self.requests if request['path'] == path)
+
+    def _respond(self, target, headers):
+        # Routes ignore the query string, so several urls can share one
+        path = target.split('?', 1)[0]
+        with self._lock:
+            self.requests.append({'path': path, 'target': target, 'headers': headers})
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            queue = self.routes.get(path)
+            response = (queue.pop(0) if len(queue) > 1 else queue[0]) if queue else (404, {}, b'not found')
+        try:
+            time.sleep(self.delays.get(path, 0))
+            return response(headers) if callable(response) else response
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, headers, body = stub._respond(self.path, dict(self.headers))
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+@pytest.fixture
+def stub_server():
+    server = StubServer().start()
+    yield server
+    server.stop()
@@ -0,0 +1,24 @@
+import pytest
+
+from conftest import load_fixture
+from news_fetcher.parser_backend import available_backends, check_backend_parity
+from news_fetcher.sites import get_extractor
+
+# Page kind -> (fixture page, url passed to extractors that take one)
+CASES = {
+    'bbc_homepage': ('bbc_homepage.html', 'https://www.bbc.co.uk/news'),
+    'bbc_homepage_header': ('bbc_homepage.html', None),
+    'bbc_topic': ('bbc_topic.html', 'https://www.bbc.co.uk/news/topics/c4y3wxdx24xt'),
+    'bbc_content': ('bbc_article.html', 'https://www.bbc.co.uk/news/articles/c0000000000o'),
+    'bbc_content_sidebar': ('bbc_article.html', None),
+    'sky_homepage': ('sky_homepage.html', 'https://news.sky.com/'),
+    'sky_homepage_header': ('sky_homepage.html', None),
+    'sky_content': ('sky_article.html', 'https://news.sky.com/story/fixture-13000000'),
+}
+
+@pytest.mark.skipif(available_backends() == ['html.parser'], reason='only html.parser is installed')
+@pytest.mark.parametrize('kind', sorted(CASES))
+def test_backends_match_html_parser(kind):
+    fixture, url = CASES[kind]
+    args = (url,) if url is not None else ()
+    assert check_backend_parity(get_extractor(kind), load_fixture(fixture), *args) == {}
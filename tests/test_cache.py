@@ -0,0 +1,93 @@
+import functools
+
+from news_fetcher.cache import PageCache, _extractor_key
+from news_fetcher.fetcher import Fetcher
+from news_fetcher.scheduler import FakeClock
+
+calls = []
+
+def count_words(html_content, upper=False):
+    calls.append(html_content)
+    words = html_content.decode('utf-8').split()
+    return {'words': [word.upper() for word in words] if upper else words}
+
+def revalidated(etag, last_modified, body):
+    """A response answering 304 to a request carrying the current validators."""
+    def respond(headers):
+        validators = {'ETag': etag, 'Last-Modified': last_modified}
+        validators = {name: value for name, value in validators.items() if value is not None}
+        if (etag and headers.get('If-None-Match') == etag) or (last_modified and headers.get('If-Modified-Since') == last_modified):
+            return 304, validators, b''
+        return 200, validators, body
+    return respond
+
+def test_etag_revalidation_skips_the_parse(stub_server):
+    calls.clear()
+    url = stub_server.add('/news', revalidated('"v1"', None, b'one two'))
+    cache = PageCache()
+    with Fetcher() as fetcher:
+        first = cache.fetch_and_extract(fetcher, url, count_words)
+        second = cache.fetch_and_extract(fetcher, url, count_words)
+    assert first == second == {'words': ['one', 'two']}
+    assert len(calls) == 1
+    assert stub_server.requests[1]['headers'].get('If-None-Match') == '"v1"'
+    assert cache.stats['not_modified'] == 1
+
+def test_last_modified_revalidation(stub_server):
+    calls.clear()
+    last_modified = 'Tue, 01 Oct 2024 10:00:00 GMT'
+    url = stub_server.add('/news', revalidated(None, last_modified, b'one'))
+    cache = PageCache()
+    with Fetcher() as fetcher:
+        cache.fetch_and_extract(fetcher, url, count_words)
+        cache.fetch_and_extract(fetcher, url, count_words)
+    assert stub_server.requests[1]['headers'].get('If-Modified-Since') == last_modified
+    assert cache.stats['not_modified'] == 1
+    assert len(calls) == 1
+
+def test_same_body_is_not_parsed_again(stub_server):
+    calls.clear()
+    url = stub_server.add('/news', (200, {}, b'one two'), (200, {}, b'one two'), (200, {}, b'three'))
+    cache = PageCache()
+    with Fetcher() as fetcher:
+        results = [cache.refresh(fetcher, url, count_words) for _ in range(3)]
+    assert [parsed for _, parsed in results] == [True, False, True]
+    assert results[2][0] == {'words': ['three']}
+    assert len(calls) == 2
+    assert cache.stats == {'not_modified': 0, 'unchanged': 1, 'misses': 2, 'evictions': 0, 'expired': 0}
+
+def test_callers_get_their_own_copy(stub_server):
+    url = stub_server.add('/news', (200, {}, b'one two'))
+    cache = PageCache()
+    with Fetcher() as fetcher:
+        cache.fetch_and_extract(fetcher, url, count_words)['words'].clear()
+        assert cache.fetch_and_extract(fetcher, url, count_words) == {'words': ['one', 'two']}
+
+def test_partial_arguments_are_cached_apart(stub_server):
+    calls.clear()
+    url = stub_server.add('/news', (200, {}, b'one'))
+    cache = PageCache()
+    with Fetcher() as fetcher:
+        plain = cache.fetch_and_extract(fetcher, url, count_words)
+        upper = cache.fetch_and_extract(fetcher, url, functools.partial(count_words, upper=True))
+        again = cache.fetch_and_extract(fetcher, url, functools.partial(count_words, upper=True))
+    assert plain == {'words': ['one']}
+    assert upper == again == {'words': ['ONE']}
+    assert len(calls) == 2
+
+def test_extractor_key_unwraps_nested_partials():
+    nested = functools.partial(functools.partial(count_words, b'x', upper=False), upper=True)
+    assert _extractor_key(nested) == _extractor_key(functools.partial(count_words, b'x', upper=True))
+    assert _extractor_key(count_words) != _extractor_key(functools.partial(count_words, upper=False))
+
+def test_entries_expire_after_ttl(stub_server):
+    calls.clear()
+    url = stub_server.add('/news', (200, {}, b'one'))
+    clock = FakeClock()
+    cache = PageCache(ttl=60, clock=clock)
+    with Fetcher() as fetcher:
+        cache.fetch_and_extract(fetcher, url, count_words)
+        clock.sleep(61)
+        cache.fetch_and_extract(fetcher, url, count_words)
+    assert cache.stats['expired'] == 1
+    assert len(calls) == 2
@@ -0,0 +1,26 @@
+from news_fetcher.diff import HomepageDiffer, diff_homepage, flatten_homepage
+
+def story(slug):
+    return {'title': 'Story %s' % slug, 'url': 'https://www.bbc.co.uk/news/articles/%s' % slug}
+
+def homepage(*clusters):
+    return {'url': 'https://www.bbc.co.uk/news', 'clusters': [
+        {'title': title, 'content': [story(slug) for slug in slugs]} for title, slugs in clusters]}
+
+def test_clusters_sharing_a_title_are_kept_apart():
+    stories = flatten_homepage(homepage(('Latest', 'ab'), ('Latest', 'cd')))
+    assert {key.rsplit('/', 1)[-1]: (story['cluster'], story['position']) for key, story in stories.items()} == {
+        'a': ('Latest', 0), 'b': ('Latest', 1), 'c': ('Latest#2', 0), 'd': ('Latest#2', 1)}
+
+def test_unchanged_page_with_duplicate_cluster_titles_has_no_moves():
+    page = flatten_homepage(homepage(('Latest', 'ab'), ('Latest', 'cd')))
+    changes = diff_homepage(page, page)
+    assert changes['moved'] == [] and changes['unchanged'] == 4
+
+def test_move_between_clusters_sharing_a_title():
+    differ = HomepageDiffer()
+    differ.update(homepage(('Latest', 'ab'), ('Latest', 'cd')))
+    changes = differ.update(homepage(('Latest', 'abc'), ('Latest', 'd')))
+    assert [(move['title'], move['from'], move['to']) for move in changes['moved']] == [
+        ('Story c', {'cluster': 'Latest#2', 'position': 0}, {'cluster': 'Latest', 'position': 2})]
+    assert changes['added'] == changes['removed'] == []
@@ -0,0 +1,70 @@
+from conftest import load_fixture
+from news_fetcher.fetcher import Fetcher
+from news_fetcher.parser_backend import _strip_timestamps
+from news_fetcher.sites import get_extractor
+
+def test_retries_retryable_status_until_success(stub_server):
+    url = stub_server.add('/flaky', (503, {}, b''), (502, {}, b''), (200, {}, b'ok'))
+    delays = []
+    with Fetcher(retries=3, backoff=0.5, sleep=delays.append) as fetcher:
+        response = fetcher.fetch(url)
+    assert response.status_code == 200
+    assert stub_server.hits('/flaky') == 3
+    # Exponential backoff with up to half of it taken off by jitter
+    assert 0.25 <= delays[0] <= 0.5
+    assert 0.5 <= delays[1] <= 1.0
+
+def test_returns_last_response_once_retries_run_out(stub_server):
+    url = stub_server.add('/down', (503, {}, b''))
+    with Fetcher(retries=2, sleep=lambda seconds: None) as fetcher:
+        response = fetcher.fetch(url)
+    assert response.status_code == 503
+    assert stub_server.hits('/down') == 3
+
+def test_does_not_retry_client_errors(stub_server):
+    url = stub_server.add('/missing', (404, {}, b''))
+    with Fetcher(retries=3, sleep=lambda seconds: None) as fetcher:
+        assert fetcher.fetch(url).status_code == 404
+    assert stub_server.hits('/missing') == 1
+
+def test_honours_retry_after(stub_server):
+    url = stub_server.add('/busy', (429, {'Retry-After': '7'}, b''), (200, {}, b'ok'))
+    delays = []
+    with Fetcher(sleep=delays.append) as fetcher:
+        assert fetcher.fetch(url).status_code == 200
+    assert delays == [7.0]
+
+def test_caps_retry_after(stub_server):
+    url = stub_server.add('/stall', (503, {'Retry-After': '86400'}, b''), (200, {}, b'ok'))
+    delays = []
+    with Fetcher(max_retry_after=5, sleep=delays.append) as fetcher:
+        assert fetcher.fetch(url).status_code == 200
+    assert delays == [5.0]
+
+def test_limits_concurrent_requests_per_host(stub_server):
+    stub_server.add('/slow', (200, {}, b'ok'), delay=0.2)
+    urls = ['%s?page=%d' % (stub_server.url('/slow'), page) for page in range(8)]
+    with Fetcher(max_workers=8, per_host_limit=2) as fetcher:
+        results = list(fetcher.fetch_many(urls))
+    assert sorted(result['url'] for result in results) == sorted(urls)
+    assert all(result['status'] == 200 for result in results)
+    assert stub_server.max_active == 2
+
+def test_fetch_and_extract_parses_pages_as_they_complete(stub_server):
+    bbc_url = stub_server.add_fixture('/news', 'bbc_homepage.html')
+    sky_url = stub_server.add_fixture('/sky', 'sky_homepage.html')
+    missing_url = stub_server.add('/gone', (404, {}, b''))
+    bbc_homepage = get_extractor('bbc_homepage')
+    sky_homepage = get_extractor('sky_homepage')
+
+    with Fetcher(sleep=lambda seconds: None) as fetcher:
+        results = {result['url']: result for result in fetcher.fetch_and_extract(
+            [(bbc_url, bbc_homepage), (sky_url, sky_homepage), (missing_url, bbc_homepage)])}
+
+    assert _strip_timestamps(results[bbc_url]['data']) == _strip_timestamps(
+        bbc_homepage(load_fixture('bbc_homepage.html'), bbc_url))
+    assert _strip_timestamps(results[sky_url]['data']) == _strip_timestamps(
+        sky_homepage(load_fixture('sky_homepage.html'), sky_url))
+    assert results[bbc_url]['error'] is None and results[sky_url]['error'] is None
+    assert results[missing_url]['data'] is None
+    assert results[missing_url]['error'] == 'HTTP 404'
@@ -0,0 +1,34 @@
+from conftest import load_fixture
+from news_fetcher import parser_backend
+from news_fetcher.instrumentation import Metrics, instrumentation
+from news_fetcher.sites import get_extractor
+
+URL = 'https://www.bbc.co.uk/news/articles/c0000000000o'
+
+def test_steps_are_wrapped_only_while_enabled():
+    make_soup = parser_backend.make_soup
+    assert not hasattr(get_extractor('bbc_content'), '__wrapped__')
+
+    metrics = Metrics()
+    with instrumentation(metrics):
+        assert parser_backend.make_soup.__wrapped__ is make_soup
+        get_extractor('bbc_content')(load_fixture('bbc_article.html'), URL)
+
+    assert parser_backend.make_soup is make_soup
+    assert not hasattr(get_extractor('bbc_content'), '__wrapped__')
+    assert metrics.steps['parser_bbc_content.extract_data_bbc_news_content']['calls'] == 1
+    assert metrics.steps['parser_backend.make_soup']['calls'] == 1
+
+def test_searches_are_counted_on_soups_built_while_enabled():
+    metrics = Metrics()
+    with instrumentation(metrics):
+        get_extractor('bbc_content')(load_fixture('bbc_article.html'), URL)
+    assert sum(step['find'] + step['find_all'] for step in metrics.steps.values()) > 0
+    assert sum(step['nodes'] for step in metrics.steps.values()) > 0
+
+    # A soup built beforehand is an ordinary one, bs4 itself is left as it is
+    soup = parser_backend.make_soup(load_fixture('bbc_article.html'))
+    metrics = Metrics()
+    with instrumentation(metrics):
+        get_extractor('bbc_content')(soup, URL)
+    assert sum(step['find'] + step['find_all'] for step in metrics.steps.values()) == 0
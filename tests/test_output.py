@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from news_fetcher import output
+from news_fetcher.output import NDJSONWriter, iter_ndjson
+
+SUFFIXES = ['.ndjson', '.ndjson.gz', '.ndjson.zst']
+
+def write_records(path, numbers, resume=False):
+    with NDJSONWriter(path, flush_every=5, resume=resume) as writer:
+        for number in numbers:
+            writer.write({'n': number, 'title': 'story %d' % number})
+
+@pytest.mark.parametrize('block_size', [output.REPAIR_BLOCK_SIZE, 7])
+@pytest.mark.parametrize('suffix', SUFFIXES)
+def test_resume_cuts_off_a_half_written_flush(tmp_path, monkeypatch, suffix, block_size):
+    # A block size smaller than a member makes the repair read across block boundaries
+    monkeypatch.setattr(output, 'REPAIR_BLOCK_SIZE', block_size)
+    path = str(tmp_path / ('results' + suffix))
+    write_records(path, range(5))
+    first_flush = os.path.getsize(path)
+    write_records(path, range(5, 10), resume=True)
+    second_flush = os.path.getsize(path)
+
+    # A crash in the middle of writing the second flush
+    with open(path, 'r+b') as crashed_file:
+        crashed_file.truncate(first_flush + (second_flush - first_flush) // 2)
+
+    write_records(path, [], resume=True)
+    kept = [record['n'] for record in iter_ndjson(path)]
+    if suffix == '.ndjson':
+        # Plain files keep the complete lines of the half written flush
+        assert 5 < len(kept) < 10
+    else:
+        # A compressed flush is one gzip member or zstd frame, kept whole or not at all
+        assert os.path.getsize(path) == first_flush
+    assert kept == list(range(len(kept)))
+
+    # Writing the lost records again leaves every record exactly once
+    write_records(path, range(len(kept), 10), resume=True)
+    assert [record['n'] for record in iter_ndjson(path)] == list(range(10))
+
+@pytest.mark.parametrize('suffix', SUFFIXES)
+def test_resume_keeps_a_complete_file(tmp_path, suffix):
+    path = str(tmp_path / ('results' + suffix))
+    write_records(path, range(12))
+    size = os.path.getsize(path)
+    write_records(path, [], resume=True)
+    assert os.path.getsize(path) == size
+    assert [record['n'] for record in iter_ndjson(path)] == list(range(12))
+
+@pytest.mark.parametrize('suffix', SUFFIXES)
+def test_resume_of_a_file_cut_inside_its_first_flush(tmp_path, suffix):
+    path = str(tmp_path / ('results' + suffix))
+    write_records(path, range(5))
+    with open(path, 'r+b') as crashed_file:
+        crashed_file.truncate(os.path.getsize(path) - 3)
+
+    write_records(path, [], resume=True)
+    kept = [record['n'] for record in iter_ndjson(path)]
+    assert kept == ([0, 1, 2, 3] if suffix == '.ndjson' else [])
+    write_records(path, range(len(kept), 5), resume=True)
+    assert [record['n'] for record in iter_ndjson(path)] == list(range(5))
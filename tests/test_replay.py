@@ -0,0 +1,46 @@
+import logging
+
+import pytest
+
+from conftest import load_fixture
+from news_fetcher import replay
+from news_fetcher.archive import write_archive_record
+from news_fetcher.output import iter_ndjson
+
+TOPIC_URL = 'https://www.bbc.co.uk/news/topics/c4y3wxdx24xt?page=%d'
+
+class Killed(BaseException):
+    pass
+
+@pytest.fixture
+def archive(tmp_path):
+    path = str(tmp_path / 'pages.archive')
+    with open(path, 'wb') as archive_file:
+        for page in range(1, 6):
+            write_archive_record(archive_file, TOPIC_URL % page, load_fixture('bbc_topic.html'))
+    return path
+
+@pytest.mark.parametrize('suffix', ['.ndjson', '.ndjson.gz'])
+def test_rerun_after_a_crash_writes_every_result_once(tmp_path, monkeypatch, caplog, archive, suffix):
+    output = str(tmp_path / ('replayed' + suffix))
+    argv = [archive, '--output', output, '--workers', '1', '--checkpoint-every', '2']
+    save_checkpoint = replay.save_checkpoint
+    saves = []
+
+    def crash_on_second_save(path, checkpoint):
+        # Killed after the output was flushed but before the checkpoint got saved
+        saves.append(path)
+        if len(saves) >= 2:
+            raise Killed()
+        save_checkpoint(path, checkpoint)
+
+    monkeypatch.setattr(replay, 'save_checkpoint', crash_on_second_save)
+    with pytest.raises(Killed):
+        replay.main(argv)
+    assert len(list(iter_ndjson(output))) == 4
+
+    monkeypatch.setattr(replay, 'save_checkpoint', save_checkpoint)
+    with caplog.at_level(logging.INFO, logger='news_fetcher'):
+        replay.main(argv)
+    assert [result['url'] for result in iter_ndjson(output)] == [TOPIC_URL % page for page in range(1, 6)]
+    assert 'parsed: 3, errors: 0, skipped: 0' in caplog.messages
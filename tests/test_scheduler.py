@@ -0,0 +1,127 @@
+import pytest
+
+from conftest import load_fixture
+from news_fetcher.fetcher import Fetcher
+from news_fetcher.parser_backend import _strip_timestamps
+from news_fetcher.scheduler import FakeClock, PollScheduler, TokenBucket
+from news_fetcher.sites import get_extractor
+
+def page_length(html_content):
+    return {'length': len(html_content)}
+
+def make_scheduler(clock, **options):
+    options.setdefault('jitter', 0)
+    return PollScheduler(fetcher=Fetcher(retries=0), clock=clock, sleep=clock.sleep, **options)
+
+def test_token_bucket_refills_at_its_rate_up_to_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == pytest.approx(0.5)
+
+    clock.sleep(0.5)
+    assert bucket.acquire()
+    assert not bucket.acquire()
+
+    clock.sleep(60)
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+
+def test_token_bucket_pause_holds_back_tokens():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=5, clock=clock)
+    bucket.pause(30)
+    assert bucket.delay() == 30
+    clock.sleep(30)
+    assert bucket.acquire()
+
+def test_due_pages_are_polled_by_priority():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, host_rate=1, host_burst=1)
+    scheduler.add('https://www.bbc.co.uk/news/articles/c1', 'bbc_article_page', extract_function=page_length)
+    scheduler.add('https://www.bbc.co.uk/news/topics/c2', 'bbc_topic', extract_function=page_length)
+    scheduler.add('https://www.bbc.co.uk/news', 'bbc_homepage', extract_function=page_length)
+
+    order = []
+    for _ in range(3):
+        page, wait = scheduler.next_page()
+        while page is None:
+            # One token per second for the host, the other due pages wait their turn
+            clock.sleep(wait)
+            page, wait = scheduler.next_page()
+        order.append(page['kind'])
+    assert order == ['bbc_homepage', 'bbc_topic', 'bbc_article_page']
+    assert scheduler.stats['throttled'] == 2
+
+def test_polls_stay_within_the_host_rate(stub_server):
+    url = stub_server.add_fixture('/news', 'bbc_homepage.html')
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, host_rate=0.5, host_burst=1, adaptive=False)
+    scheduler.add(url, 'bbc_homepage', interval=0.1)
+
+    results = []
+    scheduler.run(results.append, until=60)
+    assert len(results) == 30
+    assert all(b['polled_at'] - a['polled_at'] >= 2 for a, b in zip(results, results[1:]))
+    assert _strip_timestamps(results[0]['data']) == _strip_timestamps(
+        get_extractor('bbc_homepage')(load_fixture('bbc_homepage.html'), url))
+
+def test_unchanged_pages_back_off_and_changed_ones_reset(stub_server):
+    url = stub_server.add('/news', (200, {}, b'one'), (200, {}, b'one'), (200, {}, b'one'), (200, {}, b'two'),
+                          (200, {}, b'two'))
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, host_rate=100, max_backoff=4)
+    scheduler.add(url, 'bbc_homepage', interval=10, extract_function=page_length)
+
+    results = []
+    scheduler.run(results.append, max_polls=5)
+    assert [result['changed'] for result in results] == [True, False, False, True, False]
+    # Each unchanged poll doubles the interval up to four times it, a change resets it
+    assert [result['polled_at'] for result in results] == [0, 10, 30, 70, 80]
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_throttled_host_backs_off_and_recovers(stub_server, status):
+    url = stub_server.add('/news', (status, {}, b''), (status, {}, b''), (200, {}, b'ok'), (status, {}, b''),
+                          (200, {}, b'ok'))
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, host_rate=100, throttle_pause=30, adaptive=False)
+    scheduler.add(url, 'bbc_homepage', interval=10, extract_function=page_length)
+
+    results = []
+    scheduler.run(results.append, max_polls=5)
+    assert [result['error'] is None for result in results] == [False, False, True, False, True]
+    # Pauses of 30s then 60s, then the success ends the backoff and the next 429/503 pauses 30s again
+    assert [result['polled_at'] for result in results] == [0, 30, 90, 100, 130]
+    assert scheduler.stats['backed_off'] == 3
+
+def test_retry_after_sets_the_pause_up_to_its_cap(stub_server):
+    url = stub_server.add('/news', (429, {'Retry-After': '120'}, b''), (503, {'Retry-After': '86400'}, b''),
+                          (200, {}, b'ok'))
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, host_rate=100, max_throttle_pause=900, adaptive=False)
+    scheduler.add(url, 'bbc_homepage', interval=10, extract_function=page_length)
+
+    results = []
+    scheduler.run(results.append, max_polls=3)
+    assert [result['polled_at'] for result in results] == [0, 120, 1020]
+
+def test_a_url_is_polled_as_every_kind_it_was_added_as(stub_server):
+    url = stub_server.add('/news', (200, {}, b'one'))
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, host_rate=100)
+    scheduler.add(url, 'bbc_homepage', interval=10, extract_function=page_length)
+    scheduler.add(url, 'bbc_homepage_header', interval=10, extract_function=lambda html_content: {'header': True})
+    # Adding it again as the same kind replaces its page instead of polling it twice
+    scheduler.add(url, 'bbc_homepage', interval=10, extract_function=page_length)
+
+    results = []
+    scheduler.run(results.append, until=5)
+    assert sorted((result['kind'], result['data']) for result in results) == [
+        ('bbc_homepage', {'length': 3}), ('bbc_homepage_header', {'header': True})]
+
+    scheduler.remove(url, 'bbc_homepage_header')
+    results = []
+    scheduler.run(results.append, until=15)
+    assert [result['kind'] for result in results] == ['bbc_homepage']
+
+    scheduler.remove(url)
+    assert scheduler.pages == {}
@@ -0,0 +1,59 @@
+import sqlite3
+
+from news_fetcher.store import ArticleStore
+
+URL = 'https://www.bbc.co.uk/news/articles/c0000000000o'
+
+def article(content='First version.', timestamp='2024-05-01 10:00:00', url=URL):
+    return {
+        'news': 'BBC', 'title': 'A story', 'content': content, 'img_urls': [], 'url': url, 'timestamp': timestamp,
+        'bbc_parts': {'related_topics': [{'name': 'Climate change', 'link': '/bbc/news/topics/c1'}]},
+    }
+
+def rows(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute('SELECT url, first_seen, last_seen, data FROM articles').fetchall()
+
+def test_storing_an_article_again_is_idempotent(tmp_path):
+    path = str(tmp_path / 'articles.db')
+    with ArticleStore(path, batch_size=1) as store:
+        store.put(article())
+        store.put(article(timestamp='2024-05-02 10:00:00'))
+        # Another spelling of the same url, in the same batch as a repeat
+        store.batch_size = 10
+        store.put(article(timestamp='2024-05-03 10:00:00', url=URL + '?utm_source=twitter#comments'))
+        store.put(article(timestamp='2024-05-03 10:00:00'))
+        assert len(store) == 1
+        assert store.stats == {'written': 1, 'unchanged': 2, 'changed': 0}
+        assert len(list(store.query(topic='Climate change'))) == 1
+
+    [(key, first_seen, last_seen, data)] = rows(path)
+    assert (first_seen, last_seen) == ('2024-05-01T10:00:00Z', '2024-05-03T10:00:00Z')
+    # An unchanged article keeps the data first stored
+    assert '"2024-05-01T10:00:00Z"' in data
+
+    # The same articles on another run leave the database as it is
+    with ArticleStore(path) as store:
+        assert store.contains(URL + '?at_medium=RSS')
+        store.put(article(timestamp='2024-05-02 10:00:00'))
+    assert rows(path) == [(key, first_seen, last_seen, data)]
+
+def test_changed_article_replaces_the_stored_one(tmp_path):
+    path = str(tmp_path / 'articles.db')
+    with ArticleStore(path, batch_size=1) as store:
+        store.put(article())
+        store.put(article(content='Updated version.', timestamp='2024-05-02 10:00:00'))
+        assert store.get(URL)['content'] == 'Updated version.'
+        assert store.stats == {'written': 1, 'unchanged': 0, 'changed': 1}
+
+    [(_, first_seen, last_seen, _)] = rows(path)
+    assert (first_seen, last_seen) == ('2024-05-01T10:00:00Z', '2024-05-02T10:00:00Z')
+
+def test_last_seen_never_moves_back(tmp_path):
+    path = str(tmp_path / 'articles.db')
+    with ArticleStore(path, batch_size=1) as store:
+        store.put(article(timestamp='2024-05-03 10:00:00'))
+        store.put(article(timestamp='2024-05-01 10:00:00'))
+        store.mark_seen([URL], '2024-05-02T10:00:00Z')
+    [(_, first_seen, last_seen, _)] = rows(path)
+    assert first_seen == last_seen == '2024-05-03T10:00:00Z'
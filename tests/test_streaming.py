@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import load_fixture
+from news_fetcher.parser_backend import _strip_timestamps, available_backends
+from news_fetcher.sites import get_extractor, get_stream_extractor, load_site_module
+from news_fetcher.streaming import iter_chunks
+
+# Homepage kind -> (fixture page, url, module of the collect function, collect function)
+CASES = {
+    'bbc_homepage': ('bbc_homepage.html', 'https://www.bbc.co.uk/news', ('news_fetcher_bbc', 'parser_bbc_homepage'),
+                     'collect_bbc_news_homepage'),
+    'sky_homepage': ('sky_homepage.html', 'https://news.sky.com/', ('news_fetcher_sky', 'parser_sky_homepage'),
+                     'collect_sky_news_homepage'),
+}
+
+@pytest.mark.parametrize('backend', available_backends())
+@pytest.mark.parametrize('kind', sorted(CASES))
+def test_homepage_stream_in_small_chunks_matches_the_tree(kind, backend):
+    fixture, url, module, collect_name = CASES[kind]
+    html_content = load_fixture(fixture)
+    collect = getattr(load_site_module(*module), collect_name)
+
+    # 7 byte chunks split most tags, attributes and texts across chunks
+    events = list(get_stream_extractor(kind)(iter_chunks(html_content, 7), url))
+    assert [event['type'] for event in events].count('cluster_story') > 0
+    streamed = _strip_timestamps(collect(events, url))
+    assert streamed == _strip_timestamps(get_extractor(kind)(html_content, url, backend=backend))
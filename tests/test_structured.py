@@ -0,0 +1,26 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from conftest import load_fixture
+from news_fetcher.sites import get_extractor
+
+URL = 'https://news.sky.com/story/c0000000000o'
+
+def without_json_ld(html_content):
+    return re.sub(rb'<script type="application/ld\+json">.*?</script>', b'', html_content, flags=re.S)
+
+@pytest.mark.parametrize('page, structured, date', [
+    # JSON-LD publish date
+    (load_fixture('sky_article.html'), True, datetime(2024, 10, 1, 9, 0)),
+    # Printed date parsed as UK time when the page has no JSON-LD
+    (without_json_ld(load_fixture('sky_article.html')), True, datetime(2024, 10, 1, 9, 0)),
+    # The tag walk alone keeps the printed date as it is
+    (load_fixture('sky_article.html'), False, 'Tuesday 1 October 2024 10:00, UK'),
+], ids=['json_ld', 'printed_date', 'tag_walk_only'])
+def test_sky_article_date(page, structured, date):
+    article = get_extractor('sky_content')(page, URL, structured=structured)
+    assert type(article['article_infos']['date']) is type(date)
+    assert article['article_infos']['date'] == date
+    assert article['field_sources']['date'] == ('json_ld' if structured and b'ld+json' in page else 'dom')
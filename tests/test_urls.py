@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import load_fixture
+from news_fetcher.adapters import route_url
+from news_fetcher.pipeline import CrawlPipeline, resolve_link
+from news_fetcher.sites import get_extractor
+from news_fetcher.urls import LINK_CONFIG, BloomFilter, canonicalise_url, site_link, url_key
+
+MALFORMED_HREFS = ('https://www.bbc.co.uk:abc/news', 'http://[::1/news', ':99999')
+
+def test_canonicalises_links():
+    assert site_link('bbc', '/news/x?at_medium=RSS#top') == '/bbc/news/x'
+    assert site_link('sky', '//NEWS.SKY.COM:443/story/y') == 'https://news.sky.com/story/y'
+    assert url_key('/bbc/news/x/') == url_key('https://www.bbc.co.uk/news/x?at_campaign=1')
+
+@pytest.mark.parametrize('base', ['/bbc', 'https://www.bbc.co.uk'])
+@pytest.mark.parametrize('href', MALFORMED_HREFS)
+def test_malformed_hrefs_are_joined_without_canonicalising(monkeypatch, base, href):
+    monkeypatch.setitem(LINK_CONFIG['bbc'], 'base', base)
+    link = site_link('bbc', href)
+    assert link == (href if href.startswith('http') else base + href)
+    assert canonicalise_url(link) == link
+    # Nothing downstream of the extractors raises on them either
+    url_key(link)
+    route_url(link)
+    assert resolve_link(link) is None
+
+def test_malformed_href_does_not_fail_the_extraction():
+    html_content = load_fixture('bbc_homepage.html').replace(b'href="/news', b'href="https://www.bbc.co.uk:abc/news')
+    data = get_extractor('bbc_homepage')(html_content, 'https://www.bbc.co.uk/news')
+    links = [story['url'] for cluster in data['clusters'] for story in cluster['content']]
+    assert links and all(link.startswith('https://www.bbc.co.uk:abc/news') for link in links)
+
+@pytest.mark.parametrize('make_seen', [lambda: CrawlPipeline(print).seen, lambda: BloomFilter(1000)],
+                         ids=['pipeline_seen_set', 'bloom_filter'])
+def test_seen_sets_keep_paginated_urls_apart(make_seen):
+    seen = make_seen()
+    topic = 'https://www.bbc.co.uk/news/topics/c1'
+    assert [seen.add('%s?page=%d' % (topic, page)) for page in (1, 2, 3)] == [True, True, True]
+    # Other spellings of a page already seen are still the same page
+    assert not seen.add(topic + '?page=2&at_medium=RSS#top')
+    assert topic + '/?page=3' in seen
+    assert len(seen) == 3
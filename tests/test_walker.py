@@ -0,0 +1,28 @@
+import pytest
+
+from conftest import load_fixture
+from news_fetcher.parser_backend import _strip_timestamps, available_backends, make_soup
+from news_fetcher.sites import get_extractor
+
+# Extractors with a single pass mode -> (fixture page, url)
+CASES = {
+    'bbc_homepage': ('bbc_homepage.html', 'https://www.bbc.co.uk/news'),
+    'bbc_topic': ('bbc_topic.html', 'https://www.bbc.co.uk/news/topics/c4y3wxdx24xt'),
+    'sky_homepage': ('sky_homepage.html', 'https://news.sky.com/'),
+}
+
+@pytest.mark.parametrize('backend', available_backends())
+@pytest.mark.parametrize('kind', sorted(CASES))
+def test_single_pass_matches_the_searches(kind, backend):
+    fixture, url = CASES[kind]
+    extract_function = get_extractor(kind)
+    html_content = load_fixture(fixture)
+
+    walked = _strip_timestamps(extract_function(html_content, url, backend=backend))
+    searched = _strip_timestamps(extract_function(html_content, url, backend=backend, single_pass=False))
+    assert walked == searched
+    assert sum(len(cluster['content']) for cluster in walked['clusters']) > 0
+
+    # Both modes also read a prebuilt soup the same way
+    soup = make_soup(html_content, backend)
+    assert _strip_timestamps(extract_function(soup, url, single_pass=False)) == walked